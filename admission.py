@@ -0,0 +1,185 @@
+"""
+Per-endpoint admission control and load shedding.
+
+Endpoints are grouped into classes, each with a concurrency limit shared by
+every thread of every worker. A request that finds its class full waits up to
+the class's queue timeout for a slot, then is either degraded (the endpoint
+serves a cheaper answer, see `g.admission_degraded`) or rejected with a fast
+503 + Retry-After. Endpoints in no class, and everything in
+PRIORITY_ENDPOINTS, are never held back, so a pile-up of slow upstream calls
+can't starve likes and favorites.
+
+Cross-worker slots are lock files under ADMISSION_DIR held with flock(): a
+slot is free when nobody holds its lock, and the kernel releases it if a
+worker dies mid-request. Where fcntl isn't available (Windows dev boxes) the
+limits only apply per process.
+"""
+import os
+import random
+import threading
+import time
+
+from flask import current_app, g, jsonify, request
+
+from metrics import ADMISSION
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+POLL_SECONDS = 0.02
+
+
+class SlotPool:
+    """`limit` slots shared across processes (flock) plus an optional per-process cap."""
+
+    def __init__(self, name, limit, per_worker=None, directory=None):
+        self.name = name
+        self.limit = limit
+        self.per_worker = per_worker or limit
+        self.directory = directory
+        self._local_lock = threading.Lock()
+        self._local_in_use = 0
+        if fcntl and directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _take_local(self):
+        with self._local_lock:
+            if self._local_in_use >= self.per_worker:
+                return False
+            self._local_in_use += 1
+            return True
+
+    def _give_local(self):
+        with self._local_lock:
+            self._local_in_use -= 1
+
+    def _take_shared(self):
+        if not (fcntl and self.directory):
+            return -1
+        offset = random.randrange(self.limit)
+        for i in range(self.limit):
+            path = os.path.join(self.directory, f"{self.name}.{(offset + i) % self.limit}.lock")
+            fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def acquire(self, timeout):
+        """A slot token, or None if none freed up within `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._take_local():
+                fd = self._take_shared()
+                if fd is not None:
+                    return fd
+                self._give_local()
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(POLL_SECONDS)
+
+    def release(self, token):
+        if token >= 0:
+            fcntl.flock(token, fcntl.LOCK_UN)
+            os.close(token)
+        self._give_local()
+
+
+class _SlotHeldStream:
+    """Response body that keeps an admission slot until it is exhausted or closed."""
+
+    def __init__(self, chunks, release):
+        self._chunks = iter(chunks)
+        self._release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            self._free()
+            raise
+
+    def _free(self):
+        release, self._release = self._release, None
+        if release:
+            release()
+
+    def close(self):
+        # The WSGI server calls this even if the client went away before the first chunk
+        self._free()
+        close = getattr(self._chunks, 'close', None)
+        if close:
+            close()
+
+
+def hold_slot_while_streaming(chunks):
+    """
+    Wrap a streamed response body so the request's admission slot is held until
+    the body is done. Without this it is released when the view returns, before
+    the first chunk is sent.
+    """
+    held = g.pop('_admission', None)
+    if held is None:
+        return chunks
+    name, token = held
+    pool = current_app.extensions['admission'][name]
+    return _SlotHeldStream(chunks, lambda: pool.release(token))
+
+
+def init_admission_control(app, classes, priority_endpoints=()):
+    """
+    `classes` maps a class name to {'endpoints': set, 'limit': int, 'queue_timeout': seconds,
+    'per_worker': int or None, 'degrade': set of endpoints that can serve a degraded answer,
+    'retry_after': seconds}. A limit of 0 turns the class off.
+    """
+    app.config.setdefault('ADMISSION_CONTROL', True)
+    # Per deployment: slots must only be shared by the workers of one app
+    directory = app.config.get('ADMISSION_DIR') or os.path.join(app.instance_path, 'admission')
+
+    pools, class_of = {}, {}
+    for name, spec in classes.items():
+        if not spec.get('limit'):
+            continue
+        pools[name] = SlotPool(name, spec['limit'], spec.get('per_worker'), directory)
+        for endpoint in spec['endpoints']:
+            if endpoint not in priority_endpoints:
+                class_of[endpoint] = name
+
+    @app.before_request
+    def _admit():
+        name = class_of.get(request.endpoint)
+        if name is None or not app.config['ADMISSION_CONTROL']:
+            return
+        spec = classes[name]
+        started = time.monotonic()
+        token = pools[name].acquire(spec.get('queue_timeout', 0))
+        if token is not None:
+            g._admission = (name, token)
+            ADMISSION.labels(name, 'queued' if time.monotonic() - started > POLL_SECONDS else 'admitted').inc()
+            return
+        if request.endpoint in spec.get('degrade', ()):
+            g.admission_degraded = True
+            ADMISSION.labels(name, 'degraded').inc()
+            return
+        ADMISSION.labels(name, 'shed').inc()
+        response = jsonify({'error': 'Server is busy, please retry shortly.'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(spec.get('retry_after', 2))
+        return response
+
+    @app.teardown_request
+    def _release(exc):
+        held = g.pop('_admission', None)
+        if held:
+            name, token = held
+            pools[name].release(token)
+
+    app.extensions['admission'] = pools
+    return pools
@@ -1,17 +1,41 @@
 import os
+import re
+import logging
 import uuid
+import threading
+import tempfile
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from math import radians, cos, sin, asin, sqrt
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from urllib.parse import quote
+from math import radians, cos, sin, asin, sqrt, floor, log2
+from flask import (Flask, render_template, request, redirect, url_for, session, flash, jsonify, abort,
+                   send_from_directory, g, stream_with_context, make_response)
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
+import click
+from jinja2 import FileSystemBytecodeCache
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-import requests
 from dotenv import load_dotenv
-from PIL import Image, ExifTags
-from flask_login import current_user, login_required
 from flask_wtf.csrf import CSRFProtect
+from autocomplete import PrefixIndex
+from recommendations import compute_item_similarities, interaction_strength
+from viewmodels import cards_from_rows, attach_user_flags, attach_comments, chunks
+from serializers import Field, Schema, FieldsError, parse_fields, json_response, dumps
+from exporter import FORMATS as EXPORT_FORMATS, encode_rows, gzip_chunks
+from importer import (RecordError, RestaurantMatcher, Geocoder, Checkpoint, read_records,
+                      clean_restaurant, clean_plate)
+from sqltrace import init_sql_instrumentation
+from dbengine import engine_options, init_read_replica, RoutingSession
+from admission import init_admission_control, hold_slot_while_streaming
+from cache import Cache, backend_from_url, default_cache_url
+from live import Broadcaster, event_log_from_url
+from profiler import init_profiler, add_phase_time, list_profiles
+from metrics import (init_metrics, track_upstream, cache_hit, cache_miss,
+                     APP_ERRORS, CACHE_EVICTIONS, IMAGE_PROCESSING, LIVE_STREAMS, PLAY_CARD_IMAGES,
+                     PLAY_IMAGE_WAIT, SWIPES, UPSTREAM_ERRORS)
 
 
 
@@ -21,24 +45,147 @@ from flask_wtf.csrf import CSRFProtect
 load_dotenv()
 
 # ------------------ App Setup ------------------
+# Heavy modules (PIL, requests, alembic) are imported where they're first used, and
+# per-process resources (DB connections, HTTP pools) are reset in each forked worker,
+# so the app can be imported once in the gunicorn master with WEB_PRELOAD=1 and shared
+# copy-on-write by the workers (see warm_up() and gunicorn.conf.py).
 app = Flask(__name__)
+# Compiled templates are cached on disk, so new workers skip Jinja's parse/compile step
+app.jinja_options = {
+    **app.jinja_options,
+    'bytecode_cache': FileSystemBytecodeCache(
+        os.getenv('JINJA_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'plater8te-jinja')
+    ),
+}
+os.makedirs(app.jinja_options['bytecode_cache'].directory, exist_ok=True)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pool sizing / SQLite WAL etc. per backend, plus an optional read replica (see dbengine.py)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(os.getenv('DATABASE_URL'))
+if os.getenv('DATABASE_REPLICA_URL'):
+    app.config['SQLALCHEMY_BINDS'] = {'replica': os.getenv('DATABASE_REPLICA_URL')}
+app.config['REPLICA_STICKY_SECONDS'] = float(os.getenv('REPLICA_STICKY_SECONDS', 5))
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
 app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static', 'uploads')
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 csrf = CSRFProtect(app)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+if os.environ.get('FLASK_RUN_FROM_CLI') == 'true':
+    # Only the `flask db ...` commands need Flask-Migrate (and alembic); web workers skip it
+    from flask_migrate import Migrate
+    migrate = Migrate(app, db)
+
+# Read-only pages that can tolerate a few seconds of replica lag
+READ_REPLICA_ENDPOINTS = {'home', 'search_plates', 'favorites', 'get_plates_nearby'}
+init_read_replica(app, db, READ_REPLICA_ENDPOINTS)
+
+# Per-request query counts / DB time / N+1 warnings (see sqltrace.py)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+app.config['SQL_STRICT'] = os.getenv('SQL_STRICT') == '1'
+app.config['SQL_DEFAULT_QUERY_BUDGET'] = int(os.getenv('SQL_DEFAULT_QUERY_BUDGET', 30))
+init_sql_instrumentation(app)
+init_metrics(app, lambda: db.engine)
+logger = logging.getLogger('plater8te')
+
+# Admin-only tooling (profiler, ...) is gated on these user ids
+ADMIN_USER_IDS = {int(i) for i in os.getenv('ADMIN_USER_IDS', '').split(',') if i.strip()}
+
+
+def is_admin():
+    return session.get('user_id') in ADMIN_USER_IDS
+
+
+# On-demand profiling: `X-Profile: sampling|cprofile` from an admin, or a sampled fraction (see profiler.py)
+app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_SLOW_MS'] = float(os.getenv('PROFILE_SLOW_MS', 500))
+app.config['PROFILER_TOKEN'] = os.getenv('PROFILER_TOKEN')
+app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+init_profiler(app, is_admin)
+
+# Admission control (see admission.py): upstream-bound routes get a global slot limit so
+# slow Google/Nominatim calls can't take every worker thread; cheap writes are never held back.
+app.config['ADMISSION_CONTROL'] = os.getenv('ADMISSION_CONTROL', '1') == '1'
+app.config['ADMISSION_DIR'] = os.getenv('ADMISSION_DIR')
+ADMISSION_PRIORITY_ENDPOINTS = {'toggle_like', 'toggle_favorite', 'plate_swipe', 'add_comment', 'rate_plate'}
+ADMISSION_CLASSES = {
+    'upstream': {
+        'endpoints': {'nearby_restaurants', 'geocode_reverse', 'add_restaurant'},
+        'limit': int(os.getenv('ADMISSION_UPSTREAM_LIMIT', 24)),
+        'per_worker': max(1, int(os.getenv('WEB_THREADS', 8)) // 2),
+        'queue_timeout': float(os.getenv('ADMISSION_UPSTREAM_QUEUE_SECONDS', 0.25)),
+        'degrade': {'nearby_restaurants'},  # falls back to local-DB results
+        'retry_after': 2,
+    },
+    'feed': {
+        'endpoints': {'home', 'search_plates'},
+        'limit': int(os.getenv('ADMISSION_FEED_LIMIT', 0)),  # off unless configured
+        'queue_timeout': float(os.getenv('ADMISSION_FEED_QUEUE_SECONDS', 1.0)),
+        'retry_after': 1,
+    },
+    # Each export holds a worker thread and a DB cursor for as long as it streams
+    'export': {
+        'endpoints': {'admin_export'},
+        'limit': int(os.getenv('ADMISSION_EXPORT_LIMIT', 2)),
+        'queue_timeout': 0,
+        'retry_after': 30,
+    },
+    # A live stream is mostly idle but, under gthread, still pins a thread for minutes,
+    # so only half of each worker's threads may stream; gevent workers can hold hundreds
+    'live': {
+        'endpoints': {'live_plates'},
+        'limit': int(os.getenv('ADMISSION_LIVE_LIMIT', 1000)),
+        'per_worker': (int(os.getenv('WEB_WORKER_CONNECTIONS', 200)) // 2
+                       if os.getenv('WEB_WORKER_CLASS', 'gthread') == 'gevent'
+                       else max(1, int(os.getenv('WEB_THREADS', 8)) // 2)),
+        'queue_timeout': 0,
+        'retry_after': 10,
+    },
+}
+init_admission_control(app, ADMISSION_CLASSES, ADMISSION_PRIORITY_ENDPOINTS)
+
+# Cache backend shared by every named cache; the default SQLite file (in the instance folder, so
+# per deployment) is shared by all its workers on the host, memory:// keeps one cache per worker,
+# redis:// spans hosts (see cache.py)
+app.config['CACHE_URL'] = os.getenv('CACHE_URL') or default_cache_url(app.instance_path)
+cache_backend = backend_from_url(app.config['CACHE_URL'])
+_caches = {}
+
+
+def named_cache(name):
+    """The Cache for `name` (keys are prefixed with it, stats are kept per name)."""
+    if name not in _caches:
+        _caches[name] = Cache(cache_backend, name)
+    return _caches[name]
+
+# Live feed updates (see live.py); the event log lives next to the cache unless LIVE_URL says otherwise
+LIVE_INTERVAL_SECONDS = float(os.getenv('LIVE_INTERVAL_SECONDS', 1))
+# A client that went away is only noticed on the next write, so this also bounds how long
+# its thread / admission slot outlives it
+LIVE_HEARTBEAT_SECONDS = float(os.getenv('LIVE_HEARTBEAT_SECONDS', 10))
+# Streams end after this long and the browser reconnects (with Last-Event-ID), which
+# frees gthread threads and spreads clients across workers
+LIVE_MAX_SECONDS = int(os.getenv('LIVE_MAX_SECONDS', 300))
+LIVE_MAX_PLATES = 200
+live_updates = Broadcaster(event_log_from_url(os.getenv('LIVE_URL') or app.config['CACHE_URL']),
+                           interval=LIVE_INTERVAL_SECONDS, logger=logging.getLogger('plater8te.live'))
 
 
 
 
 GOOGLE_PLACES_API_KEY = os.getenv('GOOGLE_PLACES_API_KEY', '').strip()
 
+# Upstream base URLs; point these at benchmarks/fake_upstream.py to run offline
+GOOGLE_MAPS_BASE_URL = os.getenv('GOOGLE_MAPS_BASE_URL', 'https://maps.googleapis.com').rstrip('/')
+NOMINATIM_BASE_URL = os.getenv('NOMINATIM_BASE_URL', 'https://nominatim.openstreetmap.org').rstrip('/')
+# Google rejects a next_page_token used sooner than ~2s after it was issued
+GOOGLE_PAGETOKEN_DELAY_SECONDS = float(os.getenv('GOOGLE_PAGETOKEN_DELAY_SECONDS', 2))
+
+# Restaurants closer than this with a similar name are treated as the same place
+RESTAURANT_DEDUPE_RADIUS_METERS = float(os.getenv('RESTAURANT_DEDUPE_RADIUS_METERS', 40))
+RESTAURANT_NAME_MATCH_THRESHOLD = float(os.getenv('RESTAURANT_NAME_MATCH_THRESHOLD', 0.6))
+
 # ------------------ Models ------------------
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -59,6 +206,20 @@ class Restaurant(db.Model):
     longitude = db.Column(db.Float)
     plates = db.relationship('Plate', backref='restaurant', lazy=True)
     website = db.Column(db.String(255))  # <--- ADD THIS
+    # Name matches a ChainKeyword; set on insert, recomputed by `flask classify-restaurants`
+    is_chain = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+
+    # Bounding-box lookups (nearby search, dedupe) scan this index instead of the table;
+    # nearby_restaurants, which skips chains, uses the second one
+    __table_args__ = (
+        db.Index('ix_restaurant_lat_lon', 'latitude', 'longitude'),
+        db.Index('ix_restaurant_chain_lat_lon', 'is_chain', 'latitude', 'longitude'),
+    )
+
+class ChainKeyword(db.Model):
+    # Case-insensitive name fragment marking a chain / fast-food restaurant
+    id = db.Column(db.Integer, primary_key=True)
+    keyword = db.Column(db.String(80), unique=True, nullable=False)
 
 class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -77,11 +238,30 @@ class Plate(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'))
 
+    # Ranking (see "Rankings" below); kept current on rate/like/comment and by `flask refresh-rankings`
+    ratings_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    ratings_total = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    likes_total = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    comments_total = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    quality_score = db.Column(db.Float, default=0, server_default='0', nullable=False)
+    trending_score = db.Column(db.Float, default=0, server_default='0', nullable=False)
+    geo_cell = db.Column(db.String(24))
+
     comments = db.relationship('Comment', back_populates='plate', lazy=True)
     likes = db.relationship('Like', backref='plate', lazy=True)
     category = db.relationship('Category', back_populates='plates')
     user_plates = db.relationship('UserPlate', back_populates='plate')  # <-- fixed
 
+    __table_args__ = (
+        db.Index('ix_plate_quality_score', 'quality_score'),
+        db.Index('ix_plate_trending_score', 'trending_score'),
+        db.Index('ix_plate_category_quality', 'category_id', 'quality_score'),
+        db.Index('ix_plate_category_trending', 'category_id', 'trending_score'),
+        db.Index('ix_plate_geo_cell_quality', 'geo_cell', 'quality_score'),
+        db.Index('ix_plate_geo_cell_trending', 'geo_cell', 'trending_score'),
+        db.Index('ix_plate_restaurant_quality', 'restaurant_id', 'quality_score'),
+    )
+
 
 class Like(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -101,6 +281,10 @@ class Comment(db.Model):
     user = db.relationship("User")  # no backref to avoid conflicts
     plate = db.relationship("Plate", back_populates="comments")
 
+    __table_args__ = (
+        db.Index('ix_comment_plate_id', 'plate_id'),
+    )
+
 
 class Favorite(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -115,19 +299,49 @@ class UserPlate(db.Model):
     liked = db.Column(db.Boolean, default=False)
     favorite = db.Column(db.Boolean, default=False)
     rated = db.Column(db.Integer)  # <-- Rating (can be NULL)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
         db.UniqueConstraint('user_id', 'plate_id', name='unique_user_plate'),
+        db.Index('ix_user_plate_plate_id', 'plate_id'),
     )
 
     user = db.relationship("User", back_populates="user_plates")
     plate = db.relationship("Plate", back_populates="user_plates")
 
+
+class UnratedInbox(db.Model):
+    """
+    Per-user queue of plates still waiting for a rating, kept in step with UserPlate
+    by add_to_unrated_inbox() / remove_from_unrated_inbox(). The (user_id, plate_id)
+    primary key makes a page of the inbox a single index range scan.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    plate_id = db.Column(db.Integer, db.ForeignKey("plate.id"), primary_key=True)
+    added_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    plate = db.relationship("Plate")
+
+class Swipe(db.Model):
+    """One row per plate a user has swiped on /play, so the deck never repeats it."""
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    plate_id = db.Column(db.Integer, db.ForeignKey("plate.id"), primary_key=True)
+    direction = db.Column(db.String(10))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class PlateSimilarity(db.Model):
+    """Top-K item-item neighbours per plate, rebuilt by `flask build-recommendations`."""
+    plate_id = db.Column(db.Integer, db.ForeignKey("plate.id"), primary_key=True)
+    similar_plate_id = db.Column(db.Integer, db.ForeignKey("plate.id"), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+
 # ------------------ Helpers ------------------
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def fix_orientation(img):
+    from PIL import ExifTags
     try:
         for orientation in ExifTags.TAGS.keys():
             if ExifTags.TAGS[orientation] == 'Orientation':
@@ -145,19 +359,114 @@ def fix_orientation(img):
         pass
     return img
 
+# Swipe cards show a small rendition of each upload, kept in uploads/w<width>/ under the same name
+CARD_IMAGE_WIDTH = 640
+
 def process_uploaded_image(file, filename):
+    from PIL import Image
+
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     filepath = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(filename))
-    file.save(filepath)
-    try:
-        with Image.open(filepath) as img:
-            img = fix_orientation(img)
-            img = img.convert("RGB")
-            img.thumbnail((1600, 1600), Image.LANCZOS)
-            img.save(filepath, optimize=True, quality=85)
-    except Exception as e:
-        print("Image processing error:", e)
+    with IMAGE_PROCESSING.time():
+        file.save(filepath)
+        try:
+            with Image.open(filepath) as img:
+                img = fix_orientation(img)
+                img = img.convert("RGB")
+                img.thumbnail((1600, 1600), Image.LANCZOS)
+                img.save(filepath, optimize=True, quality=85)
+            make_rendition(filepath, CARD_IMAGE_WIDTH)
+        except Exception as e:
+            APP_ERRORS.labels('process_uploaded_image').inc()
+            logger.warning("Image processing error for %s: %s", filename, e)
     return f"static/uploads/{filename}"
 
+def rendition_path(filepath, width):
+    return os.path.join(os.path.dirname(filepath), f"w{width}", os.path.basename(filepath))
+
+def make_rendition(filepath, width):
+    """Write a copy of an uploaded image at most `width` pixels wide (see rendition_path())."""
+    from PIL import Image
+
+    target = rendition_path(filepath, width)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with Image.open(filepath) as img:
+        img = img.convert("RGB")
+        img.thumbnail((width, width * 4), Image.LANCZOS)
+        img.save(target, optimize=True, quality=80)
+    return target
+
+def small_image_url(image_url):
+    """Root-relative URL of the CARD_IMAGE_WIDTH rendition, or of the image itself until one exists."""
+    if image_url and image_url.startswith('static/uploads/'):
+        name = image_url[len('static/uploads/'):]
+        small = rendition_path(os.path.join(app.config['UPLOAD_FOLDER'], name), CARD_IMAGE_WIDTH)
+        return '/' + (f"static/uploads/w{CARD_IMAGE_WIDTH}/{name}" if os.path.exists(small) else image_url)
+    return _placeholder_image(image_url)
+
+@app.cli.command('build-renditions')
+@click.option('--force', is_flag=True, help='Rebuild renditions that already exist.')
+def build_renditions_command(force):
+    """Make the small card renditions missing for uploaded images (older uploads predate them)."""
+    made = failed = 0
+    for (image_url,) in db.session.query(Plate.image_url).filter(Plate.image_url.like('static/uploads/%')):
+        filepath = os.path.join(app.config['UPLOAD_FOLDER'], image_url[len('static/uploads/'):])
+        if not os.path.exists(filepath) or (not force and os.path.exists(rendition_path(filepath, CARD_IMAGE_WIDTH))):
+            continue
+        try:
+            make_rendition(filepath, CARD_IMAGE_WIDTH)
+            made += 1
+        except Exception as e:
+            failed += 1
+            click.echo(f"  {image_url}: {e}", err=True)
+    click.echo(f"Made {made} renditions ({failed} failed).")
+
+# One keep-alive connection pool for all outbound calls (threads share it), and a small
+# executor so a request can fan out independent lookups instead of making them one by one.
+# Both are per process: created on first use and dropped again in a forked child.
+UPSTREAM_CONCURRENCY = int(os.getenv('UPSTREAM_CONCURRENCY', 32))
+_upstream = {}
+_upstream_lock = threading.Lock()
+
+def upstream_session():
+    http = _upstream.get('session')
+    if http is None:
+        import requests
+        with _upstream_lock:
+            http = _upstream.get('session')
+            if http is None:
+                http = requests.Session()
+                http.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=UPSTREAM_CONCURRENCY))
+                http.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=UPSTREAM_CONCURRENCY))
+                _upstream['session'] = http
+    return http
+
+def upstream_executor():
+    executor = _upstream.get('executor')
+    if executor is None:
+        with _upstream_lock:
+            executor = _upstream.setdefault(
+                'executor', ThreadPoolExecutor(max_workers=UPSTREAM_CONCURRENCY, thread_name_prefix='upstream')
+            )
+    return executor
+
+def http_get_json(upstream, url, **kwargs):
+    """
+    GET `url` and decode the JSON body, timed and error-counted under `upstream`
+    (google_geocoding, google_places, google_place_details, nominatim).
+    Google's non-OK statuses count as errors too.
+    """
+    kwargs.setdefault('timeout', 6)
+    started = time.perf_counter()
+    try:
+        with track_upstream(upstream):
+            data = upstream_session().get(url, **kwargs).json()
+    finally:
+        add_phase_time('outbound', time.perf_counter() - started)
+    if isinstance(data, dict) and data.get('status') not in (None, 'OK', 'ZERO_RESULTS'):
+        UPSTREAM_ERRORS.labels(upstream, data['status']).inc()
+    return data
+
 
 def haversine(lat1, lon1, lat2, lon2):
     """Calculate distance in miles between two lat/lon points."""
@@ -169,18 +478,24 @@ def haversine(lat1, lon1, lat2, lon2):
     miles = 3958.8 * c
     return miles
 
+def bounding_box(lat, lon, radius_miles):
+    """Return (min_lat, max_lat, min_lon, max_lon) enclosing a circle around lat/lon."""
+    lat_mile = 1 / 69.0
+    lon_mile = 1 / (69.0 * max(cos(radians(lat)), 0.01))
+
+    return (
+        lat - (radius_miles * lat_mile),
+        lat + (radius_miles * lat_mile),
+        lon - (radius_miles * lon_mile),
+        lon + (radius_miles * lon_mile),
+    )
+
 def find_nearby_restaurants(lat, lon, radius_miles=2):
     if lat is None or lon is None:
         return []
 
     # Pre-filter using a bounding box (VERY fast)
-    lat_mile = 1 / 69.0
-    lon_mile = 1 / (69.0 * cos(radians(lat)))
-
-    min_lat = lat - (radius_miles * lat_mile)
-    max_lat = lat + (radius_miles * lat_mile)
-    min_lon = lon - (radius_miles * lon_mile)
-    max_lon = lon + (radius_miles * lon_mile)
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_miles)
 
     # SQL-only filtering
     candidates = Restaurant.query.filter(
@@ -195,31 +510,238 @@ def find_nearby_restaurants(lat, lon, radius_miles=2):
     ]
 
 
+# ------------------ Restaurant Dedupe ------------------
+RESTAURANT_NAME_STOPWORDS = {'the', 'a', 'an', 'and', 'restaurant', 'llc', 'inc', 'co'}
 
-def geocode_location(query):
-    if not query:
-        return None, None
+def normalize_restaurant_name(name):
+    """Lowercase, strip accents/punctuation and filler words so 'The Joe's Café' == 'joes cafe'."""
+    if not name:
+        return ''
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    name = name.lower().replace('&', ' and ')
+    name = re.sub(r"['`]", '', name)
+    tokens = re.sub(r'[^a-z0-9]+', ' ', name).split()
+    return ' '.join(t for t in tokens if t not in RESTAURANT_NAME_STOPWORDS)
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def restaurant_name_similarity(a, b):
+    """
+    Similarity in [0, 1] between two *normalized* names.
+    Best of trigram Jaccard (typos, spacing) and token Jaccard (word order).
+    """
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    ta, tb = _trigrams(a), _trigrams(b)
+    trigram_score = len(ta & tb) / len(ta | tb)
+    wa, wb = set(a.split()), set(b.split())
+    token_score = len(wa & wb) / len(wa | wb)
+    return max(trigram_score, token_score)
+
+def find_duplicate_restaurant(name, lat, lon, exclude_id=None, max_id=None,
+                              radius_meters=None, threshold=None):
+    """
+    Return the existing Restaurant that (name, lat, lon) most likely refers to, or None.
+    Candidates come from a bounding-box scan of ix_restaurant_lat_lon, then are scored
+    on normalized-name similarity; ties go to the closest one.
+    """
+    if not name or lat is None or lon is None:
+        return None
+    radius_meters = radius_meters or RESTAURANT_DEDUPE_RADIUS_METERS
+    threshold = threshold or RESTAURANT_NAME_MATCH_THRESHOLD
+    radius_miles = radius_meters / 1609.34
+
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_miles)
+    q = Restaurant.query.filter(
+        Restaurant.latitude.between(min_lat, max_lat),
+        Restaurant.longitude.between(min_lon, max_lon)
+    )
+    if exclude_id is not None:
+        q = q.filter(Restaurant.id != exclude_id)
+    if max_id is not None:
+        q = q.filter(Restaurant.id < max_id)
+
+    target = normalize_restaurant_name(name)
+    best, best_key = None, None
+    for r in q.all():
+        dist = haversine(lat, lon, r.latitude, r.longitude)
+        if dist > radius_miles:
+            continue
+        score = restaurant_name_similarity(target, normalize_restaurant_name(r.name))
+        if score < threshold:
+            continue
+        key = (score, -dist)
+        if best_key is None or key > best_key:
+            best, best_key = r, key
+    return best
+
+def resolve_restaurant_id(name, lat, lon):
+    """Id of the existing restaurant for (name, lat, lon) when we're confident, else None."""
+    match = find_duplicate_restaurant(name, lat, lon)
+    return match.id if match else None
+
+def merge_restaurant_into(duplicate, canonical):
+    """Re-point everything at `duplicate` to `canonical`, keep any details it was missing, then delete it."""
+    moved_ids = [pid for (pid,) in db.session.query(Plate.id).filter_by(restaurant_id=duplicate.id)]
+    Plate.query.filter_by(restaurant_id=duplicate.id).update(
+        {Plate.restaurant_id: canonical.id}, synchronize_session=False
+    )
+    # Their search documents carry the restaurant name
+    index_plates_for_search(moved_ids)
+    if not canonical.address and duplicate.address:
+        canonical.address = duplicate.address
+    if not canonical.website and duplicate.website:
+        canonical.website = duplicate.website
+    db.session.delete(duplicate)
+    autocomplete_index.remove('restaurants', duplicate.id)
+
+def merge_duplicate_restaurants(chunk_size=500, dry_run=False):
+    """
+    Walk the restaurant table in id order, `chunk_size` rows per transaction, and merge
+    each row into the oldest matching restaurant nearby. Returns the number merged.
+    """
+    merged = 0
+    last_id = 0
+    while True:
+        chunk = (
+            Restaurant.query
+            .filter(Restaurant.id > last_id,
+                    Restaurant.latitude.isnot(None),
+                    Restaurant.longitude.isnot(None))
+            .order_by(Restaurant.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+
+        for r in chunk:
+            # Only look at older rows so the lowest id always survives
+            canonical = find_duplicate_restaurant(r.name, r.latitude, r.longitude, max_id=r.id)
+            if canonical is None:
+                continue
+            logger.info("Merging restaurant %s '%s' into %s '%s'", r.id, r.name, canonical.id, canonical.name)
+            if not dry_run:
+                merge_restaurant_into(r, canonical)
+                # Flush so later rows in this chunk don't match the deleted duplicate
+                db.session.flush()
+            merged += 1
+
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        db.session.expunge_all()
+    return merged
+
+@app.cli.command('dedupe-restaurants')
+@click.option('--chunk-size', default=500, show_default=True, help='Restaurants per transaction.')
+@click.option('--dry-run', is_flag=True, help='Report merges without writing them.')
+def dedupe_restaurants_command(chunk_size, dry_run):
+    """Merge restaurants that are the same place entered with slightly different coordinates."""
+    merged = merge_duplicate_restaurants(chunk_size=chunk_size, dry_run=dry_run)
+    click.echo(f"{'Would merge' if dry_run else 'Merged'} {merged} duplicate restaurants.")
+
+
+GEOCODE_CACHE_SECONDS = int(os.getenv('GEOCODE_CACHE_SECONDS', 30 * 24 * 3600))
+# Misses are remembered briefly, so a typo doesn't hit the upstream on every keystroke
+GEOCODE_MISS_CACHE_SECONDS = int(os.getenv('GEOCODE_MISS_CACHE_SECONDS', 300))
+
+
+def _geocode_query(query):
+    """(upstream query, cache key) for a user-entered location."""
     q = query.strip()
     if q.isdigit() and len(q) == 5:
         q = f"{q}, USA"
+    return q, ' '.join(q.lower().split())
+
+
+def cached_geocode(query):
+    """(lat, lon) from the geocode cache only ((None, None) for a remembered miss), or None if not cached."""
+    if not query:
+        return None, None
+    return named_cache('geocode').get(_geocode_query(query)[1])
+
+
+def geocode_location(query):
+    if not query:
+        return None, None
+    q, key = _geocode_query(query)
+    geocodes = named_cache('geocode')
+    cached = geocodes.get(key)
+    if cached is not None:
+        return cached
+    lat, lon = _geocode_upstream(q)
+    geocodes.set(key, (lat, lon), GEOCODE_CACHE_SECONDS if lat is not None else GEOCODE_MISS_CACHE_SECONDS)
+    return lat, lon
+
+
+def _geocode_upstream(q):
     if GOOGLE_PLACES_API_KEY:
         try:
-            url = f"https://maps.googleapis.com/maps/api/geocode/json?address={requests.utils.quote(q)}&key={GOOGLE_PLACES_API_KEY}"
-            r = requests.get(url, timeout=6).json()
+            url = f"{GOOGLE_MAPS_BASE_URL}/maps/api/geocode/json?address={quote(q)}&key={GOOGLE_PLACES_API_KEY}"
+            r = http_get_json('google_geocoding', url)
             if r.get('status') == 'OK' and r.get('results'):
                 loc = r['results'][0]['geometry']['location']
                 return float(loc['lat']), float(loc['lng'])
         except:
             pass
     try:
-        url = f"https://nominatim.openstreetmap.org/search?format=json&q={requests.utils.quote(q)}"
-        r = requests.get(url, headers={'User-Agent':'plater8te-app/1.0'}, timeout=6).json()
+        url = f"{NOMINATIM_BASE_URL}/search?format=json&q={quote(q)}"
+        r = http_get_json('nominatim', url, headers={'User-Agent':'plater8te-app/1.0'})
         if r and isinstance(r, list) and len(r) > 0:
             return float(r[0]['lat']), float(r[0]['lon'])
     except:
         pass
     return None, None
 
+# ------------------ Reference Data ------------------
+# Small, slow-changing tables are held in every worker and reloaded only when their
+# version in the shared cache moves: whoever changes one calls bump_reference_data()
+# after committing. Copies are also reloaded after REFERENCE_MAX_AGE_SECONDS, which
+# bounds staleness when the cache is per-worker (CACHE_URL=memory://) or was wiped.
+REFERENCE_MAX_AGE_SECONDS = int(os.getenv('REFERENCE_MAX_AGE_SECONDS', 300))
+
+_reference_loaders = {}
+_reference = {}
+
+
+def reference_loader(name):
+    def register(fn):
+        _reference_loaders[name] = fn
+        return fn
+    return register
+
+
+def reference_data(name):
+    """This worker's copy of the reference dataset `name`, reloaded if its version changed."""
+    version = named_cache('reference').version(name)
+    held = _reference.get(name)
+    now = time.monotonic()
+    if held is None or held[0] != version or now - held[1] > REFERENCE_MAX_AGE_SECONDS:
+        held = _reference[name] = (version, now, _reference_loaders[name]())
+    return held[2]
+
+
+def bump_reference_data(name):
+    named_cache('reference').bump_version(name)
+
+
+@reference_loader('categories')
+def _load_categories():
+    return tuple(db.session.query(Category.id, Category.name).order_by(Category.name))
+
+
+def all_categories():
+    """(id, name) rows for every category, ordered by name."""
+    return reference_data('categories')
+
+
 def seed_default_categories():
     default_categories = [
         # Mexican
@@ -246,13 +768,105 @@ def seed_default_categories():
         "Beverages", "Smoothie", "Coffee", "Tea", "Milkshake", "Cocktail"
     ]
 
-    for name in default_categories:
-        if not Category.query.filter_by(name=name).first():
-            cat = Category(name=name)
-            db.session.add(cat)
+    added = insert_missing(Category.name, default_categories)
     db.session.commit()
+    if added:
+        bump_reference_data('categories')
     print("Default categories seeded!")
 
+
+def insert_missing(column, values):
+    """Insert a row for each of `values` not already in the unique `column`; returns rows added."""
+    model = column.class_
+    rows = [{column.key: value} for value in dict.fromkeys(values)]
+    if not rows:
+        return 0
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        # One INSERT ... ON CONFLICT DO NOTHING for the whole list
+        from sqlalchemy.dialects import postgresql, sqlite
+        upsert = (postgresql if dialect == 'postgresql' else sqlite).insert(model).values(rows)
+        return db.session.execute(upsert.on_conflict_do_nothing()).rowcount
+    existing = {v for (v,) in db.session.query(column).filter(column.in_([r[column.key] for r in rows]))}
+    rows = [r for r in rows if r[column.key] not in existing]
+    if rows:
+        db.session.execute(insert(model), rows)
+    return len(rows)
+
+# ------------------ Chain Restaurants ------------------
+# Chains / fast food are left out of nearby_restaurants. Restaurant.is_chain is set when
+# a row is inserted, from the ChainKeyword list (seeded with these defaults); after
+# editing the list, `flask classify-restaurants` recomputes it for every restaurant.
+DEFAULT_CHAIN_KEYWORDS = [
+    "McDonald's", "Burger King", "Wendy's", "KFC", "Taco Bell",
+    "Subway", "Domino's", "Pizza Hut", "Chipotle", "Popeyes",
+    "Arby's", "Jack in the Box", "Dairy Queen", "Little Caesars",
+    "Dunkin'", "Dunkin", "Starbucks", "Five Guys", "In-N-Out", "Sonic"
+]
+
+
+@reference_loader('chain_keywords')
+def _load_chain_matcher():
+    keywords = [k for (k,) in db.session.query(ChainKeyword.keyword)]
+    if not keywords:
+        return re.compile(r'(?!)')  # matches nothing
+    return re.compile('|'.join(re.escape(k) for k in keywords), re.IGNORECASE)
+
+
+def chain_matcher():
+    """One compiled regex for all chain keywords (case-insensitive substring match)."""
+    return reference_data('chain_keywords')
+
+
+def is_chain_name(name, matcher=None):
+    return bool(name) and (matcher or chain_matcher()).search(name) is not None
+
+
+def seed_chain_keywords():
+    if insert_missing(ChainKeyword.keyword, DEFAULT_CHAIN_KEYWORDS):
+        db.session.commit()
+        bump_reference_data('chain_keywords')
+
+
+def classify_restaurants(chunk_size=2000):
+    """Recompute Restaurant.is_chain from the current keywords. Returns (chains, rows changed)."""
+    matcher = chain_matcher()
+    chains = changed = 0
+    batch = []
+    rows = db.session.query(Restaurant.id, Restaurant.name, Restaurant.is_chain)
+    for restaurant_id, name, was_chain in rows.yield_per(10000):
+        chain = is_chain_name(name, matcher)
+        chains += chain
+        if chain != was_chain:
+            batch.append({'id': restaurant_id, 'is_chain': chain})
+        if len(batch) >= chunk_size:
+            db.session.execute(db.update(Restaurant), batch)
+            changed += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(db.update(Restaurant), batch)
+        changed += len(batch)
+    db.session.commit()
+    return chains, changed
+
+@app.cli.command('classify-restaurants')
+@click.option('--add', 'add', multiple=True, metavar='KEYWORD', help='Add a chain keyword (repeatable).')
+@click.option('--remove', 'remove', multiple=True, metavar='KEYWORD', help='Remove a chain keyword (repeatable).')
+@click.option('--chunk-size', default=2000, show_default=True, help='Restaurants per UPDATE batch.')
+def classify_restaurants_command(add, remove, chunk_size):
+    """Edit the chain keyword list, then recompute which restaurants are chains."""
+    if not db.session.query(ChainKeyword.id).first():
+        seed_chain_keywords()
+    if add or remove:
+        insert_missing(ChainKeyword.keyword, [k.strip() for k in add if k.strip()])
+        if remove:
+            ChainKeyword.query.filter(ChainKeyword.keyword.in_(remove)).delete(synchronize_session=False)
+        db.session.commit()
+        bump_reference_data('chain_keywords')
+    keywords = db.session.query(ChainKeyword.keyword).count()
+    chains, changed = classify_restaurants(chunk_size=chunk_size)
+    click.echo(f"{keywords} chain keywords; {chains} restaurants are chains ({changed} changed).")
+
 def schedule_email_for_rating(plate_id, user_id):
     pass
 
@@ -262,11 +876,11 @@ def get_place_details(place_id):
         return {}
 
     url = (
-        "https://maps.googleapis.com/maps/api/place/details/json"
+        f"{GOOGLE_MAPS_BASE_URL}/maps/api/place/details/json"
         f"?place_id={place_id}&fields=name,formatted_address,website&key={api_key}"
     )
 
-    response = requests.get(url).json()
+    response = http_get_json('google_place_details', url)
     if response.get("status") == "OK":
         result = response.get("result", {})
         return {
@@ -277,51 +891,988 @@ def get_place_details(place_id):
 
     return {}
 
-from sqlalchemy import or_
+def place_website(place_id):
+    """Website for a Google place, or None (runs on upstream_executor(), so never raises)."""
+    if not place_id:
+        return None
+    try:
+        return get_place_details(place_id).get("website")
+    except Exception:
+        return None
+
+from sqlalchemy import or_, and_, exists, insert, event
+from sqlalchemy.exc import SQLAlchemyError
+
+INBOX_PAGE_SIZE = 24
+
+def add_to_unrated_inbox(user_id, plate_id):
+    """Queue plate_id in user_id's unrated inbox (no-op if already there). Caller commits."""
+    if db.session.get(UnratedInbox, (user_id, plate_id)) is None:
+        db.session.add(UnratedInbox(user_id=user_id, plate_id=plate_id))
 
-from sqlalchemy import or_
+def remove_from_unrated_inbox(user_id, plate_id):
+    """Drop plate_id from user_id's unrated inbox. Caller commits."""
+    UnratedInbox.query.filter_by(user_id=user_id, plate_id=plate_id).delete(synchronize_session=False)
 
-def get_unrated_plates_for_user(user_id):
+def get_unrated_plates_for_user(user_id, cursor=None, limit=INBOX_PAGE_SIZE):
     """
-    Returns Plate objects that are unrated for the given user.
-    Includes:
-      - Plates with UserPlate.rated == 0 or NULL
-      - Plates with no UserPlate entry yet
-    Eager-loads Restaurant and Category.
-    Sets avg_rating = None for truly unrated plates.
+    One page of the user's unrated inbox, newest plate first.
+    Returns (plates, next_cursor) as PlateCards carrying the user's like/favorite
+    flags; pass next_cursor back in to get the following page.
     """
-    plates = (
-        db.session.query(Plate)
-        .outerjoin(UserPlate, (UserPlate.plate_id == Plate.id) & (UserPlate.user_id == user_id))
-        .options(
-            db.joinedload(Plate.restaurant),
-            db.joinedload(Plate.category),
-            db.joinedload(Plate.user_plates)  # Load all user plates to compute avg_rating
+    q = (
+        plate_card_query()
+        .join(UnratedInbox, UnratedInbox.plate_id == Plate.id)
+        .filter(UnratedInbox.user_id == user_id)
+    )
+    if cursor:
+        q = q.filter(UnratedInbox.plate_id < cursor)
+    plates = load_plate_cards(q.order_by(UnratedInbox.plate_id.desc()).limit(limit + 1), user_id=user_id)
+    for plate in plates:
+        plate.avg_rating = None  # unrated
+
+    next_cursor = plates[limit - 1].id if len(plates) > limit else None
+    return plates[:limit], next_cursor
+
+def reconcile_unrated_inboxes():
+    """
+    Repair drift between UnratedInbox and UserPlate with two set-based statements:
+    queue unrated UserPlate rows that are missing, drop inbox rows that were rated
+    (or whose UserPlate is gone). Returns (added, removed).
+    """
+    is_unrated = or_(UserPlate.rated.is_(None), UserPlate.rated == 0)
+    in_inbox = exists().where(
+        (UnratedInbox.user_id == UserPlate.user_id) & (UnratedInbox.plate_id == UserPlate.plate_id)
+    )
+    missing = (
+        db.select(UserPlate.user_id, UserPlate.plate_id, db.func.now())
+        .where(is_unrated, ~in_inbox)
+    )
+    added = db.session.execute(
+        insert(UnratedInbox).from_select(['user_id', 'plate_id', 'added_at'], missing)
+    ).rowcount
+
+    still_unrated = exists().where(
+        (UserPlate.user_id == UnratedInbox.user_id) & (UserPlate.plate_id == UnratedInbox.plate_id),
+        is_unrated
+    )
+    removed = db.session.execute(
+        db.delete(UnratedInbox).where(~still_unrated)
+    ).rowcount
+
+    db.session.commit()
+    return added, removed
+
+@app.cli.command('reconcile-unrated-inbox')
+def reconcile_unrated_inbox_command():
+    """Rebuild missing or stale unrated-inbox rows from UserPlate."""
+    added, removed = reconcile_unrated_inboxes()
+    click.echo(f"Unrated inbox reconciled: {added} added, {removed} removed.")
+
+
+
+
+# ------------------ Full-Text Search ------------------
+# plate_search holds one document per plate: its name and description plus the
+# restaurant and category names. SQLite gets an FTS5 table, Postgres a tsvector + GIN.
+# Kept current by index_plates_for_search() from the write paths.
+SEARCH_INDEX_DDL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS plate_search USING fts5("
+        "name, description, restaurant, category, "
+        "tokenize='porter unicode61 remove_diacritics 2')",
+    ],
+    'postgresql': [
+        "CREATE TABLE IF NOT EXISTS plate_search ("
+        "plate_id INTEGER PRIMARY KEY REFERENCES plate(id) ON DELETE CASCADE, "
+        "document TSVECTOR NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_plate_search_document ON plate_search USING GIN (document)",
+    ],
+}
+
+def search_dialect():
+    """'sqlite' / 'postgresql' when full-text search is supported on this database, else None."""
+    name = db.engine.dialect.name
+    return name if name in SEARCH_INDEX_DDL else None
+
+def create_search_index():
+    dialect = search_dialect()
+    if not dialect:
+        return
+    for ddl in SEARCH_INDEX_DDL[dialect]:
+        db.session.execute(db.text(ddl))
+    db.session.commit()
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_search_index_with_tables(target, connection, **kw):
+    # plate_search isn't a model, so have db.create_all() build it too
+    for ddl in SEARCH_INDEX_DDL.get(connection.dialect.name, []):
+        connection.execute(db.text(ddl))
+
+def index_plates_for_search(plate_ids=None):
+    """
+    (Re)build search documents for the given plate ids, or for every plate when None.
+    Runs as set-based SQL so bulk writes cost one statement. Caller commits.
+    """
+    dialect = search_dialect()
+    if not dialect or plate_ids == []:
+        return
+
+    where = "WHERE p.id IN :ids" if plate_ids is not None else ""
+    params = {'ids': list(plate_ids)} if plate_ids is not None else {}
+
+    def run(sql):
+        stmt = db.text(sql)
+        if plate_ids is not None:
+            stmt = stmt.bindparams(db.bindparam('ids', expanding=True))
+        db.session.execute(stmt, params)
+
+    if dialect == 'sqlite':
+        run("DELETE FROM plate_search" + (" WHERE rowid IN :ids" if plate_ids is not None else ""))
+        run(
+            "INSERT INTO plate_search (rowid, name, description, restaurant, category) "
+            "SELECT p.id, p.name, COALESCE(p.description, ''), COALESCE(r.name, ''), COALESCE(c.name, '') "
+            "FROM plate p LEFT JOIN restaurant r ON r.id = p.restaurant_id "
+            f"LEFT JOIN category c ON c.id = p.category_id {where}"
         )
-        .filter(
-            or_(
-                UserPlate.rated == 0,
-                UserPlate.rated.is_(None),
-                UserPlate.id.is_(None)  # No UserPlate record yet
-            )
+    else:
+        run(
+            "INSERT INTO plate_search (plate_id, document) "
+            "SELECT p.id, "
+            "setweight(to_tsvector('english', COALESCE(p.name, '')), 'A') || "
+            "setweight(to_tsvector('english', COALESCE(r.name, '')), 'B') || "
+            "setweight(to_tsvector('english', COALESCE(c.name, '')), 'B') || "
+            "setweight(to_tsvector('english', COALESCE(p.description, '')), 'C') "
+            "FROM plate p LEFT JOIN restaurant r ON r.id = p.restaurant_id "
+            f"LEFT JOIN category c ON c.id = p.category_id {where} "
+            "ON CONFLICT (plate_id) DO UPDATE SET document = EXCLUDED.document"
         )
-        .all()
+
+def plate_search_subquery(q):
+    """
+    Subquery of (plate_id, rank) matching the free-text query `q`, best match = lowest rank.
+    Returns None when the database has no full-text index or `q` has no searchable words.
+    """
+    dialect = search_dialect()
+    words = re.findall(r'\w+', q.lower())
+    if not dialect or not words:
+        return None
+
+    if dialect == 'sqlite':
+        # Quote each word so user input can't break FTS5 syntax; trailing * = prefix match
+        match = ' '.join(f'"{w}"*' for w in words)
+        sql = (
+            "SELECT rowid AS plate_id, bm25(plate_search, 10.0, 2.0, 5.0, 4.0) AS rank "
+            "FROM plate_search WHERE plate_search MATCH :q"
+        )
+    else:
+        match = ' '.join(words)
+        sql = (
+            "SELECT plate_id, -ts_rank(document, websearch_to_tsquery('english', :q)) AS rank "
+            "FROM plate_search WHERE document @@ websearch_to_tsquery('english', :q)"
+        )
+    return (
+        db.text(sql)
+        .bindparams(q=match)
+        .columns(plate_id=db.Integer, rank=db.Float)
+        .subquery('plate_search_match')
     )
 
-    # Compute avg_rating for each plate
-    for plate in plates:
-        ratings = [up.rated for up in plate.user_plates if up.rated and up.rated > 0]
-        plate.avg_rating = round(sum(ratings) / len(ratings), 1) if ratings else None
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Create the full-text search index if needed and re-index every plate."""
+    create_search_index()
+    index_plates_for_search()
+    db.session.commit()
+    click.echo("Search index rebuilt." if search_dialect() else "Full-text search is not supported on this database.")
+
+
+# ------------------ Autocomplete ------------------
+# Each worker keeps its own PrefixIndex. Writes in this worker update it directly;
+# rows inserted by other workers are picked up by an id-range scan every
+# AUTOCOMPLETE_REFRESH_SECONDS, and the whole index is rebuilt once an hour.
+AUTOCOMPLETE_KINDS = ('restaurants', 'plates', 'categories')
+AUTOCOMPLETE_REFRESH_SECONDS = 30
+AUTOCOMPLETE_REBUILD_SECONDS = 3600
+
+autocomplete_index = PrefixIndex()
+_autocomplete_state = {'built_at': None, 'refreshed_at': None, 'max_ids': {}}
+
+def _restaurant_autocomplete_row(r_id, name, address, lat, lon):
+    payload = {'address': address or '', 'latitude': lat, 'longitude': lon}
+    return ('restaurants', r_id, name, lat, lon, payload)
+
+def _autocomplete_rows(max_ids):
+    """Projected rows newer than max_ids (all rows when empty); updates max_ids in place."""
+    sources = {
+        'restaurants': db.session.query(Restaurant.id, Restaurant.name, Restaurant.address,
+                                        Restaurant.latitude, Restaurant.longitude),
+        'plates': db.session.query(Plate.id, Plate.name),
+        'categories': db.session.query(Category.id, Category.name),
+    }
+    for kind, q in sources.items():
+        model_id = q.column_descriptions[0]['expr']
+        for row in q.filter(model_id > max_ids.get(kind, 0)).order_by(model_id):
+            max_ids[kind] = row[0]
+            if kind == 'restaurants':
+                yield _restaurant_autocomplete_row(*row)
+            else:
+                yield (kind, row[0], row[1], None, None, None)
+
+def get_autocomplete_index():
+    now = datetime.utcnow()
+    state = _autocomplete_state
+    if state['built_at'] is None or (now - state['built_at']).total_seconds() > AUTOCOMPLETE_REBUILD_SECONDS:
+        state['max_ids'] = {}
+        autocomplete_index.bulk_load(_autocomplete_rows(state['max_ids']))
+        state['built_at'] = state['refreshed_at'] = now
+    elif (now - state['refreshed_at']).total_seconds() > AUTOCOMPLETE_REFRESH_SECONDS:
+        for row in _autocomplete_rows(state['max_ids']):
+            autocomplete_index.add(*row)
+        state['refreshed_at'] = now
+    return autocomplete_index
+
+def index_restaurant_for_autocomplete(restaurant):
+    autocomplete_index.add(*_restaurant_autocomplete_row(
+        restaurant.id, restaurant.name, restaurant.address, restaurant.latitude, restaurant.longitude
+    ))
+
+@app.route('/autocomplete')
+@csrf.exempt
+def autocomplete():
+    """
+    Typeahead suggestions: ?q=<prefix>[&lat=&lon=][&types=restaurants,plates,categories][&limit=8]
+    Restaurants are ranked nearest-first when lat/lon are given.
+    """
+    q = request.args.get('q', '').strip()
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    limit = max(1, min(request.args.get('limit', 8, type=int), 25))
+    kinds = [k for k in request.args.get('types', '').split(',') if k in AUTOCOMPLETE_KINDS] or list(AUTOCOMPLETE_KINDS)
+
+    if not q:
+        return jsonify({kind: [] for kind in kinds})
+    return jsonify(get_autocomplete_index().search(q, kinds=kinds, lat=lat, lon=lon, limit=limit))
+
+
+# ------------------ Rankings ------------------
+# quality_score: Bayesian average rating, i.e. every plate starts with
+#   RANKING_PRIOR_WEIGHT phantom ratings at the site-wide mean, so one 5-star
+#   review can't outrank a hundred 4.8s.
+# trending_score: log2 of sum(weight * 2^(hours since TRENDING_EPOCH / half-life))
+#   over the plate's activity. Comparing log-scores at any moment is the same as
+#   comparing time-decayed scores, so old values never need re-decaying and each
+#   new event is a single add.
+RANKING_PRIOR_WEIGHT = 10
+RANKING_DEFAULT_MEAN = 3.5
+TRENDING_HALF_LIFE_HOURS = 48
+TRENDING_EPOCH = datetime(2025, 1, 1)
+TRENDING_WEIGHTS = {'post': 3.0, 'like': 1.0, 'rating': 1.5, 'comment': 2.0}
+GEO_CELL_DEGREES = 0.25
+
+SORT_ORDERS = {
+    'new': (Plate.created_at.desc(),),
+    'top': (Plate.quality_score.desc(), Plate.created_at.desc()),
+    'trending': (Plate.trending_score.desc(), Plate.created_at.desc()),
+}
+
+_ranking_prior = {'mean': None, 'at': None}
+
+def geo_cell_for(lat, lon):
+    """Grid cell id ('row:col', GEO_CELL_DEGREES on a side) used for per-area top lists."""
+    if lat is None or lon is None:
+        return None
+    return f"{floor(lat / GEO_CELL_DEGREES)}:{floor(lon / GEO_CELL_DEGREES)}"
+
+def get_ranking_prior():
+    """Site-wide mean rating, re-read at most hourly per worker."""
+    now = datetime.utcnow()
+    if _ranking_prior['at'] is None or (now - _ranking_prior['at']).total_seconds() > 3600:
+        mean = db.session.query(db.func.avg(UserPlate.rated)).filter(UserPlate.rated > 0).scalar()
+        _ranking_prior['mean'] = float(mean) if mean else RANKING_DEFAULT_MEAN
+        _ranking_prior['at'] = now
+    return _ranking_prior['mean']
+
+def bayesian_average(total, count, prior_mean):
+    return (RANKING_PRIOR_WEIGHT * prior_mean + total) / (RANKING_PRIOR_WEIGHT + count)
+
+def trending_points(event, when):
+    hours = (when - TRENDING_EPOCH).total_seconds() / 3600
+    return log2(TRENDING_WEIGHTS[event]) + hours / TRENDING_HALF_LIFE_HOURS
+
+def log2_add(a, b):
+    """log2(2**a + 2**b) without overflow; a may be None/0 for 'no activity yet'."""
+    if not a:
+        return b
+    hi, lo = max(a, b), min(a, b)
+    return hi + log2(1 + 2 ** (lo - hi))
+
+def bump_trending(plate, event, when=None):
+    plate.trending_score = log2_add(plate.trending_score, trending_points(event, when or datetime.utcnow()))
+
+def refresh_quality_score(plate):
+    plate.quality_score = bayesian_average(plate.ratings_total or 0, plate.ratings_count or 0, get_ranking_prior())
+
+def increment_plate_counters(plate, **values):
+    """
+    Apply counter updates (column name -> SQL expression over Plate) in the database,
+    so concurrent likes / ratings / comments can't overwrite each other. The changed
+    attributes are reloaded from the updated row on next access.
+    """
+    db.session.execute(
+        db.update(Plate).where(Plate.id == plate.id).values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    # Not synchronize_session: that would apply the expressions to the stale in-memory values
+    db.session.expire(plate, list(values))
+
+def record_rating_change(plate, old_rating, new_rating):
+    """Update the plate's rating aggregates and scores after a user (re)rates it. Caller commits."""
+    old = old_rating if old_rating and old_rating > 0 else 0
+    new = new_rating if new_rating and new_rating > 0 else 0
+    if old or new:
+        increment_plate_counters(plate, ratings_total=Plate.ratings_total + (new - old),
+                                 ratings_count=Plate.ratings_count + (bool(new) - bool(old)))
+    if new:
+        bump_trending(plate, 'rating')
+    refresh_quality_score(plate)
+
+def record_like_change(plate, liked):
+    """Update like aggregates after a like/unlike. Caller commits."""
+    if liked:
+        increment_plate_counters(plate, likes_total=Plate.likes_total + 1)
+        bump_trending(plate, 'like')
+    else:
+        increment_plate_counters(plate, likes_total=db.case((Plate.likes_total > 0, Plate.likes_total - 1), else_=0))
+
+def refresh_rankings(chunk_size=2000):
+    """
+    Recompute every plate's counters, scores and geo cell from the source tables.
+    Repairs drift in the incremental updates and folds in unlikes / deleted activity.
+    Returns the number of plates updated.
+    """
+    _ranking_prior['at'] = None
+    prior = get_ranking_prior()
+
+    ratings = {
+        pid: (count or 0, total or 0, likes or 0)
+        for pid, count, total, likes in db.session.query(
+            UserPlate.plate_id,
+            db.func.sum(db.case((UserPlate.rated > 0, 1), else_=0)),
+            db.func.sum(db.case((UserPlate.rated > 0, UserPlate.rated), else_=0)),
+            db.func.sum(db.case((UserPlate.liked == True, 1), else_=0)),
+        ).group_by(UserPlate.plate_id)
+    }
+    comments = dict(
+        db.session.query(Comment.plate_id, db.func.count(Comment.id)).group_by(Comment.plate_id)
+    )
+
+    trending = {}
+    def add(pid, event, when):
+        if when is not None:
+            trending[pid] = log2_add(trending.get(pid), trending_points(event, when))
+
+    activity = db.session.query(UserPlate.plate_id, UserPlate.liked, UserPlate.rated, UserPlate.updated_at)
+    for pid, liked, rated, when in activity.yield_per(10000):
+        if liked:
+            add(pid, 'like', when)
+        if rated and rated > 0:
+            add(pid, 'rating', when)
+    for pid, when in db.session.query(Comment.plate_id, Comment.created_at).yield_per(10000):
+        add(pid, 'comment', when)
+
+    plates = (
+        db.session.query(Plate.id, Plate.created_at, Restaurant.latitude, Restaurant.longitude)
+        .outerjoin(Restaurant, Restaurant.id == Plate.restaurant_id)
+    )
+    updated = 0
+    batch = []
+    for pid, created_at, lat, lon in plates.yield_per(10000):
+        add(pid, 'post', created_at)
+        count, total, likes = ratings.get(pid, (0, 0, 0))
+        batch.append({
+            'id': pid,
+            'ratings_count': count,
+            'ratings_total': total,
+            'likes_total': likes,
+            'comments_total': comments.get(pid, 0),
+            'quality_score': bayesian_average(total, count, prior),
+            'trending_score': trending.get(pid, 0),
+            'geo_cell': geo_cell_for(lat, lon),
+        })
+        if len(batch) >= chunk_size:
+            db.session.execute(db.update(Plate), batch)
+            updated += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(db.update(Plate), batch)
+        updated += len(batch)
+    db.session.commit()
+    return updated
+
+@app.cli.command('refresh-rankings')
+@click.option('--chunk-size', default=2000, show_default=True, help='Plates per UPDATE batch.')
+def refresh_rankings_command(chunk_size):
+    """Recompute top/trending scores for every plate (run periodically, e.g. hourly)."""
+    updated = refresh_rankings(chunk_size=chunk_size)
+    click.echo(f"Refreshed rankings for {updated} plates.")
+
+@app.route('/rankings')
+@csrf.exempt
+def rankings():
+    """
+    Top or trending plates as JSON: ?sort=top|trending[&category_id=][&lat=&lon=][&limit=20]
+    With lat/lon the list is limited to that point's geo cell.
+    """
+    sort = request.args.get('sort', 'top')
+    if sort not in SORT_ORDERS:
+        return jsonify({'error': f"sort must be one of {', '.join(SORT_ORDERS)}"}), 400
+    category_id = request.args.get('category_id', type=int)
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+    q = (
+        db.session.query(Plate.id, Plate.name, Plate.image_url, Plate.quality_score, Plate.trending_score,
+                         Plate.ratings_count, Plate.likes_total, Restaurant.name)
+        .outerjoin(Restaurant, Restaurant.id == Plate.restaurant_id)
+    )
+    if category_id:
+        q = q.filter(Plate.category_id == category_id)
+    cell = geo_cell_for(lat, lon)
+    if cell:
+        q = q.filter(Plate.geo_cell == cell)
+
+    plates = [
+        {'id': pid, 'name': name, 'image_url': image_url, 'quality_score': round(quality, 3),
+         'trending_score': round(trending, 3), 'ratings_count': ratings_count, 'like_count': likes,
+         'restaurant_name': restaurant_name or ''}
+        for pid, name, image_url, quality, trending, ratings_count, likes, restaurant_name
+        in q.order_by(*SORT_ORDERS[sort]).limit(limit)
+    ]
+    return jsonify({'sort': sort, 'category_id': category_id, 'geo_cell': cell, 'plates': plates})
+
+
+# ------------------ Recommendations / Play Deck ------------------
+# Decks are cached per worker, keyed by user and (rounded) location, in an LRU of
+# at most DECK_MAX_CACHED decks. Swipes pop plates off the front; once fewer than
+# DECK_REFILL_AT remain a background thread tops the deck back up so /play never
+# waits on a rebuild. A swipe handled by another worker only reaches this worker's
+# copy through the database, so served plates are checked against the user's
+# swipes and likes/ratings first.
+DECK_SIZE = 30
+PLATES_NEARBY_MAX = 1000
+DECK_REFILL_AT = 10
+DECK_TTL_SECONDS = 600
+DECK_MAX_SEEDS = 200
+DECK_MAX_CACHED = 2000
+
+_decks = OrderedDict()
+_decks_lock = threading.Lock()
+
+def build_plate_similarities(top_k=50, chunk_size=5000):
+    """Recompute PlateSimilarity from every UserPlate like/rating. Returns rows written."""
+    user_ids, plate_ids, strengths = [], [], []
+    rows = db.session.query(UserPlate.user_id, UserPlate.plate_id, UserPlate.rated, UserPlate.liked)
+    for user_id, plate_id, rated, liked in rows.yield_per(10000):
+        strength = interaction_strength(rated, liked)
+        if strength > 0:
+            user_ids.append(user_id)
+            plate_ids.append(plate_id)
+            strengths.append(strength)
+
+    pairs = compute_item_similarities(user_ids, plate_ids, strengths, top_k=top_k)
+
+    db.session.execute(db.delete(PlateSimilarity))
+    for i in range(0, len(pairs), chunk_size):
+        db.session.execute(insert(PlateSimilarity), [
+            {'plate_id': p, 'similar_plate_id': sp, 'score': score}
+            for p, sp, score in pairs[i:i + chunk_size]
+        ])
+    db.session.commit()
+    return len(pairs)
+
+@app.cli.command('build-recommendations')
+@click.option('--top-k', default=50, show_default=True, help='Neighbours kept per plate.')
+def build_recommendations_command(top_k):
+    """Rebuild the item-item similarity table behind the /play deck."""
+    written = build_plate_similarities(top_k=top_k)
+    click.echo(f"Wrote {written} plate similarities.")
+
+def _seen_plate_ids(user_id):
+    seen = {pid for (pid,) in db.session.query(UserPlate.plate_id).filter(UserPlate.user_id == user_id)}
+    seen.update(pid for (pid,) in db.session.query(Swipe.plate_id).filter(Swipe.user_id == user_id))
+    return seen
+
+def build_deck(user_id=None, lat=None, lon=None, radius_miles=20, size=DECK_SIZE, exclude=()):
+    """
+    Plate ids for a user's swipe deck, best first: neighbours of the plates they
+    liked or rated highly, then the newest plates they haven't seen. With lat/lon
+    only plates within radius_miles qualify. Anonymous users get the newest plates.
+    """
+    exclude = set(exclude)
+    if user_id:
+        exclude |= _seen_plate_ids(user_id)
+
+    picked = []
+    if user_id:
+        seeds = {
+            plate_id: interaction_strength(rated, liked)
+            for plate_id, rated, liked in db.session.query(UserPlate.plate_id, UserPlate.rated, UserPlate.liked)
+            .filter(UserPlate.user_id == user_id)
+        }
+        seeds = dict(sorted(((p, w) for p, w in seeds.items() if w > 0), key=lambda t: -t[1])[:DECK_MAX_SEEDS])
+        if seeds:
+            scores = defaultdict(float)
+            neighbours = db.session.query(
+                PlateSimilarity.plate_id, PlateSimilarity.similar_plate_id, PlateSimilarity.score
+            ).filter(PlateSimilarity.plate_id.in_(list(seeds)))
+            for seed_id, similar_id, score in neighbours:
+                if similar_id not in exclude:
+                    scores[similar_id] += score * seeds[seed_id]
+            ranked = sorted(scores, key=scores.get, reverse=True)
+
+            if ranked and lat is not None and lon is not None:
+                coords = dict(
+                    (pid, (rlat, rlon)) for pid, rlat, rlon in
+                    db.session.query(Plate.id, Restaurant.latitude, Restaurant.longitude)
+                    .join(Restaurant).filter(Plate.id.in_(ranked))
+                )
+                ranked = [
+                    pid for pid in ranked
+                    if pid in coords and coords[pid][0] is not None and coords[pid][1] is not None
+                    and haversine(lat, lon, *coords[pid]) <= radius_miles
+                ]
+            picked = ranked[:size]
+
+    # Cold start / not enough neighbours: newest unseen plates (nearby if we know where)
+    if len(picked) < size:
+        fill_q = db.session.query(Plate.id)
+        if lat is not None and lon is not None:
+            min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_miles)
+            fill_q = fill_q.join(Restaurant).filter(
+                Restaurant.latitude.between(min_lat, max_lat),
+                Restaurant.longitude.between(min_lon, max_lon)
+            ).add_columns(Restaurant.latitude, Restaurant.longitude)
+        if user_id:
+            fill_q = fill_q.filter(
+                ~exists().where((UserPlate.plate_id == Plate.id) & (UserPlate.user_id == user_id)),
+                ~exists().where((Swipe.plate_id == Plate.id) & (Swipe.user_id == user_id))
+            )
+        taken = set(picked) | exclude
+        for row in fill_q.order_by(Plate.created_at.desc()).limit((size - len(picked)) * 3 + len(taken)):
+            if row[0] in taken:
+                continue
+            if lat is not None and lon is not None and haversine(lat, lon, row[1], row[2]) > radius_miles:
+                continue
+            picked.append(row[0])
+            taken.add(row[0])
+            if len(picked) >= size:
+                break
+    return picked
 
-    return plates
+def _deck_key(user_id, lat, lon, radius_miles):
+    if lat is None or lon is None:
+        return (user_id, None)
+    return (user_id, (round(lat, 2), round(lon, 2), radius_miles))
 
+def _refill_deck(key, lat, lon, radius_miles):
+    with app.app_context():
+        try:
+            with _decks_lock:
+                deck = _decks.get(key)
+                current = list(deck['plate_ids']) if deck else []
+            more = build_deck(key[0], lat, lon, radius_miles, exclude=current)
+            with _decks_lock:
+                deck = _decks.get(key)
+                if deck is None:
+                    return  # evicted meanwhile
+                deck['plate_ids'].extend(pid for pid in more if pid not in deck['plate_ids'])
+                deck['refilling'] = False
+        except Exception:
+            logger.exception("Deck refill failed for %s", key)
+            with _decks_lock:
+                if key in _decks:
+                    _decks[key]['refilling'] = False
+
+def _maybe_refill(key, lat, lon, radius_miles):
+    """Start a background top-up if the deck is running low. Call with _decks_lock held."""
+    deck = _decks.get(key)
+    if deck and not deck['refilling'] and len(deck['plate_ids']) < DECK_REFILL_AT:
+        deck['refilling'] = True
+        threading.Thread(target=_refill_deck, args=(key, lat, lon, radius_miles), daemon=True).start()
+
+def _sweep_decks(now):
+    """Drop expired decks, then the least recently used over DECK_MAX_CACHED. Call with _decks_lock held."""
+    for key in [k for k, d in _decks.items() if (now - d['built_at']).total_seconds() > DECK_TTL_SECONDS]:
+        del _decks[key]
+    while len(_decks) > DECK_MAX_CACHED:
+        _decks.popitem(last=False)
+
+def _swiped_among(user_id, plate_ids):
+    """Which of plate_ids the user has swiped, liked or rated (possibly through another worker)."""
+    if not plate_ids:
+        return set()
+    swiped = {pid for (pid,) in db.session.query(Swipe.plate_id)
+              .filter(Swipe.user_id == user_id, Swipe.plate_id.in_(plate_ids))}
+    swiped.update(pid for (pid,) in db.session.query(UserPlate.plate_id)
+                  .filter(UserPlate.user_id == user_id, UserPlate.plate_id.in_(plate_ids)))
+    return swiped
+
+def get_deck(user_id, lat=None, lon=None, radius_miles=20, count=10):
+    """The next `count` plate ids in this user's deck (does not consume them)."""
+    key = _deck_key(user_id, lat, lon, radius_miles)
+    now = datetime.utcnow()
+    with _decks_lock:
+        deck = _decks.get(key)
+        if deck and (now - deck['built_at']).total_seconds() <= DECK_TTL_SECONDS:
+            _decks.move_to_end(key)
+            plate_ids = list(deck['plate_ids'])
+        else:
+            plate_ids = None
+
+    if plate_ids is not None:
+        cache_hit('play_deck')
+        swiped = _swiped_among(user_id, plate_ids)
+        with _decks_lock:
+            deck = _decks.get(key)
+            if deck and swiped:
+                deck['plate_ids'] = deque(pid for pid in deck['plate_ids'] if pid not in swiped)
+            _maybe_refill(key, lat, lon, radius_miles)
+        return [pid for pid in plate_ids if pid not in swiped][:count]
+
+    cache_miss('play_deck')
+    plate_ids = build_deck(user_id, lat, lon, radius_miles)
+    with _decks_lock:
+        _decks[key] = {'plate_ids': deque(plate_ids), 'built_at': now, 'refilling': False, 'geo': (lat, lon, radius_miles)}
+        _sweep_decks(now)
+    return plate_ids[:count]
+
+def consume_from_decks(user_id, plate_id):
+    """Drop a swiped plate from every cached deck of this user and top them up if needed."""
+    with _decks_lock:
+        for key, deck in _decks.items():
+            if key[0] != user_id:
+                continue
+            try:
+                deck['plate_ids'].remove(plate_id)
+            except ValueError:
+                pass
+            _maybe_refill(key, *deck['geo'])
+
+def deck_cards(plate_ids, fields=None):
+    """Card data for plate_ids in the given order, from one projected query (see PLATE_SCHEMA)."""
+    return serialize_plates(plate_ids, PLATE_SCHEMA.resolve(fields))
+
+
+# ------------------ API Serializers ------------------
+# Fields the JSON endpoints can return; clients pick a subset with ?fields=a,b,c
+# and only the columns behind those fields are selected (serializers.py).
+def _placeholder_image(image_url):
+    return image_url or url_for('static', filename='uploads/placeholder.png')
+
+def _average_rating(total, count):
+    return round(total / count, 1) if count else 0
+
+PLATE_SCHEMA = Schema('plate', [
+    Field('id', Plate.id),
+    Field('name', Plate.name),
+    Field('description', Plate.description, encode=lambda v: v or ''),
+    Field('image_url', Plate.image_url, encode=_placeholder_image),
+    Field('image_small', Plate.image_url, encode=small_image_url),
+    Field('rating', Plate.ratings_total, Plate.ratings_count, encode=_average_rating),
+    Field('user', User.username, encode=lambda v: v or 'Unknown'),
+    Field('restaurant_name', Restaurant.name, encode=lambda v: v or ''),
+    Field('restaurant_id', Plate.restaurant_id),
+    Field('latitude', Restaurant.latitude),
+    Field('longitude', Restaurant.longitude),
+    Field('category', Category.name),
+    Field('created_at', Plate.created_at),
+    Field('likes', Plate.likes_total),
+    Field('comments', Plate.comments_total),
+], default=('id', 'name', 'description', 'image_url', 'rating', 'user', 'restaurant_name'))
+
+RESTAURANT_SCHEMA = Schema('restaurant', [
+    Field('id', Restaurant.id),
+    Field('name', Restaurant.name),
+    Field('latitude', Restaurant.latitude),
+    Field('longitude', Restaurant.longitude),
+    Field('address', Restaurant.address, encode=lambda v: v or ''),
+    Field('website', Restaurant.website, encode=lambda v: v or ''),
+], default=('name', 'latitude', 'longitude', 'address', 'website'))
+
+def serialize_plates(plate_ids, names):
+    """Dicts of `names` for plate_ids, in the given order; one SELECT however many plates."""
+    if not plate_ids:
+        return []
+    columns = PLATE_SCHEMA.columns(names)
+    if not any(c is Plate.id for c in columns):
+        columns.append(Plate.id)
+    id_index = next(i for i, c in enumerate(columns) if c is Plate.id)
+    rows = (
+        db.session.query(*columns)
+        .select_from(Plate)
+        .outerjoin(Restaurant, Restaurant.id == Plate.restaurant_id)
+        .outerjoin(User, User.id == Plate.user_id)
+        .outerjoin(Category, Category.id == Plate.category_id)
+        .filter(Plate.id.in_(plate_ids))
+    )
+    by_id = {row[id_index]: row for row in rows}
+    encode_row = PLATE_SCHEMA.row_encoder(names, columns)
+    return [encode_row(by_id[pid]) for pid in plate_ids if pid in by_id]
+
+
+# ------------------ Map Clusters ------------------
+# Tiles are an equirectangular grid: at zoom z a tile is 360 / 2**z degrees on a
+# side, tile (x, y) = floor((lon + 180) / size), floor((lat + 90) / size). Each
+# tile is split into MAP_GRID x MAP_GRID cells and aggregated in SQL, so cells
+# line up across tiles and every tile can be cached on its own.
+MAP_GRID = 8
+MAP_POINTS_ZOOM = 15
+MAP_MAX_TILES = 36
+MAP_MAX_POINTS_PER_TILE = 500
+MAP_TILE_TTL_SECONDS = 60
+MAP_TILE_CACHE_SIZE = 2048
+
+_tile_cache = OrderedDict()
+_tile_cache_lock = threading.Lock()
+
+def tile_size_degrees(zoom):
+    return 360.0 / (2 ** zoom)
+
+def tile_range(min_lon, min_lat, max_lon, max_lat, zoom):
+    """Inclusive (x0, x1, y0, y1) tile range covering the bbox."""
+    size = tile_size_degrees(zoom)
+    return (int((min_lon + 180) // size), int((max_lon + 180) // size),
+            int((min_lat + 90) // size), int((max_lat + 90) // size))
+
+def tile_count(min_lon, min_lat, max_lon, max_lat, zoom):
+    x0, x1, y0, y1 = tile_range(min_lon, min_lat, max_lon, max_lat, zoom)
+    return (x1 - x0 + 1) * (y1 - y0 + 1)
+
+def _top_plates_by(partition_cols, where):
+    """Highest quality plate per partition (cluster cell or restaurant), via ROW_NUMBER()."""
+    ranked = (
+        db.select(
+            Plate.id, Plate.name, Plate.image_url, *partition_cols,
+            db.func.row_number().over(
+                partition_by=partition_cols,
+                order_by=(Plate.quality_score.desc(), Plate.id.desc())
+            ).label('rn')
+        )
+        # From the restaurants in the box to their plates (ix_plate_restaurant_quality), never a plate scan
+        .select_from(Restaurant)
+        .join(Plate, Plate.restaurant_id == Restaurant.id)
+        .where(*where)
+        .subquery()
+    )
+    rows = db.session.execute(db.select(ranked).where(ranked.c.rn == 1))
+    return {tuple(row[3:-1]): {'id': row[0], 'name': row[1], 'image_url': row[2]} for row in rows}
 
+def compute_map_tiles(zoom, x0, x1, y0, y1):
+    """
+    {(x, y): items} for every tile in the inclusive range, from one set of queries over
+    the box they cover rather than a set per tile.
+    """
+    size = tile_size_degrees(zoom)
+    min_lon, min_lat = x0 * size - 180, y0 * size - 90
+    in_box = (
+        Restaurant.latitude >= min_lat, Restaurant.latitude < (y1 + 1) * size - 90,
+        Restaurant.longitude >= min_lon, Restaurant.longitude < (x1 + 1) * size - 180,
+    )
+    tiles = {(x, y): [] for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)}
+
+    if zoom >= MAP_POINTS_ZOOM:
+        tx = db.cast((Restaurant.longitude + 180) / size, db.Integer)
+        ty = db.cast((Restaurant.latitude + 90) / size, db.Integer)
+        ranked = (
+            db.select(Restaurant.id, Restaurant.name, Restaurant.latitude, Restaurant.longitude,
+                      tx.label('tx'), ty.label('ty'),
+                      db.func.row_number().over(partition_by=(tx, ty), order_by=Restaurant.id).label('rn'))
+            .where(*in_box)
+            .subquery()
+        )
+        shown = db.select(ranked).where(ranked.c.rn <= MAP_MAX_POINTS_PER_TILE).subquery()
+        plates = (
+            db.select(db.func.count(Plate.id)).where(Plate.restaurant_id == shown.c.id)
+            .correlate(shown).scalar_subquery()
+        )
+        rows = db.session.execute(
+            db.select(shown.c.id, shown.c.name, shown.c.latitude, shown.c.longitude, shown.c.tx, shown.c.ty, plates)
+        ).all()
+        if not rows:
+            return tiles
+        top = _top_plates_by((Plate.restaurant_id,), in_box + (Restaurant.id.in_(db.select(shown.c.id)),))
+        for rid, name, lat, lon, x, y, plate_count in rows:
+            if (x, y) in tiles:
+                tiles[(x, y)].append(
+                    {'type': 'restaurant', 'id': rid, 'name': name, 'lat': lat, 'lon': lon,
+                     'restaurants': 1, 'plates': plate_count, 'top_plate': top.get((rid,))}
+                )
+        return tiles
 
+    cell = size / MAP_GRID
+    # Offsets keep the operands positive so CAST truncation == floor on every backend
+    cx = db.cast((Restaurant.longitude + 180) / cell, db.Integer).label('cx')
+    cy = db.cast((Restaurant.latitude + 90) / cell, db.Integer).label('cy')
 
+    restaurant_cells = db.session.execute(
+        db.select(cx, cy, db.func.count(Restaurant.id), db.func.avg(Restaurant.latitude), db.func.avg(Restaurant.longitude))
+        .where(*in_box).group_by(cx, cy)
+    ).all()
+    if not restaurant_cells:
+        return tiles
+    plate_cells = dict(
+        ((row[0], row[1]), row[2]) for row in db.session.execute(
+            db.select(cx, cy, db.func.count(Plate.id))
+            .select_from(Restaurant)
+            .join(Plate, Plate.restaurant_id == Restaurant.id)
+            .where(*in_box).group_by(cx, cy)
+        )
+    )
+    top = _top_plates_by((cx, cy), in_box)
+    for gx, gy, count, lat, lon in restaurant_cells:
+        # Cells line up with tiles: MAP_GRID cells per tile side
+        tile = tiles.get((gx // MAP_GRID, gy // MAP_GRID))
+        if tile is not None:
+            tile.append({'type': 'cluster', 'lat': lat, 'lon': lon, 'restaurants': count,
+                         'plates': plate_cells.get((gx, gy), 0), 'top_plate': top.get((gx, gy))})
+    return tiles
+
+def get_map_tiles(zoom, x0, x1, y0, y1):
+    """{(x, y): items} for the inclusive tile range; the tiles not cached are computed together."""
+    now = datetime.utcnow()
+    tiles, missing = {}, []
+    with _tile_cache_lock:
+        for key in ((zoom, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)):
+            hit = _tile_cache.get(key)
+            if hit and (now - hit[0]).total_seconds() <= MAP_TILE_TTL_SECONDS:
+                _tile_cache.move_to_end(key)
+                tiles[key[1:]] = hit[1]
+            else:
+                missing.append(key[1:])
+    if tiles:
+        cache_hit('map_tiles', len(tiles))
+    if not missing:
+        return tiles
+
+    cache_miss('map_tiles', len(missing))
+    computed = compute_map_tiles(zoom, min(x for x, _ in missing), max(x for x, _ in missing),
+                                 min(y for _, y in missing), max(y for _, y in missing))
+    with _tile_cache_lock:
+        for (x, y), items in computed.items():
+            _tile_cache[(zoom, x, y)] = (now, items)
+            _tile_cache.move_to_end((zoom, x, y))
+        while len(_tile_cache) > MAP_TILE_CACHE_SIZE:
+            _tile_cache.popitem(last=False)
+            CACHE_EVICTIONS.labels('map_tiles').inc()
+    tiles.update(computed)
+    return tiles
+
+@app.route('/map/clusters')
+@csrf.exempt
+def map_clusters():
+    """
+    Restaurants/plates in a map viewport: ?bbox=min_lon,min_lat,max_lon,max_lat&zoom=<0-20>
+    Returns grid clusters (count, centroid, top plate), or individual restaurants
+    from zoom MAP_POINTS_ZOOM up. Very wide viewports are clustered at a lower zoom.
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in request.args.get('bbox', '').split(','))
+    except ValueError:
+        return jsonify({'error': 'bbox must be min_lon,min_lat,max_lon,max_lat'}), 400
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        return jsonify({'error': 'Invalid bbox'}), 400
+    zoom = max(0, min(request.args.get('zoom', 10, type=int), 20))
+
+    while zoom > 0 and tile_count(min_lon, min_lat, max_lon, max_lat, zoom) > MAP_MAX_TILES:
+        zoom -= 1
+
+    items = [
+        item for tile_items in get_map_tiles(zoom, *tile_range(min_lon, min_lat, max_lon, max_lat, zoom)).values()
+        for item in tile_items
+        if min_lat <= item['lat'] <= max_lat and min_lon <= item['lon'] <= max_lon
+    ]
+    return jsonify({
+        'zoom': zoom,
+        'mode': 'points' if zoom >= MAP_POINTS_ZOOM else 'clusters',
+        'items': items,
+        'count': len(items)
+    })
 
 
+# ------------------ Plate Cards ------------------
+# Feed, search, favorites and unrated pages render PlateCards (viewmodels.py)
+# built from these columns instead of Plate objects with their collections loaded.
+CARD_COLUMNS = (
+    Plate.id, Plate.name, Plate.description, Plate.image_url, Plate.created_at,
+    Restaurant.name, Restaurant.latitude, Restaurant.longitude, Category.name,
+    Plate.user_id, User.username,
+    Plate.ratings_count, Plate.ratings_total, Plate.likes_total, Plate.comments_total,
+)
+
+def plate_card_query():
+    """Projected query over CARD_COLUMNS; add filters and ordering, then pass to load_plate_cards()."""
+    return (
+        db.session.query(*CARD_COLUMNS)
+        .select_from(Plate)
+        .outerjoin(Restaurant, Restaurant.id == Plate.restaurant_id)
+        .outerjoin(Category, Category.id == Plate.category_id)
+        .outerjoin(User, User.id == Plate.user_id)
+    )
+
+def load_plate_cards(q, user_id=None, with_comments=False):
+    """
+    Run a plate_card_query() and return PlateCards. With user_id, fills in that
+    user's like/favorite/rating in one query per 500 plates; with_comments does
+    the same for comments (authors joined, orphaned ones skipped).
+    """
+    cards = cards_from_rows(q.all())
+    ids = [card.id for card in cards]
+    if user_id and ids:
+        attach_user_flags(cards, (
+            row for chunk in chunks(ids) for row in
+            db.session.query(UserPlate.plate_id, UserPlate.liked, UserPlate.favorite, UserPlate.rated)
+            .filter(UserPlate.user_id == user_id, UserPlate.plate_id.in_(chunk))
+        ))
+    if with_comments and ids:
+        attach_comments(cards, (
+            row for chunk in chunks(ids) for row in
+            db.session.query(Comment.plate_id, Comment.id, User.username, Comment.text, Comment.created_at)
+            .join(User, User.id == Comment.user_id)
+            .filter(Comment.plate_id.in_(chunk))
+            .order_by(Comment.created_at, Comment.id)
+        ))
+    return cards
+
+def within_radius(cards, lat, lon, radius_miles):
+    """Trim bounding-box results to the actual radius."""
+    return [
+        card for card in cards
+        if card.latitude and card.longitude and haversine(lat, lon, card.latitude, card.longitude) <= radius_miles
+    ]
+
 
 # ------------------ Home / Search ------------------
+# The home feed is paged like the unrated inbox: FEED_PAGE_SIZE cards, then a
+# ?cursor= (the last plate's id) for the next page. The page after a plate is
+# everything below it in the sort's key, Plate.id breaking ties.
+FEED_PAGE_SIZE = 24
+FEED_SORT_KEYS = {
+    'new': (Plate.created_at, Plate.id),
+    'top': (Plate.quality_score, Plate.created_at, Plate.id),
+    'trending': (Plate.trending_score, Plate.created_at, Plate.id),
+}
+
+def after_plate(keys, plate_id):
+    """Filter for plates sorting after plate_id in ORDER BY keys DESC (keyset pagination)."""
+    ref = db.aliased(Plate)
+    values = [db.select(getattr(ref, col.key)).where(ref.id == plate_id).scalar_subquery() for col in keys]
+    condition = keys[-1] < values[-1]
+    for col, value in zip(reversed(keys[:-1]), reversed(values[:-1])):
+        condition = or_(col < value, and_(col == value, condition))
+    return condition
+
 @app.route('/')
 def home():
     category_id = request.args.get('category', type=int)
@@ -329,49 +1880,38 @@ def home():
     lat = request.args.get('lat', type=float)
     lon = request.args.get('lon', type=float)
     radius_miles = request.args.get('radius', type=float) or 100
+    sort = request.args.get('sort', 'new')
+    cursor = request.args.get('cursor', type=int)
     user_id = session.get('user_id')
 
-    # Base query
-    plates_q = Plate.query.options(
-        db.joinedload(Plate.restaurant),
-        db.joinedload(Plate.category),
-        db.joinedload(Plate.user_plates),
-        db.joinedload(Plate.comments).joinedload(Comment.user)
-    ).order_by(Plate.created_at.desc())
+    keys = FEED_SORT_KEYS.get(sort, FEED_SORT_KEYS['new'])
+    plates_q = plate_card_query().order_by(*(col.desc() for col in keys))
+    if cursor:
+        plates_q = plates_q.filter(after_plate(keys, cursor))
 
     if category_id:
         plates_q = plates_q.filter(Plate.category_id == category_id)
 
-    plates = plates_q.all()
-
-    for plate in plates:
-        # Average rating
-        ratings = [up.rated for up in plate.user_plates if up.rated is not None]
-        plate.avg_rating = round(sum(ratings)/len(ratings), 1) if ratings else 0
-
-        # Like count
-        plate.like_count = sum(1 for up in plate.user_plates if up.liked)
-
-        # User-specific flags
-        if user_id:
-            user_up = next((up for up in plate.user_plates if up.user_id == user_id), None)
-            plate.user_liked = user_up.liked if user_up else False
-            plate.user_favorited = user_up.favorite if user_up else False
-
-        # Only keep comments with a valid user
-        plate.comments = [c for c in plate.comments if c.user]
+    # Location filtering: bounding box in SQL, exact radius afterwards
+    if location_query and not (lat and lon):
+        lat, lon = geocode_location(location_query)
+    if lat and lon:
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_miles)
+        plates_q = plates_q.filter(
+            Restaurant.latitude.between(min_lat, max_lat),
+            Restaurant.longitude.between(min_lon, max_lon)
+        )
 
-    # Location filtering
-    if location_query or (lat and lon):
-        if not (lat and lon):
-            lat, lon = geocode_location(location_query)
-        plates = [
-            p for p in plates
-            if p.restaurant and p.restaurant.latitude and haversine(lat, lon, p.restaurant.latitude, p.restaurant.longitude) <= radius_miles
-        ]
+    plates = load_plate_cards(plates_q.limit(FEED_PAGE_SIZE + 1), user_id=user_id, with_comments=True)
+    next_url = None
+    if len(plates) > FEED_PAGE_SIZE:
+        plates = plates[:FEED_PAGE_SIZE]
+        next_url = url_for('home', **dict(request.args.to_dict(), cursor=plates[-1].id))
+    if lat and lon:
+        plates = within_radius(plates, lat, lon, radius_miles)
 
-    categories = Category.query.order_by(Category.name).all()
-    return render_template('home.html', plates=plates, categories=categories)
+    return render_template('home.html', plates=plates, categories=all_categories(), live_since=live_cursor(),
+                           next_url=next_url)
 
 
 
@@ -384,68 +1924,79 @@ def search_plates():
         user_id = session.get('user_id')
 
         # --- Query params ---
+        q = request.args.get('q', '').strip()
         location = request.args.get('location', '').strip()
         category_id = request.args.get('category_id', type=int)
         radius_miles = float(request.args.get('radius', 10))  # default 10 miles
         show_unrated_only = request.args.get('unrated', type=int) == 1
+        sort = request.args.get('sort')
 
-        # Fetch all plates with restaurants preloaded
-        plates = Plate.query.join(Restaurant).all()
-
-        # Compute avg_rating and check if unrated for current user
-        for plate in plates:
-            # Ratings from all users
-            ratings = [up.rated for up in plate.user_plates if up.rated and up.rated > 0]
-            plate.avg_rating = sum(ratings) / len(ratings) if ratings else 0
-
-            # Determine if this plate is unrated by current user
-            if user_id:
-                up = next((up for up in plate.user_plates if up.user_id == user_id), None)
-                plate.is_unrated_for_user = up is None or up.rated is None
-            else:
-                plate.is_unrated_for_user = False
-
-        filtered_plates = plates
+        # Text, category and location filters all go into one SQL query
+        plates_q = plate_card_query()
 
         # --- Filter by category if provided ---
         if category_id:
-            filtered_plates = [p for p in filtered_plates if p.category_id == category_id]
+            plates_q = plates_q.filter(Plate.category_id == category_id)
 
         # --- Filter by location if provided ---
+        lat = lon = None
         if location:
             lat, lon = geocode_location(location)
             if lat is None or lon is None:
                 return render_template(
                     'home.html',
                     plates=[],
-                    categories=Category.query.all(),
+                    categories=all_categories(),
                     error=f"Could not find location '{location}'"
                 )
+            min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_miles)
+            plates_q = plates_q.filter(
+                Restaurant.latitude.between(min_lat, max_lat),
+                Restaurant.longitude.between(min_lon, max_lon)
+            )
+
+        # --- Full-text match, ranked best first ---
+        if q:
+            matches = plate_search_subquery(q)
+            if matches is not None:
+                plates_q = plates_q.join(matches, matches.c.plate_id == Plate.id)
+                if sort not in SORT_ORDERS:
+                    plates_q = plates_q.order_by(matches.c.rank)
+            else:
+                like = f"%{q}%"
+                plates_q = plates_q.filter(or_(Plate.name.ilike(like), Plate.description.ilike(like),
+                                               Restaurant.name.ilike(like)))
+        # An explicit sort wins over relevance; without a query, newest first
+        if sort in SORT_ORDERS or not q:
+            plates_q = plates_q.order_by(*SORT_ORDERS.get(sort, SORT_ORDERS['new']))
 
-            filtered_plates = [
-                p for p in filtered_plates
-                if p.restaurant and p.restaurant.latitude and p.restaurant.longitude and
-                   haversine(lat, lon, p.restaurant.latitude, p.restaurant.longitude) <= radius_miles
-            ]
+        plates = load_plate_cards(plates_q, user_id=user_id, with_comments=True)
+
+        # Bounding box is a superset of the radius; trim the corners
+        if lat is not None:
+            plates = within_radius(plates, lat, lon, radius_miles)
+
+        filtered_plates = plates
 
         # --- Filter to only unrated plates if requested ---
         if show_unrated_only and user_id:
-            filtered_plates = [p for p in filtered_plates if p.is_unrated_for_user]
+            filtered_plates = [p for p in filtered_plates if p.user_rating is None]
 
-        categories = Category.query.all()
         return render_template(
             'home.html',
             plates=filtered_plates,
-            categories=categories,
-            show_unrated_only=show_unrated_only
+            categories=all_categories(),
+            show_unrated_only=show_unrated_only,
+            live_since=live_cursor()
         )
 
-    except Exception as e:
-        print("Error in search_plates:", e)
+    except Exception:
+        APP_ERRORS.labels('search_plates').inc()
+        logger.exception("Error in search_plates")
         return render_template(
             'home.html',
             plates=[],
-            categories=Category.query.all(),
+            categories=all_categories(),
             error='Server error'
         )
 
@@ -529,6 +2080,10 @@ def create_plate():
             flash(f"Please fill these fields: {', '.join(missing_fields)}", "error")
             return redirect(url_for('create_plate'))
 
+        if not category_id.isdigit() or int(category_id) not in {c.id for c in all_categories()}:
+            flash("Please pick a category from the list.", "error")
+            return redirect(url_for('create_plate'))
+
         # Convert lat/lon to float safely
         try:
             restaurant_lat = float(restaurant_lat)
@@ -537,22 +2092,21 @@ def create_plate():
             flash("Invalid restaurant location. Use 'Use My Location' or select a valid restaurant.", "error")
             return redirect(url_for('create_plate'))
 
-        # Find or create restaurant
-        restaurant = Restaurant.query.filter_by(
-            name=restaurant_name,
-            latitude=restaurant_lat,
-            longitude=restaurant_lon
-        ).first()
+        # Find or create restaurant (tolerates small GPS drift and name variations)
+        restaurant_id = resolve_restaurant_id(restaurant_name, restaurant_lat, restaurant_lon)
+        restaurant = db.session.get(Restaurant, restaurant_id) if restaurant_id else None
 
         if not restaurant:
             restaurant = Restaurant(
                 name=restaurant_name,
                 address=restaurant_address,
                 latitude=restaurant_lat,
-                longitude=restaurant_lon
+                longitude=restaurant_lon,
+                is_chain=is_chain_name(restaurant_name)
             )
             db.session.add(restaurant)
             db.session.commit()
+            index_restaurant_for_autocomplete(restaurant)
 
         # Create plate
         plate = Plate(
@@ -560,7 +2114,10 @@ def create_plate():
             description=description,
             category_id=int(category_id),
             restaurant_id=restaurant.id,
-            user_id=user_id
+            user_id=user_id,
+            geo_cell=geo_cell_for(restaurant.latitude, restaurant.longitude),
+            quality_score=bayesian_average(0, 0, get_ranking_prior()),
+            trending_score=trending_points('post', datetime.utcnow())
         )
 
         # Handle image
@@ -572,10 +2129,13 @@ def create_plate():
 
         db.session.add(plate)
         db.session.commit()
+        index_plates_for_search([plate.id])
+        autocomplete_index.add('plates', plate.id, plate.name)
 
-        # Add to UserPlate (unrated by default)
+        # Add to UserPlate (unrated by default) and queue it in the poster's unrated inbox
         user_plate = UserPlate(user_id=user_id, plate_id=plate.id)
         db.session.add(user_plate)
+        add_to_unrated_inbox(user_id, plate.id)
         db.session.commit()
 
         # Optionally schedule email for rating
@@ -584,8 +2144,7 @@ def create_plate():
         flash("Plate posted successfully!", "success")
         return redirect(url_for('home'))
 
-    categories = Category.query.all()
-    return render_template('create_plate.html', categories=categories)
+    return render_template('create_plate.html')
 
 # ------------------ Nearby Restaurants ------------------
 @app.route('/nearby_restaurants')
@@ -594,24 +2153,32 @@ def nearby_restaurants():
     """
     Return nearby restaurants based on lat/lon or location query.
     Uses Google Places API if GOOGLE_PLACES_API_KEY is set, otherwise local DB with Haversine distance.
-    Fast food restaurants are filtered out.
+    Chain / fast food restaurants are filtered out. ?fields=name,address,... limits the keys
+    per restaurant (see RESTAURANT_SCHEMA).
     """
-    FAST_FOOD_KEYWORDS = [
-        "McDonald's", "Burger King", "Wendy's", "KFC", "Taco Bell",
-        "Subway", "Domino's", "Pizza Hut", "Chipotle", "Popeyes",
-        "Arby's", "Jack in the Box", "Dairy Queen", "Little Caesars",
-        "Dunkin'", "Dunkin", "Starbucks", "Five Guys", "In-N-Out", "Sonic"
-    ]
 
     try:
         radius_meters = float(request.args.get('radius', 4000))  # default ~2.5 miles
         lat = request.args.get('lat', type=float)
         lon = request.args.get('lon', type=float)
         location = request.args.get('location', '').strip()
+        try:
+            names = RESTAURANT_SCHEMA.resolve(parse_fields(request.args.get('fields')))
+        except FieldsError as e:
+            return jsonify({'restaurants': [], 'error': str(e)}), 400
 
-        # Geocode if location provided but no coordinates
+        # Under load (see ADMISSION_CLASSES) skip Google entirely and answer from the local DB
+        degraded = g.get('admission_degraded', False)
+
+        # Geocode if location provided but no coordinates (degraded: only what's already cached)
         if location and (lat is None or lon is None):
-            lat, lon = geocode_location(location)
+            if degraded:
+                cached = cached_geocode(location)
+                if cached is None:
+                    return jsonify({'restaurants': [], 'error': 'Server is busy, please retry shortly.'}), 503, {'Retry-After': '2'}
+                lat, lon = cached
+            else:
+                lat, lon = geocode_location(location)
             if lat is None or lon is None:
                 return jsonify({'restaurants': [], 'error': f"Could not find location '{location}'"}), 400
 
@@ -622,51 +2189,36 @@ def nearby_restaurants():
         restaurants = []
 
         # --- Google Places API ---
-        if GOOGLE_PLACES_API_KEY:
+        if GOOGLE_PLACES_API_KEY and not degraded:
+            chains = chain_matcher()
             next_page_token = None
             while True:
                 url = (
-                    "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+                    f"{GOOGLE_MAPS_BASE_URL}/maps/api/place/nearbysearch/json"
                     f"?location={lat},{lon}&radius={int(radius_meters)}&type=restaurant&key={GOOGLE_PLACES_API_KEY}"
                 )
                 if next_page_token:
                     url += f"&pagetoken={next_page_token}"
-                    import time
-                    time.sleep(2)  # short delay required by Google
+                    time.sleep(GOOGLE_PAGETOKEN_DELAY_SECONDS)  # short delay required by Google
 
-                resp = requests.get(url, timeout=6).json()
+                resp = http_get_json('google_places', url)
                 if resp.get('status') not in ('OK', 'ZERO_RESULTS'):
                     break
 
-                for r in resp.get("results", []):
-                    name = r.get("name", "")
-                    # Skip fast food
-                    if any(keyword.lower() in name.lower() for keyword in FAST_FOOD_KEYWORDS):
-                        continue
+                # Skip chains
+                page = [r for r in resp.get("results", []) if not is_chain_name(r.get("name"), chains)]
+                # Fetch websites via Place Details, the whole page at once
+                websites = upstream_executor().map(place_website, [r.get('place_id') for r in page])
 
+                for r, website in zip(page, websites):
                     loc = r['geometry']['location']
-                    place_id = r.get('place_id')
-                    website = None
-                    # Fetch website via Place Details
-                    if place_id:
-                        try:
-                            details_url = (
-                                f"https://maps.googleapis.com/maps/api/place/details/json"
-                                f"?place_id={place_id}&fields=name,formatted_address,website&key={GOOGLE_PLACES_API_KEY}"
-                            )
-                            details = requests.get(details_url, timeout=6).json()
-                            if details.get("status") == "OK":
-                                website = details.get("result", {}).get("website")
-                        except:
-                            pass
-
-                    restaurants.append({
-                        "name": name,
+                    restaurants.append(RESTAURANT_SCHEMA.pick({
+                        "name": r.get("name", ""),
                         "latitude": loc.get("lat"),
                         "longitude": loc.get("lng"),
                         "address": r.get("vicinity", ""),
                         "website": website or ""
-                    })
+                    }, names))
 
                 next_page_token = resp.get("next_page_token")
                 if not next_page_token:
@@ -675,33 +2227,34 @@ def nearby_restaurants():
         # --- Local DB fallback ---
         else:
             radius_miles = radius_meters / 1609.34
-            all_restaurants = Restaurant.query.filter(
-                Restaurant.latitude.isnot(None),
-                Restaurant.longitude.isnot(None)
-            ).all()
-            for r in all_restaurants:
-                # Skip fast food
-                if any(keyword.lower() in r.name.lower() for keyword in FAST_FOOD_KEYWORDS):
-                    continue
-                dist = haversine(lat, lon, r.latitude, r.longitude)
-                if dist <= radius_miles:
-                    restaurants.append({
-                        "name": r.name,
-                        "latitude": r.latitude,
-                        "longitude": r.longitude,
-                        "address": r.address or "",
-                        "website": r.website or ""
-                    })
+            min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_miles)
+            # The radius check needs coordinates whatever fields were asked for
+            columns = RESTAURANT_SCHEMA.columns(names + ('latitude', 'longitude'))
+            lat_i, lon_i = (
+                next(i for i, c in enumerate(columns) if c is wanted)
+                for wanted in (Restaurant.latitude, Restaurant.longitude)
+            )
+            encode_row = RESTAURANT_SCHEMA.row_encoder(names, columns)
+            rows = db.session.query(*columns).filter(
+                Restaurant.is_chain == False,
+                Restaurant.latitude.between(min_lat, max_lat),
+                Restaurant.longitude.between(min_lon, max_lon)
+            )
+            for row in rows:
+                if haversine(lat, lon, row[lat_i], row[lon_i]) <= radius_miles:
+                    restaurants.append(encode_row(row))
 
-        return jsonify({
+        return json_response({
             "restaurants": restaurants,
             "lat": lat,
             "lon": lon,
-            "count": len(restaurants)
+            "count": len(restaurants),
+            "degraded": degraded
         })
 
     except Exception as e:
-        print("Nearby restaurants error:", e)
+        APP_ERRORS.labels('nearby_restaurants').inc()
+        logger.exception("Nearby restaurants error")
         return jsonify({'restaurants': [], 'error': 'Server error', 'detail': str(e)}), 500
 
 
@@ -726,9 +2279,17 @@ def add_restaurant():
     # Optionally geocode to store lat/lon
     lat, lon = geocode_location(full_address)
 
-    restaurant = Restaurant(name=name, address=full_address, latitude=lat, longitude=lon, website=website)
+    # Reuse the existing restaurant if this one is already on file
+    existing_id = resolve_restaurant_id(name, lat, lon)
+    if existing_id:
+        restaurant = db.session.get(Restaurant, existing_id)
+        return jsonify({'success': True, 'restaurant_id': restaurant.id, 'name': restaurant.name, 'existing': True})
+
+    restaurant = Restaurant(name=name, address=full_address, latitude=lat, longitude=lon, website=website,
+                            is_chain=is_chain_name(name))
     db.session.add(restaurant)
     db.session.commit()
+    index_restaurant_for_autocomplete(restaurant)
 
     return jsonify({'success': True, 'restaurant_id': restaurant.id, 'name': restaurant.name})
 
@@ -736,30 +2297,121 @@ def add_restaurant():
 
 
 # ------------------ Play / Swipe ------------------
+# /play renders the first DECK_PAGE_SIZE cards and a cursor; the page fetches the next
+# page from /api/deck before it runs out and preloads the next few card images. A
+# cursor's state (who, where, which plates it already served) lives in the shared
+# cache, so any worker can continue it.
+DECK_PAGE_SIZE = 10
+DECK_PRELOAD_IMAGES = 3
+DECK_CURSOR_MAX_SERVED = 1000
+DECK_CARD_FIELDS = PLATE_SCHEMA.default + ('image_small',)
+
+def open_deck_cursor(user_id, lat, lon, radius_miles):
+    return uuid.uuid4().hex, {'user_id': user_id, 'geo': (lat, lon, radius_miles), 'served': []}
+
+def next_deck_page(state, count):
+    """The next `count` plate ids for a cursor state, never one it already served; updates state."""
+    user_id = state['user_id']
+    lat, lon, radius_miles = state['geo']
+    served = set(state['served'])
+    plate_ids = []
+    if user_id:
+        plate_ids = [pid for pid in get_deck(user_id, lat, lon, radius_miles, count=DECK_SIZE)
+                     if pid not in served][:count]
+    if len(plate_ids) < count:
+        plate_ids += build_deck(user_id, lat, lon, radius_miles, size=count - len(plate_ids),
+                                exclude=served | set(plate_ids))
+    state['served'] = (state['served'] + plate_ids)[-DECK_CURSOR_MAX_SERVED:]
+    return plate_ids
+
+def image_preload_links(cards):
+    """Link header value preloading the small images of the next DECK_PRELOAD_IMAGES cards."""
+    placeholder = _placeholder_image(None)
+    urls = dict.fromkeys(
+        url for url in (card.get('image_small', '') for card in cards[:DECK_PRELOAD_IMAGES])
+        if url.startswith('/') and url != placeholder
+    )
+    return ', '.join(f"<{url}>; rel=preload; as=image" for url in urls)
+
 @app.route('/play')
 @csrf.exempt
 def play():
-    plates = Plate.query.order_by(Plate.created_at.desc()).limit(10).all()
-    plates_data = [{"id":p.id,
-                    "name":p.name,
-                    "description":p.description or '',
-                    "rating":0,
-                    "image_url":p.image_url or url_for('static',filename='uploads/placeholder.png'),
-                    "restaurant":{"name":p.restaurant.name if p.restaurant else ''}} for p in plates]
-    return render_template('play.html', plates=plates_data)
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    radius_miles = request.args.get('radius_miles', 20, type=float)
+    cursor, state = open_deck_cursor(session.get('user_id'), lat, lon, radius_miles)
+    cards = deck_cards(next_deck_page(state, DECK_PAGE_SIZE), DECK_CARD_FIELDS)
+    named_cache('deck_cursor').set(cursor, state, DECK_TTL_SECONDS)
+    links = image_preload_links(cards)
+    # 103 Early Hints where the server supports it (gunicorn), so images start before the page
+    early_hints = request.environ.get('wsgi.early_hints')
+    if links and early_hints:
+        early_hints([('Link', links)])
+    plates_data = [dict(card, restaurant={"name": card["restaurant_name"]}) for card in cards]
+    response = make_response(render_template('play.html', plates=plates_data, cursor=cursor,
+                                             page_size=DECK_PAGE_SIZE, preload_ahead=DECK_PRELOAD_IMAGES))
+    if links:
+        response.headers['Link'] = links
+    return response
+
+@app.route('/api/deck')
+@csrf.exempt
+def api_deck():
+    """
+    The next ?count= (default DECK_PAGE_SIZE, at most DECK_SIZE) swipe cards. Start with
+    lat/lon/radius_miles (optional) and pass back ?cursor= from each response to continue;
+    410 means the cursor expired and a new deck should be started. ?fields= as for
+    /get_plates_nearby, defaulting to DECK_CARD_FIELDS.
+    """
+    user_id = session.get('user_id')
+    count = max(1, min(request.args.get('count', DECK_PAGE_SIZE, type=int), DECK_SIZE))
+    try:
+        names = PLATE_SCHEMA.resolve(parse_fields(request.args.get('fields')) or DECK_CARD_FIELDS)
+    except FieldsError as e:
+        return jsonify({'error': str(e)}), 400
+    cursors = named_cache('deck_cursor')
+    cursor = request.args.get('cursor')
+    if cursor:
+        state = cursors.get(cursor)
+        if state is None or state['user_id'] != user_id:
+            return jsonify({'error': 'Deck cursor expired, start a new deck.'}), 410
+    else:
+        cursor, state = open_deck_cursor(user_id, request.args.get('lat', type=float),
+                                         request.args.get('lon', type=float),
+                                         request.args.get('radius_miles', 20, type=float))
+    cards = serialize_plates(next_deck_page(state, count), names)
+    cursors.set(cursor, state, DECK_TTL_SECONDS)
+    response = json_response({'cards': cards, 'cursor': cursor, 'done': len(cards) < count})
+    links = image_preload_links(cards)
+    if links:
+        response.headers['Link'] = links
+    return response
 
 @app.route('/get_plates_nearby')
 @csrf.exempt
 def get_plates_nearby():
+    """
+    Deck plates near lat/lon as JSON. ?fields=id,name,... returns only those
+    keys (see PLATE_SCHEMA) and ?count= asks for up to PLATES_NEARBY_MAX plates;
+    past the cached deck size the deck is built for this request only.
+    """
     lat=request.args.get('lat')
     lon=request.args.get('lon')
     if not lat or not lon:
         return jsonify({'error':'Missing lat/lon'}),400
     lat,lon=float(lat),float(lon)
     radius_miles=float(request.args.get('radius_miles',20))
-    nearby=[p for p in Plate.query.all() if p.restaurant and p.restaurant.latitude and haversine(lat,lon,p.restaurant.latitude,p.restaurant.longitude)<=radius_miles]
-    plates_list=[{'id':p.id,'name':p.name,'description':p.description or '', 'image_url':p.image_url or url_for('static', filename='uploads/placeholder.png'), 'rating':0,'user':p.user.username if p.user else 'Unknown','restaurant_name':p.restaurant.name if p.restaurant else ''} for p in nearby[:10]]
-    return jsonify({'plates':plates_list})
+    count = max(1, min(request.args.get('count', 10, type=int), PLATES_NEARBY_MAX))
+    try:
+        names = PLATE_SCHEMA.resolve(parse_fields(request.args.get('fields')))
+    except FieldsError as e:
+        return jsonify({'error': str(e)}), 400
+    user_id = session.get('user_id')
+    if user_id and count <= DECK_SIZE:
+        plate_ids = get_deck(user_id, lat, lon, radius_miles, count=count)
+    else:
+        plate_ids = build_deck(user_id, lat, lon, radius_miles, size=count)
+    return json_response({'plates': serialize_plates(plate_ids, names)})
 
 @app.route('/plate/<int:plate_id>/play_action', methods=['POST'])
 @csrf.exempt
@@ -778,7 +2430,35 @@ def play_action(plate_id):
 @csrf.exempt
 def plate_swipe(plate_id):
     data=request.get_json(force=True, silent=True) or {}
-    print(f"Swipe: user={session.get('user_id')} plate={plate_id} dir={data.get('direction')}")
+    direction = data.get('direction')
+    user_id = session.get('user_id')
+    SWIPES.labels(direction if direction in ('left', 'right', 'up') else 'other').inc()
+    # Was the card's image already there when it was shown? (reported by play.html)
+    image_state = data.get('image')
+    if image_state in ('ready', 'waited', 'failed'):
+        PLAY_CARD_IMAGES.labels(image_state).inc()
+        wait_ms = data.get('image_wait_ms')
+        if image_state == 'waited' and isinstance(wait_ms, (int, float)) and 0 <= wait_ms < 600_000:
+            PLAY_IMAGE_WAIT.observe(wait_ms / 1000)
+    if user_id and direction in ('left', 'right', 'up'):
+        plate = Plate.query.get_or_404(plate_id)
+        swipe = db.session.get(Swipe, (user_id, plate_id))
+        if swipe:
+            swipe.direction = direction
+        else:
+            db.session.add(Swipe(user_id=user_id, plate_id=plate_id, direction=direction))
+        # Right / super like count as a like, which feeds the recommendations
+        if direction in ('right', 'up'):
+            up = UserPlate.query.filter_by(user_id=user_id, plate_id=plate_id).first()
+            if not (up and up.liked):
+                record_like_change(plate, True)
+            if up:
+                up.liked = True
+            else:
+                db.session.add(UserPlate(user_id=user_id, plate_id=plate_id, liked=True))
+                add_to_unrated_inbox(user_id, plate_id)
+        db.session.commit()
+        consume_from_decks(user_id, plate_id)
     return jsonify({'status':'ok'})
 
 # ------------------ User Plates ------------------
@@ -790,32 +2470,9 @@ def my_plates():
         return redirect(url_for('login'))
 
     user_id = session['user_id']
+    plates, next_cursor = get_unrated_plates_for_user(user_id, cursor=request.args.get('cursor', type=int))
 
-    # Get unrated UserPlate entries with eager-loaded Plate + Restaurant + Category
-    user_plates = (
-        UserPlate.query
-        .filter(UserPlate.user_id == user_id)
-        .join(UserPlate.plate)
-        .options(
-            db.joinedload(UserPlate.plate).joinedload(Plate.restaurant),
-            db.joinedload(UserPlate.plate).joinedload(Plate.category)
-        )
-        .all()
-    )
-
-    plates = []
-    for up in user_plates:
-        # Only include unrated or unrated=0
-        if up.rated is None or up.rated == 0:
-            plate = up.plate
-            # Set avg_rating to None for unrated
-            plate.avg_rating = None
-            # Include like/favorite info
-            plate.user_liked = up.liked
-            plate.user_favorited = up.favorite
-            plates.append(plate)
-
-    return render_template('my_plates.html', plates=plates)
+    return render_template('my_plates.html', plates=plates, next_cursor=next_cursor)
 
 @app.route('/favorites')
 @csrf.exempt
@@ -824,8 +2481,10 @@ def favorites():
         flash("Login required", "error")
         return redirect(url_for('login'))
     user_id = session['user_id']
-    favs = Plate.query.join(UserPlate, (UserPlate.plate_id == Plate.id) & (UserPlate.user_id == user_id)).filter(UserPlate.favorite == True).all()
-    return render_template('favorites.html', plates=favs)
+    favs = plate_card_query().join(
+        UserPlate, (UserPlate.plate_id == Plate.id) & (UserPlate.user_id == user_id)
+    ).filter(UserPlate.favorite == True)
+    return render_template('favorites.html', plates=load_plate_cards(favs))
 
 @app.route("/unrated_plates")
 @csrf.exempt
@@ -835,28 +2494,9 @@ def unrated_plates():
         return redirect(url_for('login'))
 
     user_id = session['user_id']
+    plates, next_cursor = get_unrated_plates_for_user(user_id, cursor=request.args.get('cursor', type=int))
 
-    # Fetch UserPlate entries that are unrated (None or 0)
-    unrated_entries = (
-        UserPlate.query
-        .filter(UserPlate.user_id == user_id, or_(UserPlate.rated.is_(None), UserPlate.rated == 0))
-        .join(UserPlate.plate)
-        .options(
-            db.joinedload(UserPlate.plate).joinedload(Plate.restaurant),
-            db.joinedload(UserPlate.plate).joinedload(Plate.category)
-        )
-        .all()
-    )
-
-    plates = []
-    for up in unrated_entries:
-        plate = up.plate
-        plate.avg_rating = None  # unrated
-        plate.user_liked = up.liked
-        plate.user_favorited = up.favorite
-        plates.append(plate)
-
-    return render_template("unrated_plates.html", plates=plates)
+    return render_template("unrated_plates.html", plates=plates, next_cursor=next_cursor)
 
 @app.route("/rate_plate/<int:plate_id>", methods=["GET", "POST"])
 @csrf.exempt
@@ -881,9 +2521,14 @@ def rate_plate(plate_id):
         rating = int(request.form["rating"])
         description = request.form.get("description", "").strip()
 
+        record_rating_change(plate, user_plate.rated, rating)
+        avg_rating = _average_rating(plate.ratings_total, plate.ratings_count)
         user_plate.rated = rating
         user_plate.description = description
+        if rating:
+            remove_from_unrated_inbox(user_id, plate_id)
         db.session.commit()
+        publish_plate_update(plate_id, avg_rating=avg_rating)
 
         return redirect(url_for("unrated_plates"))
 
@@ -898,8 +2543,8 @@ def geocode_reverse():
         return jsonify({'success': False, 'error': 'Missing lat/lon'})
 
     try:
-        url = f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lon}&addressdetails=1"
-        r = requests.get(url, headers={'User-Agent':'plater8te-app/1.0'}, timeout=6).json()
+        url = f"{NOMINATIM_BASE_URL}/reverse?format=json&lat={lat}&lon={lon}&addressdetails=1"
+        r = http_get_json('nominatim', url, headers={'User-Agent':'plater8te-app/1.0'})
         addr = r.get('address', {})
         return jsonify({
             'success': True,
@@ -932,11 +2577,13 @@ def toggle_like(plate_id):
         # Create a new UserPlate with liked=True
         up = UserPlate(user_id=user_id, plate_id=plate_id, liked=True)
         db.session.add(up)
+        add_to_unrated_inbox(user_id, plate_id)
 
+    record_like_change(plate, up.liked)
+    like_count = plate.likes_total
     db.session.commit()
 
-    # Count total likes for this plate
-    like_count = UserPlate.query.filter_by(plate_id=plate_id, liked=True).count()
+    publish_plate_update(plate_id, like_count=like_count)
 
     return jsonify({
         "liked": up.liked,
@@ -964,6 +2611,7 @@ def toggle_favorite(plate_id):
         # Create a new UserPlate with favorite=True
         up = UserPlate(user_id=user_id, plate_id=plate_id, favorite=True)
         db.session.add(up)
+        add_to_unrated_inbox(user_id, plate_id)
 
     db.session.commit()
 
@@ -988,16 +2636,543 @@ def add_comment(plate_id):
 
     comment = Comment(user_id=user_id, plate_id=plate_id, text=text)
     db.session.add(comment)
+    increment_plate_counters(plate, comments_total=Plate.comments_total + 1)
+    bump_trending(plate, 'comment')
+    comment_count = plate.comments_total
     db.session.commit()
 
-    return jsonify({
+    payload = {
         "id": comment.id,
         "username": session.get("username"),
         "text": comment.text,
         "created_at": comment.created_at.strftime("%Y-%m-%d %H:%M")
+    }
+    publish_plate_update(plate_id, comment_count=comment_count, comment=payload)
+    return jsonify(payload)
+
+
+# ------------------ Live Updates ------------------
+def publish_plate_update(plate_id, **event):
+    """Tell open feeds about a committed change; never fails the request that made it."""
+    try:
+        live_updates.publish(plate_id, **event)
+    except Exception:
+        APP_ERRORS.labels('live_publish').inc()
+        logger.warning("could not publish live update for plate %s", plate_id, exc_info=True)
+
+
+def live_cursor():
+    """Log position to render into a feed page, so its stream starts from the moment it was built."""
+    try:
+        return live_updates.log.latest_id()
+    except Exception:
+        logger.warning("could not read live event log", exc_info=True)
+        return None
+
+
+@app.route('/live/plates')
+@csrf.exempt
+def live_plates():
+    """
+    Server-Sent Events for ?ids=1,2,3 (at most LIVE_MAX_PLATES): one `plates` event per
+    LIVE_INTERVAL_SECONDS at most, carrying a list of {plate_id, like_count?,
+    avg_rating?, comment_count?, comments?} deltas. Resumes after Last-Event-ID
+    (or ?since=, as rendered into the page) while those events are still kept.
+    """
+    try:
+        plate_ids = {int(i) for i in request.args.get('ids', '').split(',') if i.strip()}
+    except ValueError:
+        return jsonify({'error': 'ids must be a comma-separated list of plate ids'}), 400
+    if not plate_ids or len(plate_ids) > LIVE_MAX_PLATES:
+        return jsonify({'error': f'between 1 and {LIVE_MAX_PLATES} plate ids are required'}), 400
+    since = live_updates.log.parse_id(request.headers.get('Last-Event-ID') or request.args.get('since'))
+
+    def events():
+        # Subscribed only once the body is actually streamed: a client gone before the
+        # first chunk never starts the generator, and so could never run its finally
+        sub = None
+        LIVE_STREAMS.inc()
+        try:
+            sub = live_updates.subscribe(plate_ids, since=since)
+            yield f"retry: {int(LIVE_INTERVAL_SECONDS * 2000)}\n\n"
+            deadline = time.monotonic() + LIVE_MAX_SECONDS
+            while time.monotonic() < deadline:
+                batch = sub.next(timeout=min(LIVE_HEARTBEAT_SECONDS, max(0.0, deadline - time.monotonic())))
+                if batch is None:
+                    yield ": ping\n\n"  # keeps proxies from timing out the connection
+                    continue
+                event_id, deltas = batch
+                yield f"id: {event_id}\nevent: plates\ndata: {dumps(deltas).decode()}\n\n"
+        finally:
+            LIVE_STREAMS.dec()
+            if sub is not None:
+                live_updates.unsubscribe(sub)
+
+    response = app.response_class(hold_slot_while_streaming(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx: don't buffer the stream
+    return response
+
+
+
+
+# ------------------ Synthetic Data ------------------
+@app.cli.command('seed-synthetic')
+@click.option('--plates', default=10_000, show_default=True, help='Plates to generate (10k - 1M).')
+@click.option('--users', type=int, help='Users to generate [default: plates / 10].')
+@click.option('--restaurants', type=int, help='Restaurants to generate [default: plates / 20].')
+@click.option('--per-user', default=20, show_default=True, help='Average UserPlate rows per user.')
+@click.option('--comments', type=int, help='Comments to generate [default: plates / 3].')
+@click.option('--password', default='password', show_default=True, help='Password shared by every generated user.')
+@click.option('--seed', default=42, show_default=True, help='Random seed; same seed, same data.')
+@click.option('--chunk-size', default=5000, show_default=True, help='Rows per INSERT batch.')
+def seed_synthetic_command(plates, users, restaurants, per_user, comments, password, seed, chunk_size):
+    """Fill the database with realistic synthetic data for benchmarks and load tests."""
+    import random
+    import synthetic
+
+    rng = random.Random(seed)
+    users = users or max(10, plates // 10)
+    restaurants = restaurants or max(10, plates // 20)
+    comments = comments if comments is not None else plates // 3
+
+    db.create_all()
+    seed_default_categories()
+    seed_chain_keywords()
+    category_ids = [c for (c,) in db.session.query(Category.id)]
+
+    def next_id(model):
+        return (db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+
+    def load(model, rows):
+        inserted = 0
+        for batch in synthetic.chunked(rows, chunk_size):
+            db.session.execute(insert(model), batch)
+            db.session.commit()
+            inserted += len(batch)
+        click.echo(f"  {model.__tablename__}: {inserted:,}")
+        return inserted
+
+    click.echo("Generating synthetic data...")
+    start = next_id(User)
+    load(User, synthetic.user_rows(users, generate_password_hash(password), start_id=start))
+    user_ids = list(range(start, start + users))
+
+    start = next_id(Restaurant)
+    load(Restaurant, synthetic.restaurant_rows(rng, restaurants, start_id=start))
+    restaurant_ids = list(range(start, start + restaurants))
+
+    start = next_id(Plate)
+    load(Plate, synthetic.plate_rows(rng, plates, user_ids, restaurant_ids, category_ids, start_id=start))
+    plate_ids = list(range(start, start + plates))
+    # Popularity shouldn't line up with age
+    rng.shuffle(plate_ids)
+
+    load(UserPlate, synthetic.user_plate_rows(rng, user_ids, plate_ids, per_user, start_id=next_id(UserPlate)))
+    load(Comment, synthetic.comment_rows(rng, comments, user_ids, plate_ids, start_id=next_id(Comment)))
+
+    click.echo("Building derived data...")
+    added, _ = reconcile_unrated_inboxes()
+    click.echo(f"  unrated inbox: {added:,}")
+    create_search_index()
+    index_plates_for_search()
+    db.session.commit()
+    click.echo(f"  rankings: {refresh_rankings():,}")
+    click.echo(f"  chains: {classify_restaurants()[0]:,}")
+    click.echo(f"Done. Log in as user{user_ids[0]}@example.com / {password}")
+
+
+# ------------------ Bulk Export ------------------
+# dataset -> (output column -> SQL column, joins, watermark timestamp, id).
+# Rows stream in (timestamp, id) order, so the last row exported is the watermark
+# for the next incremental run (--since / --after-id). Ratings use updated_at so
+# re-rated rows come through again; restaurants have no timestamp and go by id.
+EXPORT_DATASETS = {
+    'plates': ({
+        'id': Plate.id, 'name': Plate.name, 'description': Plate.description,
+        'image_url': Plate.image_url, 'created_at': Plate.created_at, 'user_id': Plate.user_id,
+        'category_id': Plate.category_id, 'category': Category.name,
+        'restaurant_id': Plate.restaurant_id, 'restaurant_name': Restaurant.name,
+        'restaurant_address': Restaurant.address, 'restaurant_latitude': Restaurant.latitude,
+        'restaurant_longitude': Restaurant.longitude,
+        'ratings_count': Plate.ratings_count, 'ratings_total': Plate.ratings_total,
+        'likes_total': Plate.likes_total, 'comments_total': Plate.comments_total,
+    }, lambda stmt: stmt.outerjoin(Restaurant, Restaurant.id == Plate.restaurant_id)
+                        .outerjoin(Category, Category.id == Plate.category_id),
+        Plate.created_at, Plate.id),
+    'ratings': ({
+        'id': UserPlate.id, 'user_id': UserPlate.user_id, 'plate_id': UserPlate.plate_id,
+        'rated': UserPlate.rated, 'liked': UserPlate.liked, 'favorite': UserPlate.favorite,
+        'updated_at': UserPlate.updated_at,
+    }, None, UserPlate.updated_at, UserPlate.id),
+    'comments': ({
+        'id': Comment.id, 'plate_id': Comment.plate_id, 'user_id': Comment.user_id,
+        'text': Comment.text, 'created_at': Comment.created_at,
+    }, None, Comment.created_at, Comment.id),
+    'restaurants': ({
+        'id': Restaurant.id, 'name': Restaurant.name, 'address': Restaurant.address,
+        'latitude': Restaurant.latitude, 'longitude': Restaurant.longitude, 'website': Restaurant.website,
+    }, None, None, Restaurant.id),
+}
+EXPORT_BATCH_SIZE = 2000
+
+def export_rows(dataset, since=None, after_id=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    (column names, row iterator) for one dataset, read batch_size rows at a time
+    (server-side cursor where the driver has one). since/after_id select rows after
+    a previous export's last (timestamp, id); since alone means timestamp >= since.
+    """
+    columns, join, ts_col, id_col = EXPORT_DATASETS[dataset]
+    stmt = db.select(*(column.label(name) for name, column in columns.items())).select_from(id_col.class_)
+    if join:
+        stmt = join(stmt)
+    if since is not None:
+        if ts_col is None:
+            raise ValueError(f"{dataset} has no timestamp; use after_id")
+        if after_id is not None:
+            stmt = stmt.where(or_(ts_col > since, and_(ts_col == since, id_col > after_id)))
+        else:
+            stmt = stmt.where(ts_col >= since)
+    elif after_id is not None:
+        stmt = stmt.where(id_col > after_id)
+    order = (id_col,) if ts_col is None else (ts_col, id_col)
+    stmt = stmt.order_by(*order).execution_options(yield_per=batch_size)
+    return list(columns), db.session.execute(stmt)
+
+def export_watermark(dataset, row):
+    """(timestamp, id) of an exported row, to pass back as since / after_id."""
+    columns, _, ts_col, id_col = EXPORT_DATASETS[dataset]
+    names = list(columns)
+    ts = row[names.index(ts_col.key)] if ts_col is not None else None
+    return ts, row[names.index(id_col.key)]
+
+@app.cli.command('export')
+@click.argument('dataset', type=click.Choice(list(EXPORT_DATASETS)))
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_FORMATS)), default='jsonl', show_default=True)
+@click.option('--output', '-o', default='-', show_default=True, help='File to write; - for stdout.')
+@click.option('--gzip', 'compress', is_flag=True, help='gzip the output (implied by a .gz --output).')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f']),
+              help='Only rows whose timestamp is at or after this.')
+@click.option('--after-id', type=int, help='With --since: rows after (since, id). Alone: ids above this.')
+@click.option('--batch-size', default=EXPORT_BATCH_SIZE, show_default=True, help='Rows fetched per round trip.')
+def export_command(dataset, fmt, output, compress, since, after_id, batch_size):
+    """Stream a dataset as JSONL or CSV; prints the watermark for the next incremental run."""
+    try:
+        columns, rows = export_rows(dataset, since, after_id, batch_size)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    last = []
+    def tracked():
+        for row in rows:
+            last[:] = [row]
+            yield row
+
+    chunks = encode_rows(tracked(), columns, fmt)
+    if compress or output.endswith('.gz'):
+        chunks = gzip_chunks(chunks)
+    with click.open_file(output, 'wb') as out:
+        for chunk in chunks:
+            out.write(chunk)
+    if last:
+        ts, last_id = export_watermark(dataset, last[0])
+        resume = f"--after-id {last_id}" if ts is None else f"--since {ts.isoformat()} --after-id {last_id}"
+        click.echo(f"Next incremental export: flask export {dataset} {resume}", err=True)
+    else:
+        click.echo("No rows to export.", err=True)
+
+@app.route('/admin/export/<dataset>')
+def admin_export(dataset):
+    """
+    Same as `flask export`, streamed as a download:
+    ?format=jsonl|csv&gzip=1&since=<ISO timestamp>&after_id=<id>
+    """
+    if not is_admin():
+        abort(403)
+    fmt = request.args.get('format', 'jsonl')
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+        abort(404)
+    since = request.args.get('since')
+    try:
+        since = datetime.fromisoformat(since) if since else None
+        columns, rows = export_rows(dataset, since, request.args.get('after_id', type=int))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filename = f"{dataset}.{fmt}"
+    chunks = encode_rows(rows, columns, fmt)
+    mimetype = EXPORT_FORMATS[fmt]
+    if request.args.get('gzip') == '1':
+        chunks, filename, mimetype = gzip_chunks(chunks), filename + '.gz', 'application/gzip'
+    return app.response_class(hold_slot_while_streaming(stream_with_context(chunks)), mimetype=mimetype,
+                              headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+# ------------------ Bulk Import ------------------
+# `flask import` reads CSV/JSONL in chunks of IMPORT_CHUNK_SIZE records, one
+# transaction per chunk: validate, geocode what has no coordinates, dedupe
+# restaurants (same rules as find_duplicate_restaurant, see importer.py), then
+# executemany INSERTs. A checkpoint file after each chunk makes it resumable.
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_REJECTS_SHOWN = 20
+IMPORT_KINDS = ('restaurants', 'plates')
+
+def _restaurants_in_box(min_lat, max_lat, min_lon, max_lon):
+    return db.session.query(Restaurant.id, Restaurant.name, Restaurant.latitude, Restaurant.longitude).filter(
+        Restaurant.latitude.between(min_lat, max_lat),
+        Restaurant.longitude.between(min_lon, max_lon)
+    )
+
+def import_restaurant_matcher():
+    return RestaurantMatcher(_restaurants_in_box, normalize_restaurant_name, restaurant_name_similarity,
+                             haversine, RESTAURANT_DEDUPE_RADIUS_METERS / 1609.34,
+                             RESTAURANT_NAME_MATCH_THRESHOLD)
+
+def _insert_returning_ids(model, rows):
+    if not rows:
+        return []
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return list(db.session.execute(stmt, rows).scalars())
+
+def import_chunk(kind, records, matcher, geocoder, categories, counts, default_user_id=None,
+                 skip_existing=False):
+    """
+    Import one chunk of (record_number, record). Caller commits. Updates `counts`
+    and `categories` (name -> id) in place; returns [(record_number, reason)]
+    for rejected records. skip_existing drops plates already present with the same
+    restaurant, name and owner, for re-running a chunk after an interrupted import.
+    """
+    rejected, parsed = [], []
+    for number, record in records:
+        try:
+            if isinstance(record, RecordError):
+                raise record
+            if kind == 'restaurants':
+                parsed.append((number, None, clean_restaurant(record), None))
+            else:
+                parsed.append((number,) + clean_plate(record))
+        except RecordError as e:
+            rejected.append((number, str(e)))
+
+    restaurants = [r for _, _, r, _ in parsed if r is not None]
+    missing = [r for r in restaurants if r['latitude'] is None and r['address']]
+    if missing and geocoder:
+        found = geocoder.lookup_many([r['address'] for r in missing])
+        for r in missing:
+            if found.get(r['address']):
+                r['latitude'], r['longitude'] = found[r['address']]
+    counts['not_geocoded'] += sum(1 for r in restaurants if r['latitude'] is None)
+    matcher.prime([(r['latitude'], r['longitude']) for r in restaurants if r['latitude'] is not None])
+
+    # Each restaurant resolves to an existing one (possibly from earlier in this import) or a new row
+    new_restaurants, refs = [], []
+    for r in restaurants:
+        ref = matcher.match(r['name'], r['latitude'], r['longitude'], r['address'])
+        if ref is None:
+            ref = matcher.add_pending(r['name'], r['latitude'], r['longitude'], r['address'])
+            new_restaurants.append(r)
+        else:
+            counts['restaurants_matched'] += 1
+        refs.append(ref)
+    chains = chain_matcher()
+    for r in new_restaurants:
+        r['is_chain'] = is_chain_name(r['name'], chains)
+    matcher.settle(_insert_returning_ids(Restaurant, new_restaurants))
+    counts['restaurants_inserted'] += len(new_restaurants)
+    if kind == 'restaurants':
+        return rejected
+
+    # Plates: owner and category checks, then one INSERT for the chunk
+    restaurant_ids = iter(matcher.resolve(ref) for ref in refs)
+    plates = [(number, plate, next(restaurant_ids) if r is not None else None, r, category)
+              for number, plate, r, category in parsed]
+    owners = {plate['user_id'] or default_user_id for _, plate, _, _, _ in plates} - {None}
+    known_users = {uid for (uid,) in db.session.query(User.id).filter(User.id.in_(owners))} if owners else set()
+    existing = set()
+    if skip_existing:
+        rids = {rid for _, _, rid, _, _ in plates if rid is not None}
+        existing = set(db.session.query(Plate.restaurant_id, Plate.name, Plate.user_id)
+                       .filter(Plate.restaurant_id.in_(rids)))
+    new_categories = sorted({c for _, _, _, _, c in plates if c and c not in categories})
+    for name, category_id in zip(new_categories, _insert_returning_ids(Category, [{'name': n} for n in new_categories])):
+        categories[name] = category_id
+
+    prior, now, rows = get_ranking_prior(), datetime.utcnow(), []
+    for number, plate, restaurant_id, r, category in plates:
+        user_id = plate['user_id'] or default_user_id
+        if user_id is not None and user_id not in known_users:
+            rejected.append((number, f"unknown user_id {user_id}"))
+            continue
+        if (restaurant_id, plate['name'], user_id) in existing:
+            counts['plates_skipped'] += 1
+            continue
+        created_at = plate['created_at'] or now
+        rows.append(dict(
+            plate, user_id=user_id, created_at=created_at, restaurant_id=restaurant_id,
+            category_id=categories.get(category),
+            geo_cell=geo_cell_for(r['latitude'], r['longitude']) if r else None,
+            quality_score=bayesian_average(0, 0, prior),
+            trending_score=trending_points('post', created_at),
+        ))
+    plate_ids = _insert_returning_ids(Plate, rows)
+    index_plates_for_search(plate_ids)
+    counts['plates_inserted'] += len(plate_ids)
+    return rejected
+
+@app.cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--kind', type=click.Choice(IMPORT_KINDS), required=True)
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='[default: from the file extension]')
+@click.option('--chunk-size', default=IMPORT_CHUNK_SIZE, show_default=True, help='Records per transaction.')
+@click.option('--user-id', type=int, help='Owner of plates whose record has no user_id.')
+@click.option('--geocode/--no-geocode', default=True, show_default=True,
+              help='Geocode restaurants that have an address but no coordinates.')
+@click.option('--geocode-rate', default=1.0, show_default=True, help='Geocoding calls per second (Nominatim allows 1).')
+@click.option('--geocode-cache', default=os.path.join(app.instance_path, 'geocode_cache.json'), show_default=True)
+@click.option('--checkpoint', help='Progress file [default: PATH.checkpoint.json].')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint and start from the first record.')
+@click.option('--rejects', type=click.Path(dir_okay=False),
+              help='Append rejected records here as CSV (record, reason); otherwise the first few are printed.')
+@click.option('--dry-run', is_flag=True, help='Validate and dedupe, then roll back each chunk.')
+def import_command(path, kind, fmt, chunk_size, user_id, geocode, geocode_rate, geocode_cache,
+                   checkpoint, restart, rejects, dry_run):
+    """Bulk-import restaurants or plates from CSV/JSONL (the `flask export` columns work as-is)."""
+    import csv
+    from itertools import islice
+
+    db.create_all()
+    checkpoint = Checkpoint(checkpoint or path + '.checkpoint.json', path, kind)
+    resumed = not restart and not dry_run and checkpoint.load()
+    if resumed:
+        click.echo(f"Resuming after record {checkpoint.records:,}")
+    counts = defaultdict(int, checkpoint.counts if resumed else {})
+    if geocode:
+        os.makedirs(os.path.dirname(os.path.abspath(geocode_cache)), exist_ok=True)
+    geocoder = Geocoder(geocode_location, geocode_cache, rate=geocode_rate,
+                        executor=upstream_executor()) if geocode else None
+    matcher = import_restaurant_matcher()
+    categories = {name: cid for cid, name in db.session.query(Category.id, Category.name)}
+    known_categories = len(categories)
+
+    records = read_records(path, fmt, skip=checkpoint.records if resumed else 0)
+    done = start = checkpoint.records if resumed else 0
+    started = time.perf_counter()
+    first = True
+    rejects_file = open(rejects, 'a', newline='') if rejects else None
+    rejects_writer = csv.writer(rejects_file) if rejects_file else None
+    shown = 0
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        try:
+            rejected = import_chunk(kind, chunk, matcher, geocoder, categories, counts, default_user_id=user_id,
+                                    skip_existing=resumed and first)
+        except Exception:
+            db.session.rollback()
+            logger.exception("import failed")
+            raise click.ClickException(f"import failed in records {chunk[0][0]}-{chunk[-1][0]}; "
+                                       "fix the cause and re-run to resume from the last checkpoint")
+        first = False
+        if rejects_writer:
+            rejects_writer.writerows(rejected)
+        for number, reason in rejected[:max(0, IMPORT_REJECTS_SHOWN - shown)]:
+            click.echo(f"  record {number}: {reason}", err=True)
+        shown += len(rejected)
+        counts['rejected'] += len(rejected)
+        done = chunk[-1][0]
+        if dry_run:
+            db.session.rollback()
+            # Nothing was written, so rows "inserted" above must not satisfy later matches
+            matcher = import_restaurant_matcher()
+        else:
+            db.session.commit()
+            checkpoint.save(done, counts)
+            if len(categories) > known_categories:
+                bump_reference_data('categories')
+                known_categories = len(categories)
+        rate = (done - start) / max(time.perf_counter() - started, 1e-9)
+        click.echo(f"{done:,} records ({rate:,.0f}/s)", err=True)
+
+    if rejects_file:
+        rejects_file.close()
+    elif shown > IMPORT_REJECTS_SHOWN:
+        click.echo(f"  ... {shown - IMPORT_REJECTS_SHOWN:,} more rejected; use --rejects FILE for the full list", err=True)
+    if not dry_run:
+        checkpoint.clear()
+    summary = ', '.join(f"{k.replace('_', ' ')} {v:,}" for k, v in sorted(counts.items()) if v)
+    click.echo(f"{'Dry run' if dry_run else 'Imported'}: {summary or 'nothing to do'}"
+               + (f"; {geocoder.calls:,} geocoding calls" if geocoder else ''))
+
+
+# ------------------ Admin: Profiles ------------------
+@app.route('/admin/profiles')
+def admin_profiles():
+    if not is_admin():
+        abort(403)
+    profiles = list_profiles(app.config['PROFILE_DIR'], limit=request.args.get('limit', 100, type=int))
+    if request.args.get('format') == 'json':
+        return jsonify(profiles)
+    return render_template('admin_profiles.html', profiles=profiles)
+
+
+@app.route('/admin/profiles/<path:filename>')
+def admin_profile_file(filename):
+    if not is_admin():
+        abort(403)
+    return send_from_directory(app.config['PROFILE_DIR'], filename, as_attachment=True)
+
+
+@app.route('/admin/cache')
+def admin_cache():
+    if not is_admin():
+        abort(403)
+    return jsonify({
+        'url': re.sub(r'//[^/@]*@', '//', app.config['CACHE_URL']),  # without credentials
+        'caches': [c.stats() for c in _caches.values()],
     })
 
 
+# ------------------ Process Lifecycle ------------------
+def warm_up():
+    """
+    Do the one-off work every worker would otherwise repeat: import the lazily loaded
+    modules, configure the ORM mappers, compile every template, load the reference
+    data and build the autocomplete index. Called in the gunicorn master under WEB_PRELOAD=1 so workers inherit it all
+    copy-on-write.
+    """
+    import PIL.Image  # noqa: F401
+    import requests  # noqa: F401
+
+    db.configure_mappers()
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    warm_reference_data()
+    warm_autocomplete_index()
+
+def warm_reference_data():
+    with app.app_context():
+        try:
+            for name in _reference_loaders:
+                reference_data(name)
+        except SQLAlchemyError:
+            # e.g. before the first migration; it's loaded on first use instead
+            logger.warning("could not preload reference data", exc_info=True)
+
+def warm_autocomplete_index():
+    with app.app_context():
+        try:
+            get_autocomplete_index()
+        except SQLAlchemyError:
+            logger.warning("could not preload the autocomplete index", exc_info=True)
+
+def _reset_after_fork():
+    # A forked worker must not reuse the parent's DB connections or HTTP pool / executor threads
+    _upstream.clear()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+os.register_at_fork(after_in_child=_reset_after_fork)
 
 
 # ------------------ App Startup ------------------
@@ -1005,4 +3180,5 @@ if __name__ == '__main__':
     with app.app_context():
         db.create_all()
         seed_default_categories()
+        seed_chain_keywords()
     app.run(debug=True)
\ No newline at end of file
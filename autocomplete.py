@@ -0,0 +1,196 @@
+"""
+In-memory typeahead index for restaurant, plate and category names.
+
+Names are normalized and stored in one sorted array, once per word start
+("Joe's Pizza" -> "joes pizza", "pizza"), so a prefix lookup is a bisect plus
+a short scan. Inserts keep the array sorted, which makes incremental updates
+cheap enough to do on every write.
+
+Entries with coordinates are also keyed into a sorted array per grid cell
+(GEO_CELL_DEGREES on a side). A search with lat/lon scans the whole prefix
+range of the cells around the point, so nearby matches are always candidates
+even when the global scan stops alphabetically short of them.
+"""
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+from math import cos, floor, radians, sqrt
+
+# About 14 miles north-south; the 3x3 block around a point covers at least that radius
+GEO_CELL_DEGREES = 0.2
+
+
+def normalize(text):
+    """Lowercase, strip accents and punctuation: "Café Olé!" -> "cafe ole"."""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    text = re.sub(r"['`]", '', text.lower())
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text).split())
+
+
+def approx_miles(lat1, lon1, lat2, lon2):
+    """Equirectangular distance; plenty for ranking within a city and much cheaper than haversine."""
+    x = (lon2 - lon1) * cos(radians((lat1 + lat2) / 2))
+    y = lat2 - lat1
+    return 69.0 * sqrt(x * x + y * y)
+
+
+class Entry:
+    __slots__ = ('kind', 'item_id', 'name', 'norm', 'lat', 'lon', 'payload')
+
+    def __init__(self, kind, item_id, name, norm, lat=None, lon=None, payload=None):
+        self.kind = kind
+        self.item_id = item_id
+        self.name = name
+        self.norm = norm
+        self.lat = lat
+        self.lon = lon
+        self.payload = payload
+
+    def to_dict(self, distance=None):
+        data = {'id': self.item_id, 'name': self.name}
+        if self.payload:
+            data.update(self.payload)
+        if distance is not None:
+            data['distance_miles'] = round(distance, 2)
+        return data
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._keys = []      # sorted [(normalized suffix, seq)]
+        self._cells = {}     # (row, col) -> sorted [(normalized suffix, seq)] of entries in that cell
+        self._entries = {}   # seq -> Entry
+        self._seq_by_item = {}  # (kind, item_id) -> seq
+        self._next_seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _word_starts(norm):
+        words = norm.split()
+        return [' '.join(words[i:]) for i in range(len(words))]
+
+    @staticmethod
+    def _cell(lat, lon):
+        if lat is None or lon is None:
+            return None
+        return floor(lat / GEO_CELL_DEGREES), floor(lon / GEO_CELL_DEGREES)
+
+    def add(self, kind, item_id, name, lat=None, lon=None, payload=None):
+        """Insert or replace the entry for (kind, item_id)."""
+        norm = normalize(name)
+        if not norm:
+            return
+        with self._lock:
+            self._remove_locked(kind, item_id)
+            seq = self._next_seq
+            self._next_seq += 1
+            self._entries[seq] = Entry(kind, item_id, name, norm, lat, lon, payload)
+            self._seq_by_item[(kind, item_id)] = seq
+            cell = self._cell(lat, lon)
+            for key in self._word_starts(norm):
+                bisect.insort(self._keys, (key, seq))
+                if cell is not None:
+                    bisect.insort(self._cells.setdefault(cell, []), (key, seq))
+
+    def bulk_load(self, rows):
+        """Replace the whole index from (kind, item_id, name, lat, lon, payload) tuples in one sort."""
+        entries, seq_by_item, keys, cells = {}, {}, [], {}
+        seq = 0
+        for kind, item_id, name, lat, lon, payload in rows:
+            norm = normalize(name)
+            if not norm:
+                continue
+            entries[seq] = Entry(kind, item_id, name, norm, lat, lon, payload)
+            seq_by_item[(kind, item_id)] = seq
+            word_keys = [(key, seq) for key in self._word_starts(norm)]
+            keys.extend(word_keys)
+            cell = self._cell(lat, lon)
+            if cell is not None:
+                cells.setdefault(cell, []).extend(word_keys)
+            seq += 1
+        keys.sort()
+        for cell_keys in cells.values():
+            cell_keys.sort()
+        with self._lock:
+            self._keys, self._cells = keys, cells
+            self._entries, self._seq_by_item, self._next_seq = entries, seq_by_item, seq
+
+    def remove(self, kind, item_id):
+        with self._lock:
+            self._remove_locked(kind, item_id)
+
+    def _remove_locked(self, kind, item_id):
+        seq = self._seq_by_item.pop((kind, item_id), None)
+        if seq is None:
+            return
+        entry = self._entries.pop(seq)
+        cell = self._cell(entry.lat, entry.lon)
+        cell_keys = self._cells.get(cell) if cell is not None else None
+        for key in self._word_starts(entry.norm):
+            for keys in (self._keys, cell_keys):
+                if keys is None:
+                    continue
+                i = bisect.bisect_left(keys, (key, seq))
+                if i < len(keys) and keys[i] == (key, seq):
+                    del keys[i]
+        if cell_keys == []:
+            del self._cells[cell]
+
+    @staticmethod
+    def _prefix_range(keys, norm, scan_limit=None):
+        start = bisect.bisect_left(keys, (norm,))
+        end = bisect.bisect_left(keys, (norm + '\uffff',), lo=start)
+        return keys[start:end if scan_limit is None else min(end, start + scan_limit)]
+
+    def search(self, prefix, kinds=None, lat=None, lon=None, limit=8, scan_limit=1000):
+        """
+        Best `limit` matches per kind for `prefix`, as {kind: [dict, ...]}.
+        Matches at the start of a name beat matches on a later word; with lat/lon,
+        closer entries rank first; shorter names break ties. At most `scan_limit`
+        keys of the global index are examined, which bounds latency for one-letter
+        prefixes; with lat/lon the cells around the point are scanned in full as
+        well (up to `scan_limit` keys each for a one-letter prefix).
+        """
+        norm = normalize(prefix)
+        results = {kind: [] for kind in kinds} if kinds else {}
+        if not norm:
+            return results
+
+        entries = self._entries
+        scans = [self._prefix_range(self._keys, norm, scan_limit)]
+        home = self._cell(lat, lon)
+        if home is not None:
+            cell_limit = scan_limit if len(norm) == 1 else None
+            for d_row in (-1, 0, 1):
+                for d_col in (-1, 0, 1):
+                    cell_keys = self._cells.get((home[0] + d_row, home[1] + d_col))
+                    if cell_keys:
+                        scans.append(self._prefix_range(cell_keys, norm, cell_limit))
+        candidates = {}
+        for key, seq in (item for scan in scans for item in scan):
+            entry = entries.get(seq)
+            if entry is None or (kinds and entry.kind not in kinds):
+                continue
+            starts_name = entry.norm == key
+            if starts_name or seq not in candidates:
+                candidates[seq] = (entry, starts_name)
+
+        ranked = {}
+        for entry, starts_name in candidates.values():
+            distance = None
+            if lat is not None and lon is not None and entry.lat is not None and entry.lon is not None:
+                distance = approx_miles(lat, lon, entry.lat, entry.lon)
+            score = (0 if starts_name else 1, distance if distance is not None else float('inf'), len(entry.name))
+            ranked.setdefault(entry.kind, []).append((score, entry.item_id, entry, distance))
+
+        for kind, scored in ranked.items():
+            best = heapq.nsmallest(limit, scored, key=lambda t: (t[0], t[1]))
+            results[kind] = [entry.to_dict(distance) for _, _, entry, distance in best]
+        return results
@@ -0,0 +1,104 @@
+"""
+Latency benchmark for the /autocomplete prefix index.
+
+    python benchmarks/bench_autocomplete.py [--restaurants 100000] [--queries 20000]
+
+Builds a PrefixIndex with synthetic restaurants clustered around a few cities
+(plus plates and the default categories), then times random 1-6 character
+prefixes taken from real names, with and without a location bias. Exits
+non-zero if p99 is over the budget.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autocomplete import PrefixIndex  # noqa: E402
+
+CITIES = [(40.7128, -74.0060), (34.0522, -118.2437), (41.8781, -87.6298),
+          (29.7604, -95.3698), (47.6062, -122.3321), (25.7617, -80.1918)]
+FIRST = ["Joe's", "Mama", "Golden", "Little", "Blue", "Lucky", "Royal", "Happy", "Old Town",
+         "Sunset", "Casa", "El", "La", "Le", "Big", "Green", "Red", "Silver", "Urban", "Corner"]
+SECOND = ["Dragon", "Olive", "Taco", "Noodle", "Burger", "Pizza", "Sushi", "Curry", "Bistro",
+          "Garden", "Grill", "Kitchen", "Diner", "Cantina", "Trattoria", "Bakery", "Pho", "BBQ",
+          "Ramen", "Deli", "Smokehouse", "Tavern", "Brasserie", "Creperie", "Dumpling"]
+THIRD = ["House", "Bar", "Cafe", "Co", "Express", "Spot", "Place", "Shack", "Room", ""]
+DISHES = ["Spicy Tuna Roll", "Margherita Pizza", "Carnitas Taco", "Pad Thai", "Chicken Tikka",
+          "Cheeseburger", "Pho Bo", "Tonkotsu Ramen", "Falafel Wrap", "Brisket Plate",
+          "Pancake Stack", "Caesar Salad", "Lobster Roll", "Fish Tacos", "Beef Bulgogi"]
+CATEGORIES = ["Mexican", "Tacos", "Italian", "Pizza", "Japanese", "Sushi", "Ramen", "American",
+              "Burgers", "BBQ", "Chinese", "Dumplings", "Indian", "Curry", "Thai", "Dessert"]
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def build_rows(n_restaurants, n_plates, rng):
+    rows = []
+    for i in range(1, n_restaurants + 1):
+        name = " ".join(w for w in (rng.choice(FIRST), rng.choice(SECOND), rng.choice(THIRD)) if w)
+        clat, clon = rng.choice(CITIES)
+        lat, lon = clat + rng.gauss(0, 0.08), clon + rng.gauss(0, 0.08)
+        rows.append(('restaurants', i, f"{name} #{i % 997}", lat, lon,
+                     {'address': f"{i} Main St", 'latitude': lat, 'longitude': lon}))
+    for i in range(1, n_plates + 1):
+        rows.append(('plates', i, rng.choice(DISHES), None, None, None))
+    for i, name in enumerate(CATEGORIES, start=1):
+        rows.append(('categories', i, name, None, None, None))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--restaurants', type=int, default=100_000)
+    parser.add_argument('--plates', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=20_000)
+    parser.add_argument('--inserts', type=int, default=2_000)
+    parser.add_argument('--budget-ms', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows = build_rows(args.restaurants, args.plates, rng)
+
+    index = PrefixIndex()
+    t0 = time.perf_counter()
+    index.bulk_load(rows)
+    print(f"bulk_load: {len(index):,} entries in {time.perf_counter() - t0:.2f}s")
+
+    names = [r[2] for r in rows]
+    timings = []
+    for _ in range(args.queries):
+        name = rng.choice(names)
+        words = name.split()
+        word = rng.choice(words) if rng.random() < 0.3 else words[0]
+        prefix = word[:rng.randint(1, 6)]
+        lat, lon = rng.choice(CITIES) if rng.random() < 0.7 else (None, None)
+        t = time.perf_counter()
+        index.search(prefix, lat=lat, lon=lon, limit=8)
+        timings.append((time.perf_counter() - t) * 1000)
+    timings.sort()
+    p50, p95, p99 = (percentile(timings, p) for p in (50, 95, 99))
+    print(f"search ({args.queries:,} queries): p50={p50:.3f}ms p95={p95:.3f}ms p99={p99:.3f}ms max={timings[-1]:.3f}ms")
+
+    insert_timings = []
+    for i in range(args.inserts):
+        rid = args.restaurants + i + 1
+        t = time.perf_counter()
+        index.add('restaurants', rid, f"{rng.choice(FIRST)} {rng.choice(SECOND)}", 40.7, -74.0)
+        insert_timings.append((time.perf_counter() - t) * 1000)
+    insert_timings.sort()
+    print(f"incremental add ({args.inserts:,}): p50={percentile(insert_timings, 50):.3f}ms "
+          f"p99={percentile(insert_timings, 99):.3f}ms")
+
+    ok = p99 < args.budget_ms
+    print(f"{'PASS' if ok else 'FAIL'}: search p99 {p99:.3f}ms vs budget {args.budget_ms}ms")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
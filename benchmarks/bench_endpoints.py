@@ -0,0 +1,194 @@
+"""
+Latency / query-count / memory benchmark for the hot endpoints.
+
+    python benchmarks/bench_endpoints.py [--plates 10000] [--iterations 50]
+    python benchmarks/bench_endpoints.py --save-baseline      # record benchmarks/endpoints_baseline.json
+    python benchmarks/bench_endpoints.py                      # ...later runs compare against it
+
+Seeds a throwaway SQLite database with `flask seed-synthetic` (or uses
+--database-url as is), logs in as a generated user and drives each endpoint
+through the Flask test client. Reports p50/p95 latency, queries per request
+and peak Python memory per request. With a baseline present, exits non-zero
+if any endpoint got slower than --tolerance or runs more queries.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'endpoints_baseline.json')
+NYC = (40.7128, -74.0060)
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def endpoints(plate_ids, rng):
+    """(name, method, url, form) factories; called once per request so writes don't collide."""
+    lat, lon = NYC
+    counter = iter(range(10 ** 9))
+    return [
+        ('home', lambda: ('GET', '/', None)),
+        ('search_plates', lambda: ('GET', f"/plates?q={rng.choice(['spicy', 'pizza', 'ramen', 'taco'])}", None)),
+        ('unrated_plates', lambda: ('GET', '/unrated_plates', None)),
+        ('favorites', lambda: ('GET', '/favorites', None)),
+        ('get_plates_nearby', lambda: ('GET', f"/get_plates_nearby?lat={lat}&lon={lon}", None)),
+        ('plates_nearby_1000', lambda: ('GET', f"/get_plates_nearby?lat={lat}&lon={lon}&radius_miles=100&count=1000"
+                                               "&fields=id,name,rating,latitude,longitude", None)),
+        ('nearby_restaurants', lambda: ('GET', f"/nearby_restaurants?lat={lat}&lon={lon}", None)),
+        ('toggle_like', lambda: ('POST', f"/plates/{rng.choice(plate_ids)}/like", None)),
+        ('create_plate', lambda: ('POST', '/create_plate', {
+            'name': f"Bench Plate {next(counter)}",
+            'description': 'benchmark',
+            'category_id': '1',
+            'restaurant_name': f"Bench Bistro {rng.randint(1, 50)}",
+            'restaurant_address': '1 Bench St',
+            'restaurant_latitude': str(lat + rng.uniform(-0.05, 0.05)),
+            'restaurant_longitude': str(lon + rng.uniform(-0.05, 0.05)),
+        })),
+    ]
+
+
+def run(client, make_request, iterations, warmup, count_queries):
+    def call():
+        method, url, form = make_request()
+        response = client.open(url, method=method, data=form)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {url} -> {response.status_code}")
+
+    for _ in range(warmup):
+        call()
+
+    timings, queries = [], []
+    for _ in range(iterations):
+        with count_queries() as stats:
+            t = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - t) * 1000)
+        queries.append(stats.count)
+
+    # Separate pass: tracemalloc slows everything down, so it doesn't touch the timings
+    peaks = []
+    tracemalloc.start()
+    for _ in range(min(5, iterations)):
+        tracemalloc.reset_peak()
+        call()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'queries': round(sum(queries) / len(queries), 1),
+        'peak_kb': round(max(peaks) / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            continue
+        for key in ('p50_ms', 'p95_ms'):
+            # Ignore sub-millisecond noise on very fast endpoints
+            if r[key] > b[key] * (1 + tolerance) and r[key] - b[key] > 1.0:
+                regressions.append(f"{name}: {key} {b[key]} -> {r[key]}")
+        if r['queries'] > b['queries']:
+            regressions.append(f"{name}: queries {b['queries']} -> {r['queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help='Benchmark an existing database instead of seeding a fresh one.')
+    parser.add_argument('--plates', type=int, default=10_000)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--only', nargs='*', help='Endpoint names to run.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed fractional slowdown vs baseline.')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    seed_db = not args.database_url
+    if seed_db:
+        args.database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='plater8te-bench-'), 'bench.db')}"
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['GOOGLE_PLACES_API_KEY'] = ''  # nearby_restaurants takes the local-DB branch
+    os.environ.setdefault('SECRET_KEY', 'bench')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    import app as plater8te
+    from sqltrace import count_queries
+
+    flask_app = plater8te.app
+    # Query counts are in the report; per-request N+1 warnings would just bury it
+    logging.getLogger('plater8te.sql').setLevel(logging.ERROR)
+    flask_app.config['WTF_CSRF_ENABLED'] = False
+    flask_app.config['PROFILE_SAMPLE_RATE'] = 0
+
+    if seed_db:
+        t0 = time.perf_counter()
+        result = flask_app.test_cli_runner().invoke(args=['seed-synthetic', '--plates', str(args.plates),
+                                                          '--seed', str(args.seed)])
+        if result.exit_code != 0:
+            raise SystemExit(result.output)
+        print(f"seeded {args.plates:,} plates in {time.perf_counter() - t0:.1f}s ({args.database_url})")
+
+    with flask_app.app_context():
+        plate_ids = [i for (i,) in plater8te.db.session.query(plater8te.Plate.id).limit(5000)]
+        # The most active user makes the per-user pages (favorites, unrated) representative
+        user_id = (
+            plater8te.db.session.query(plater8te.UserPlate.user_id)
+            .group_by(plater8te.UserPlate.user_id)
+            .order_by(plater8te.db.func.count().desc())
+            .limit(1).scalar()
+        )
+        email = plater8te.db.session.get(plater8te.User, user_id).email
+
+    client = flask_app.test_client()
+    login = client.post('/login', data={'email': email, 'password': 'password'})
+    if login.status_code != 302:
+        raise SystemExit(f"could not log in as {email}")
+
+    rng = random.Random(args.seed)
+    results = {}
+    print(f"{'endpoint':<20}{'p50 ms':>10}{'p95 ms':>10}{'queries':>10}{'peak KB':>10}")
+    for name, make_request in endpoints(plate_ids, rng):
+        if args.only and name not in args.only:
+            continue
+        r = results[name] = run(client, make_request, args.iterations, args.warmup, count_queries)
+        print(f"{name:<20}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['queries']:>10}{r['peak_kb']:>10}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'plates': args.plates, 'results': results}, f, indent=2, sort_keys=True)
+        print(f"baseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('plates') != args.plates:
+            print(f"note: baseline was recorded with {baseline.get('plates')} plates")
+        regressions = compare(results, baseline['results'], args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        print('FAIL' if regressions else 'PASS: no regressions vs baseline')
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Feed hydration: full ORM graphs vs slotted PlateCards.
+
+    python benchmarks/bench_feed.py [--plates 10000] [--runs 5] [--limit 0]
+
+Seeds a throwaway SQLite database with `flask seed-synthetic` (or uses
+--database-url as is). Then it loads the home feed for the most active user
+in two ways:
+
+  orm    - Plate objects with restaurant, category, user_plates and
+           comments.user joined-loaded, and avg_rating / like_count / user flags
+           patched on. This is how home() worked before viewmodels.py.
+  cards  - load_plate_cards(plate_card_query()), as home() does now.
+
+Reports median hydration time, peak Python memory (tracemalloc), objects held
+in the session identity map and queries run. --limit N loads only the first N
+plates, like one page of a paginated feed; 0 loads everything.
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def load_orm(plater8te, user_id, limit):
+    db, Plate, Comment = plater8te.db, plater8te.Plate, plater8te.Comment
+    q = Plate.query.options(
+        db.joinedload(Plate.restaurant),
+        db.joinedload(Plate.category),
+        db.joinedload(Plate.user_plates),
+        db.joinedload(Plate.comments).joinedload(Comment.user)
+    ).order_by(Plate.created_at.desc())
+    if limit:
+        # joinedload collections + LIMIT makes SQLAlchemy wrap the query in a subquery
+        q = q.limit(limit)
+    plates = q.all()
+    for plate in plates:
+        ratings = [up.rated for up in plate.user_plates if up.rated is not None]
+        plate.avg_rating = round(sum(ratings) / len(ratings), 1) if ratings else 0
+        plate.like_count = sum(1 for up in plate.user_plates if up.liked)
+        user_up = next((up for up in plate.user_plates if up.user_id == user_id), None)
+        plate.user_liked = user_up.liked if user_up else False
+        plate.user_favorited = user_up.favorite if user_up else False
+        plate.comments = [c for c in plate.comments if c.user]
+    return plates
+
+
+def load_cards(plater8te, user_id, limit):
+    q = plater8te.plate_card_query().order_by(plater8te.Plate.created_at.desc())
+    if limit:
+        q = q.limit(limit)
+    return plater8te.load_plate_cards(q, user_id=user_id, with_comments=True)
+
+
+def measure(plater8te, loader, user_id, limit, runs, count_queries):
+    session = plater8te.db.session
+    timings = []
+    for _ in range(runs):
+        session.remove()
+        with count_queries() as stats:
+            t = time.perf_counter()
+            plates = loader(plater8te, user_id, limit)
+            timings.append((time.perf_counter() - t) * 1000)
+        identity = len(session.identity_map)
+        del plates
+
+    session.remove()
+    tracemalloc.start()
+    plates = loader(plater8te, user_id, limit)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    count = len(plates)
+    del plates
+    session.remove()
+    return {
+        'plates': count,
+        'median_ms': statistics.median(timings),
+        'peak_mb': peak / 1024 / 1024,
+        'identity_map': identity,
+        'queries': stats.count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--database-url', help='Benchmark an existing database instead of seeding a fresh one.')
+    parser.add_argument('--plates', type=int, default=10_000)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    seed_db = not args.database_url
+    if seed_db:
+        args.database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='plater8te-feed-'), 'feed.db')}"
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('SECRET_KEY', 'bench')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    import app as plater8te
+    from sqltrace import count_queries
+
+    flask_app = plater8te.app
+    logging.getLogger('plater8te.sql').setLevel(logging.ERROR)
+
+    if seed_db:
+        t0 = time.perf_counter()
+        result = flask_app.test_cli_runner().invoke(args=['seed-synthetic', '--plates', str(args.plates),
+                                                          '--seed', str(args.seed)])
+        if result.exit_code != 0:
+            raise SystemExit(result.output)
+        print(f"seeded {args.plates:,} plates in {time.perf_counter() - t0:.1f}s ({args.database_url})")
+
+    with flask_app.app_context():
+        db, UserPlate = plater8te.db, plater8te.UserPlate
+        user_id = (
+            db.session.query(UserPlate.user_id)
+            .group_by(UserPlate.user_id)
+            .order_by(db.func.count().desc())
+            .limit(1).scalar()
+        )
+        results = {name: measure(plater8te, loader, user_id, args.limit, args.runs, count_queries)
+                   for name, loader in (('orm', load_orm), ('cards', load_cards))}
+
+    print(f"{'loader':<8}{'plates':>8}{'median ms':>12}{'peak MB':>10}{'identity map':>14}{'queries':>9}")
+    for name, r in results.items():
+        print(f"{name:<8}{r['plates']:>8}{r['median_ms']:>12.1f}{r['peak_mb']:>10.1f}"
+              f"{r['identity_map']:>14}{r['queries']:>9}")
+    orm, cards = results['orm'], results['cards']
+    print(f"cards vs orm: {orm['median_ms'] / cards['median_ms']:.1f}x faster, "
+          f"{orm['peak_mb'] / cards['peak_mb']:.1f}x less peak memory")
+
+
+if __name__ == '__main__':
+    main()
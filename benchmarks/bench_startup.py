@@ -0,0 +1,127 @@
+"""
+Cold-start time and per-worker memory under gunicorn, with and without --preload.
+
+    python benchmarks/bench_startup.py [--workers 4] [--imports 5] [--requests 50]
+
+1. Imports `app` in fresh interpreters --imports times and reports the median.
+2. Starts gunicorn (sync workers, so memory isn't muddied by threads) without and
+   then with WEB_PRELOAD=1, sends --requests requests to warm the workers, and
+   reads /proc/<pid>/smaps_rollup for the master and every worker:
+     RSS - resident pages, shared pages counted in every process
+     PSS - shared pages split between the processes sharing them (sums to real usage)
+     USS - pages private to the process (what killing it would free)
+Linux only (needs /proc).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def smaps(pid):
+    """{'rss': kB, 'pss': kB, 'uss': kB} for one process."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+    }
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def import_times(env, runs):
+    code = "import time; t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True,
+                             capture_output=True, text=True).stdout
+        times.append(float(out.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def measure_gunicorn(env, args, preload):
+    env = dict(env, WEB_PRELOAD='1' if preload else '0')
+    started = time.perf_counter()
+    proc = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', 'app:app', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+        '--bind', f"127.0.0.1:{args.port}", '--workers', str(args.workers),
+        '--worker-class', 'sync', '--threads', '1',
+    ], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{args.port}"
+    try:
+        while True:
+            try:
+                requests.get(url + '/get_plates_nearby', timeout=1)
+                break
+            except requests.RequestException:
+                if time.perf_counter() - started > 60:
+                    raise SystemExit("gunicorn did not come up")
+                time.sleep(0.05)
+        ready = time.perf_counter() - started
+        # Wait until every worker is up, then warm them all
+        while len(children(proc.pid)) < args.workers:
+            time.sleep(0.05)
+        for i in range(args.requests):
+            requests.get(url + '/', timeout=30)
+            requests.get(url + '/get_plates_nearby', params={'lat': 40.71, 'lon': -74.0}, timeout=30)
+        time.sleep(0.5)
+        master = smaps(proc.pid)
+        workers = [smaps(pid) for pid in children(proc.pid)]
+    finally:
+        proc.terminate()
+        proc.wait()
+    return ready, master, workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--imports', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--plates', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=8097)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='plater8te-startup-')
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        SECRET_KEY='startup',
+        GOOGLE_PLACES_API_KEY='',
+        LOG_LEVEL='WARNING',
+        PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, 'metrics'),
+        JINJA_CACHE_DIR=os.path.join(workdir, 'jinja'),
+    )
+    os.makedirs(env['PROMETHEUS_MULTIPROC_DIR'])
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'seed-synthetic', '--plates', str(args.plates)],
+                   cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+
+    print(f"import app: median {import_times(env, args.imports) * 1000:.0f}ms over {args.imports} runs")
+    print(f"\n{'mode':<10}{'ready s':>9}{'master PSS':>12}{'worker RSS':>12}{'worker PSS':>12}"
+          f"{'worker USS':>12}{'total PSS':>12}   (MB, worker figures are averages)")
+    for preload in (False, True):
+        ready, master, workers = measure_gunicorn(env, args, preload)
+        avg = {k: sum(w[k] for w in workers) / len(workers) / 1024 for k in ('rss', 'pss', 'uss')}
+        total_pss = (master['pss'] + sum(w['pss'] for w in workers)) / 1024
+        print(f"{'preload' if preload else 'default':<10}{ready:>9.2f}{master['pss'] / 1024:>12.1f}"
+              f"{avg['rss']:>12.1f}{avg['pss']:>12.1f}{avg['uss']:>12.1f}{total_pss:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
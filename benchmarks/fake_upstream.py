@@ -0,0 +1,181 @@
+"""
+Fake Google Maps / Nominatim server for offline load tests.
+
+    python benchmarks/fake_upstream.py [--port 8099] [--latency-ms 300] [--jitter-ms 100]
+                                       [--error-rate 0.02] [--pages 3] [--fixtures DIR]
+
+Then run the app with
+    GOOGLE_MAPS_BASE_URL=http://127.0.0.1:8099 NOMINATIM_BASE_URL=http://127.0.0.1:8099
+    GOOGLE_PLACES_API_KEY=fake GOOGLE_PAGETOKEN_DELAY_SECONDS=0
+
+Serves the endpoints the app calls: geocode, place nearbysearch (paged with
+next_page_token), place details, and Nominatim search/reverse. Responses are
+replayed from --fixtures (<name>.json, one of geocode, nearbysearch, details,
+nominatim_search, nominatim_reverse; a list of bodies is replayed round-robin)
+or, without a fixture, generated deterministically from the request.
+Every response waits latency +/- jitter; --error-rate of them fail, half as
+HTTP 500 and half as Google's OVER_QUERY_LIMIT.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURE_NAMES = ('geocode', 'nearbysearch', 'details', 'nominatim_search', 'nominatim_reverse')
+NAMES = ["Golden Dragon", "Olive Garden Bistro", "Taco Spot", "Noodle House", "Lucky Burger",
+         "Casa Pizza", "Blue Sushi Bar", "Curry Corner", "Happy Pho", "Smokehouse BBQ",
+         "Subway", "Corner Deli", "Little Ramen Shop", "La Cantina", "Royal Dumpling"]
+
+
+def stable_random(*parts):
+    return random.Random(hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest())
+
+
+class FakeUpstream:
+    def __init__(self, latency_ms, jitter_ms, error_rate, pages, per_page, fixtures=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.pages = pages
+        self.per_page = per_page
+        self.fixtures = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+        for name in FIXTURE_NAMES:
+            path = os.path.join(fixtures, f"{name}.json") if fixtures else None
+            if path and os.path.exists(path):
+                with open(path) as f:
+                    bodies = json.load(f)
+                self.fixtures[name] = itertools.cycle(bodies if isinstance(bodies, list) else [bodies])
+
+    def delay(self):
+        ms = max(0.0, random.gauss(self.latency_ms, self.jitter_ms / 2)) if self.jitter_ms else self.latency_ms
+        time.sleep(ms / 1000)
+
+    def respond(self, path, query):
+        """(http status, body) for one request."""
+        route = {
+            '/maps/api/geocode/json': ('geocode', self.geocode),
+            '/maps/api/place/nearbysearch/json': ('nearbysearch', self.nearbysearch),
+            '/maps/api/place/details/json': ('details', self.details),
+            '/search': ('nominatim_search', self.nominatim_search),
+            '/reverse': ('nominatim_reverse', self.nominatim_reverse),
+        }.get(path)
+        if route is None:
+            return 404, {'error': f"unknown path {path}"}
+        name, handler = route
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+        self.delay()
+        if random.random() < self.error_rate:
+            if random.random() < 0.5:
+                return 500, {'error': 'fake upstream failure'}
+            return 200, {'status': 'OVER_QUERY_LIMIT', 'results': []}
+        if name in self.fixtures:
+            with self._lock:
+                return 200, next(self.fixtures[name])
+        return 200, handler(query)
+
+    def geocode(self, query):
+        rng = stable_random(query.get('address'))
+        return {'status': 'OK', 'results': [{'geometry': {'location': {
+            'lat': 40.7128 + rng.uniform(-0.1, 0.1), 'lng': -74.0060 + rng.uniform(-0.1, 0.1)}}}]}
+
+    def nearbysearch(self, query):
+        token = query.get('pagetoken')
+        if token:
+            location, page = token.rsplit(':', 1)
+            page = int(page)
+        else:
+            location, page = query.get('location', '0,0'), 0
+        lat, lon = (float(v) for v in location.split(','))
+        rng = stable_random(location, page)
+        results = []
+        for i in range(self.per_page):
+            results.append({
+                'name': f"{rng.choice(NAMES)} #{page * self.per_page + i}",
+                'place_id': f"fake-{rng.getrandbits(48):x}",
+                'vicinity': f"{rng.randint(1, 999)} Main St",
+                'geometry': {'location': {'lat': lat + rng.uniform(-0.02, 0.02),
+                                          'lng': lon + rng.uniform(-0.02, 0.02)}},
+            })
+        body = {'status': 'OK', 'results': results}
+        if page + 1 < self.pages:
+            body['next_page_token'] = f"{location}:{page + 1}"
+        return body
+
+    def details(self, query):
+        rng = stable_random(query.get('place_id'))
+        name = rng.choice(NAMES)
+        return {'status': 'OK', 'result': {
+            'name': name,
+            'formatted_address': f"{rng.randint(1, 999)} Main St, New York, NY",
+            'website': f"https://{name.lower().replace(' ', '')}.example.com",
+        }}
+
+    def nominatim_search(self, query):
+        rng = stable_random(query.get('q'))
+        return [{'lat': str(40.7128 + rng.uniform(-0.1, 0.1)), 'lon': str(-74.0060 + rng.uniform(-0.1, 0.1))}]
+
+    def nominatim_reverse(self, query):
+        rng = stable_random(query.get('lat'), query.get('lon'))
+        return {'address': {'road': f"{rng.choice(['Main', 'Oak', 'Elm', 'Pine'])} St",
+                            'city': 'New York', 'state': 'New York'}}
+
+
+def make_handler(upstream):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            status, body = upstream.respond(url.path, query)
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--jitter-ms', type=float, default=100)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--pages', type=int, default=3, help='nearbysearch pages per location')
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--fixtures', help='Directory of recorded responses to replay.')
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(args.latency_ms, args.jitter_ms, args.error_rate,
+                            args.pages, args.per_page, args.fixtures)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(upstream))
+    server.daemon_threads = True
+    print(f"fake upstream on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms}±{args.jitter_ms}ms, errors {args.error_rate:.0%})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"requests served: {upstream.counts}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""
+Offline load test: gunicorn + fake Google/Nominatim + concurrent users.
+
+    python benchmarks/loadtest.py [--users 32] [--duration 30] [--workers 2] [--worker-class gthread]
+                                  [--threads 8] [--upstream-latency-ms 300] [--error-rate 0]
+    python benchmarks/loadtest.py --modes sync:1 gthread:8 gevent:1  # compare worker modes
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000   # drive an already running server
+
+Seeds a throwaway SQLite DB, starts benchmarks/fake_upstream.py and gunicorn
+pointed at it (GOOGLE_MAPS_BASE_URL / NOMINATIM_BASE_URL), then runs --users
+closed-loop clients for --duration seconds over a weighted mix of outbound-heavy
+routes (nearby_restaurants, geocode_reverse, add_restaurant) and DB-bound ones
+(get_plates_nearby, toggle_like). Reports throughput, per-route p50/p95/p99
+and error counts, and how busy the worker slots were.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NYC = (40.7128, -74.0060)
+
+# name -> (weight, needs login, request factory)
+MIX = {
+    'nearby_restaurants': (3, False, lambda rng: ('GET', '/nearby_restaurants', {
+        'params': {'lat': NYC[0] + rng.uniform(-0.05, 0.05), 'lon': NYC[1] + rng.uniform(-0.05, 0.05)}})),
+    'nearby_by_location': (1, False, lambda rng: ('GET', '/nearby_restaurants', {
+        'params': {'location': rng.choice(['10001', 'Brooklyn, NY', 'Queens', '11211'])}})),
+    'geocode_reverse': (2, False, lambda rng: ('GET', '/geocode_reverse', {
+        'params': {'lat': NYC[0] + rng.uniform(-0.05, 0.05), 'lon': NYC[1] + rng.uniform(-0.05, 0.05)}})),
+    'add_restaurant': (1, True, lambda rng: ('POST', '/add_restaurant', {'json': {
+        'name': f"Load Test Cafe {rng.randint(1, 10 ** 6)}", 'address': f"{rng.randint(1, 999)} Main St",
+        'city': 'New York', 'state': 'NY'}})),
+    'get_plates_nearby': (3, False, lambda rng: ('GET', '/get_plates_nearby', {
+        'params': {'lat': NYC[0], 'lon': NYC[1]}})),
+    'toggle_like': (2, True, lambda rng: ('POST', f"/plates/{rng.randint(1, 2000)}/like", {})),
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def wait_for(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise SystemExit(f"{url} did not come up within {timeout}s")
+
+
+def start_stack(args):
+    """Seed a DB, start the fake upstream and gunicorn; returns (base_url, processes)."""
+    workdir = tempfile.mkdtemp(prefix='plater8te-load-')
+    upstream_url = f"http://127.0.0.1:{args.upstream_port}"
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'load.db')}",
+        SECRET_KEY='loadtest',
+        GOOGLE_PLACES_API_KEY='fake',
+        GOOGLE_MAPS_BASE_URL=upstream_url,
+        NOMINATIM_BASE_URL=upstream_url,
+        GOOGLE_PAGETOKEN_DELAY_SECONDS='0',
+        PROMETHEUS_MULTIPROC_DIR=os.path.join(workdir, 'metrics'),
+        LOG_LEVEL='WARNING',
+        FLASK_APP='app.py',
+    )
+    os.makedirs(env['PROMETHEUS_MULTIPROC_DIR'])
+    subprocess.run([sys.executable, '-m', 'flask', 'seed-synthetic', '--plates', str(args.plates)],
+                   cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+
+    procs = [subprocess.Popen([
+        sys.executable, os.path.join(ROOT, 'benchmarks', 'fake_upstream.py'),
+        '--port', str(args.upstream_port), '--latency-ms', str(args.upstream_latency_ms),
+        '--jitter-ms', str(args.upstream_jitter_ms), '--error-rate', str(args.error_rate),
+    ], env=env)]
+    procs.append(subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', 'app:app', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+        '--bind', f"127.0.0.1:{args.port}", '--workers', str(args.workers),
+        '--worker-class', args.worker_class, '--threads', str(args.threads), '--timeout', '60',
+    ], cwd=ROOT, env=env))
+    base_url = f"http://127.0.0.1:{args.port}"
+    wait_for(upstream_url + '/')
+    wait_for(base_url + '/get_plates_nearby')
+    return base_url, procs
+
+
+def user_loop(base_url, user_no, mix, stop_at, results, lock, think_ms):
+    rng = random.Random(user_no)
+    session = requests.Session()
+    logged_in = session.post(f"{base_url}/login", data={
+        'email': f"user{user_no}@example.com", 'password': 'password'}, allow_redirects=False).status_code == 302
+    names = [n for n in mix if logged_in or not MIX[n][1]]
+    weights = [mix[n] for n in names]
+    while time.time() < stop_at:
+        name = rng.choices(names, weights=weights)[0]
+        method, path, kwargs = MIX[name][2](rng)
+        started = time.perf_counter()
+        try:
+            status = session.request(method, base_url + path, timeout=60, **kwargs).status_code
+        except requests.RequestException:
+            status = 'conn'
+        elapsed = time.perf_counter() - started
+        with lock:
+            results.append((name, elapsed, status))
+        if think_ms:
+            time.sleep(rng.uniform(0, 2 * think_ms) / 1000)
+
+
+OUTBOUND_ROUTES = {'nearby_restaurants', 'nearby_by_location', 'geocode_reverse', 'add_restaurant'}
+
+
+def run_load(base_url, mix, args):
+    results, lock = [], threading.Lock()
+    stop_at = time.time() + args.duration
+    threads = [threading.Thread(target=user_loop, args=(base_url, i + 1, mix, stop_at, results, lock,
+                                                        args.think_ms))
+               for i in range(args.users)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, time.perf_counter() - started
+
+
+def report(results, wall, args, worker_class, threads, managed):
+    print(f"\n{len(results):,} requests in {wall:.1f}s = {len(results) / wall:.1f} req/s "
+          f"({args.users} users, {args.workers} x {worker_class} workers x {threads} threads)")
+    print(f"{'route':<22}{'count':>8}{'shed':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name in MIX:
+        rows = [r for r in results if r[0] == name]
+        if not rows:
+            continue
+        timings = sorted(r[1] * 1000 for r in rows)
+        # 503 = turned away by admission control (see admission.py), not a failure
+        shed = sum(1 for r in rows if r[2] == 503)
+        errors = sum(1 for r in rows if r[2] == 'conn' or (r[2] >= 500 and r[2] != 503))
+        print(f"{name:<22}{len(rows):>8}{shed:>8}{errors:>8}{percentile(timings, 50):>10.0f}"
+              f"{percentile(timings, 95):>10.0f}{percentile(timings, 99):>10.0f}")
+
+    if managed:
+        # Closed loop: total time spent inside requests / wall time = average requests in flight.
+        # Near the slot count means the workers were the bottleneck.
+        in_flight = sum(r[1] for r in results) / wall
+        if worker_class in ('sync', 'gthread'):
+            slots = args.workers * threads
+            print(f"average in flight {in_flight:.1f} vs {slots} worker slots "
+                  f"({'saturated' if in_flight >= slots * 0.9 else 'headroom'})")
+        else:
+            print(f"average in flight {in_flight:.1f}")
+
+
+def summarize(results, wall):
+    """(outbound req/s, DB-bound req/s, DB-bound p95 ms) for the --modes comparison."""
+    outbound = [r for r in results if r[0] in OUTBOUND_ROUTES]
+    local = sorted(r[1] * 1000 for r in results if r[0] not in OUTBOUND_ROUTES)
+    return len(outbound) / wall, len(local) / wall, percentile(local, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='Load an already running server instead of starting one.')
+    parser.add_argument('--users', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--think-ms', type=float, default=0)
+    parser.add_argument('--mix', help='Override weights, e.g. "nearby_restaurants=1,toggle_like=5".')
+    parser.add_argument('--plates', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=8098)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--worker-class', default='gthread')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--modes', nargs='*',
+                        help='Compare worker modes in one run, e.g. --modes sync:1 gthread:8 gevent:1')
+    parser.add_argument('--upstream-port', type=int, default=8099)
+    parser.add_argument('--upstream-latency-ms', type=float, default=300)
+    parser.add_argument('--upstream-jitter-ms', type=float, default=100)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    mix = {name: weight for name, (weight, _, _) in MIX.items()}
+    if args.mix:
+        mix = {k: float(v) for k, v in (item.split('=') for item in args.mix.split(','))}
+        unknown = set(mix) - set(MIX)
+        if unknown:
+            raise SystemExit(f"unknown routes in --mix: {', '.join(sorted(unknown))}")
+
+    if args.url:
+        results, wall = run_load(args.url.rstrip('/'), mix, args)
+        report(results, wall, args, args.worker_class, args.threads, managed=False)
+        return
+
+    modes = [m.split(':') for m in args.modes] if args.modes else [(args.worker_class, args.threads)]
+    summaries = []
+    for worker_class, threads in modes:
+        args.worker_class, args.threads = worker_class, int(threads)
+        procs = []
+        try:
+            base_url, procs = start_stack(args)
+            results, wall = run_load(base_url, mix, args)
+        finally:
+            for p in procs:
+                p.terminate()
+            for p in procs:
+                p.wait()
+        report(results, wall, args, args.worker_class, args.threads, managed=True)
+        summaries.append((f"{worker_class} x{threads}",) + summarize(results, wall))
+
+    if len(summaries) > 1:
+        print(f"\n{'mode':<16}{'outbound req/s':>16}{'db req/s':>12}{'db p95 ms':>12}")
+        for label, outbound_rps, local_rps, local_p95 in summaries:
+            print(f"{label:<16}{outbound_rps:>16.1f}{local_rps:>12.1f}{local_p95:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
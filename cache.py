@@ -0,0 +1,399 @@
+"""
+Cache layer shared by the gunicorn workers.
+
+A Cache wraps one backend, chosen by CACHE_URL:
+
+  memory://?max_entries=10000           in-process LRU; each worker has its own
+  sqlite:///path/cache.db?max_entries=  one file shared by every worker on the
+                                        host (WAL, so readers don't block); the
+                                        default, in the app's instance folder so
+                                        two deployments never share one
+  redis://host:6379/0                   Redis, for several hosts (pip install redis);
+                                        eviction is Redis' own maxmemory policy
+
+All backends support TTLs, size-bounded LRU eviction (approximate for SQLite:
+reads never write, access times older than TOUCH_SECONDS are queued and
+written in one batch at most every TOUCH_SECONDS), atomic incr() and delete.
+Namespace version counters are kept apart from the entries, so eviction,
+trim() and clear() never reset one (a reset would let old version numbers,
+and the stale entries under them, come back). On top of that, Cache adds:
+
+  get_or_set(key, factory, ttl)   compute on miss
+  versioned namespaces            keys under a namespace embed its version
+                                  number, and bump_version() moves every
+                                  reader to new keys at once; old entries
+                                  age out through TTL / LRU
+  stats()                         hits / misses / sets / evictions for this
+                                  process, also counted in the Prometheus
+                                  cache_* metrics under the cache's name
+
+Values are pickled, so only point a backend at storage nobody else can write
+to (the SQLite file is created 0600).
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+from metrics import CACHE_EVICTIONS, cache_hit, cache_miss
+
+MISSING = object()
+TOUCH_SECONDS = 10
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+class LocalCache:
+    """Thread-safe in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store `value`; returns how many entries were evicted to make room."""
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key, delta=1, ttl=None):
+        with self._lock:
+            value, expires_at = self._data.get(key, (0, None))
+            if expires_at is not None and expires_at <= time.time():
+                value, expires_at = 0, None
+            value += delta
+            self._data[key] = (value, expires_at if expires_at is not None else (time.time() + ttl if ttl else None))
+            self._data.move_to_end(key)
+            return value
+
+    def get_version(self, key):
+        return self._versions.get(key, 0)
+
+    def bump_version(self, key):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            return self._versions[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    Cross-process cache in a local SQLite file. Counters are stored as plain
+    integers so incr() is a single atomic UPDATE; everything else is pickled.
+    Connections are per thread and per process (safe across fork).
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, trim_every=200):
+        self.path = path
+        self.max_entries = max_entries
+        self.trim_every = trim_every
+        self._local = threading.local()
+        self._sets = 0
+        self._touched = {}
+        self._touched_at = time.time()
+        self._touch_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if not os.path.exists(path):
+            os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value BLOB, expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed_at ON cache (accessed_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_version (key TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # isolation_level=None: autocommit, explicit BEGIN IMMEDIATE where needed
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @staticmethod
+    def _decode(value):
+        return pickle.loads(value) if isinstance(value, bytes) else value
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return MISSING
+        value, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at is not None and expires_at <= now:
+            return MISSING  # removed by the next trim()
+        if now - accessed_at > TOUCH_SECONDS:
+            self._touch(key, now)
+        return self._decode(value)
+
+    def _touch(self, key, now):
+        # Reads don't take the write lock: access times are written in batches
+        with self._touch_lock:
+            self._touched[key] = now
+            if now - self._touched_at <= TOUCH_SECONDS:
+                return
+        self.flush_touches()
+
+    def flush_touches(self):
+        with self._touch_lock:
+            touched, self._touched = self._touched, {}
+            self._touched_at = time.time()
+        if touched:
+            self._connect().executemany(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?", [(at, key) for key, at in touched.items()]
+            )
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        stored = value if type(value) is int else sqlite3.Binary(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, stored, now + ttl if ttl else None, now),
+        )
+        self._sets += 1
+        if self._sets % self.trim_every == 0:
+            return self.trim()
+        return 0
+
+    def delete(self, key):
+        self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def incr(self, key, delta=1, ttl=None):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # An expired or non-integer entry restarts the count
+            conn.execute("DELETE FROM cache WHERE key = ? AND (expires_at <= ? OR typeof(value) != 'integer')",
+                         (key, now))
+            conn.execute(
+                "INSERT INTO cache (key, value, expires_at, accessed_at) VALUES (?, 0, ?, ?) "
+                "ON CONFLICT(key) DO NOTHING",
+                (key, now + ttl if ttl else None, now),
+            )
+            conn.execute("UPDATE cache SET value = value + ?, accessed_at = ? WHERE key = ?", (delta, now, key))
+            (value,) = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def trim(self):
+        """Drop expired entries, then the least recently used ones over max_entries. Returns evictions."""
+        self.flush_touches()
+        conn = self._connect()
+        conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        over = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if over <= 0:
+            return 0
+        conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)", (over,)
+        )
+        return over
+
+    def get_version(self, key):
+        row = self._connect().execute("SELECT version FROM cache_version WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_version(self, key):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO cache_version (key, version) VALUES (?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET version = version + 1",
+                (key,),
+            )
+            (value,) = conn.execute("SELECT version FROM cache_version WHERE key = ?", (key,)).fetchone()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+
+    def clear(self):
+        self._connect().execute("DELETE FROM cache")
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class RedisCache:
+    """
+    Redis backend; TTL and incr map straight onto Redis, eviction is the server's
+    maxmemory-policy. Version counters have no TTL, so a volatile-* policy never
+    evicts them; under allkeys-* one can be, and the next bump then restarts it
+    from the current time in milliseconds rather than from 1, so no number repeats.
+    """
+
+    # INCR, but a counter that didn't exist starts at ARGV[1] instead of 1
+    BUMP_VERSION = (
+        "local v = redis.call('INCR', KEYS[1]) "
+        "if v == 1 then v = tonumber(ARGV[1]) redis.call('SET', KEYS[1], v) end "
+        "return v"
+    )
+
+    def __init__(self, url, prefix='plater8te:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_URL is redis:// but the redis package is not installed (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return MISSING
+        # Counters written by incr() come back as (possibly negative) digit strings;
+        # a pickle always starts with the protocol opcode b'\x80'
+        return int(value) if value.lstrip(b'-').isdigit() else pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        stored = str(value) if type(value) is int else pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self.client.set(self.prefix + key, stored, ex=int(ttl) if ttl else None)
+        return 0
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key, delta=1, ttl=None):
+        value = self.client.incrby(self.prefix + key, delta)
+        if ttl and value == delta:
+            # First increment created the key
+            self.client.expire(self.prefix + key, int(ttl))
+        return value
+
+    def get_version(self, key):
+        value = self.client.get(self.prefix + key)
+        return int(value) if value is not None else 0
+
+    def bump_version(self, key):
+        return self.client.eval(self.BUMP_VERSION, 1, self.prefix + key, int(time.time() * 1000))
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + '*'):
+            if not key.endswith(b':version'):
+                self.client.delete(key)
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(self.prefix + '*'))
+
+
+def backend_from_url(url):
+    """Backend for a CACHE_URL (see module docstring)."""
+    parsed = urlparse(url)
+    options = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+    max_entries = int(options.get('max_entries', DEFAULT_MAX_ENTRIES))
+    if parsed.scheme == 'memory':
+        return LocalCache(max_entries)
+    if parsed.scheme == 'sqlite':
+        # sqlite:///relative/path or sqlite:////absolute/path, as in SQLAlchemy URLs
+        return SQLiteCache(parsed.path[1:] if parsed.path.startswith('/') else parsed.path, max_entries)
+    if parsed.scheme in ('redis', 'rediss', 'unix'):
+        return RedisCache(url)
+    raise ValueError(f"unsupported CACHE_URL scheme {parsed.scheme!r}")
+
+
+def default_cache_url(directory):
+    """SQLite cache in `directory`, which should be per deployment (e.g. app.instance_path)."""
+    return f"sqlite:///{os.path.join(os.path.abspath(directory), 'cache.db')}"
+
+
+class Cache:
+    """Named front end over a backend: key prefixing, stats, get_or_set and versioned namespaces."""
+
+    def __init__(self, backend, name='default'):
+        self.backend = backend
+        self.name = name
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+
+    def _key(self, key):
+        return f"{self.name}:{key}"
+
+    def get(self, key, default=None):
+        value = self.backend.get(self._key(key))
+        if value is MISSING:
+            self._stats['misses'] += 1
+            cache_miss(self.name)
+            return default
+        self._stats['hits'] += 1
+        cache_hit(self.name)
+        return value
+
+    def set(self, key, value, ttl=None):
+        evicted = self.backend.set(self._key(key), value, ttl)
+        self._stats['sets'] += 1
+        if evicted:
+            self._stats['evictions'] += evicted
+            CACHE_EVICTIONS.labels(self.name).inc(evicted)
+
+    def delete(self, key):
+        self.backend.delete(self._key(key))
+
+    def incr(self, key, delta=1, ttl=None):
+        """Atomically add `delta` (across processes for shared backends); returns the new value."""
+        return self.backend.incr(self._key(key), delta, ttl)
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Cached value for `key`, calling factory() and storing its result on a miss."""
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def version(self, namespace):
+        """Current version of `namespace` (0 until the first bump)."""
+        return self.backend.get_version(self._key(f"{namespace}:version"))
+
+    def bump_version(self, namespace):
+        """Invalidate every key under `namespace` at once; returns the new version."""
+        return self.backend.bump_version(self._key(f"{namespace}:version"))
+
+    def versioned_key(self, namespace, key, version=None):
+        return f"{namespace}:v{self.version(namespace) if version is None else version}:{key}"
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        """This process's counters plus the backend's current entry count."""
+        return dict(self._stats, name=self.name, backend=type(self.backend).__name__, entries=len(self.backend))
@@ -0,0 +1,100 @@
+"""
+Database engine profiles and read-replica routing.
+
+engine_options() picks SQLAlchemy engine settings for the database URL:
+
+  * Postgres/MySQL: a sized connection pool (DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE, DB_POOL_TIMEOUT) with pre-ping so connections the server
+    dropped are replaced instead of failing a request.
+  * SQLite: every new connection is switched to WAL with synchronous=NORMAL,
+    a busy timeout and memory-mapped reads (SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_MMAP_SIZE), so writers no longer block readers.
+
+With DATABASE_REPLICA_URL set, the endpoints passed to init_read_replica()
+read from the replica. A browser that just wrote something is pinned to the
+primary for REPLICA_STICKY_SECONDS (via the session cookie, so it holds across
+workers), and anything that flushes goes to the primary regardless.
+"""
+import os
+import sqlite3
+import time
+
+from flask import g, has_app_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+REPLICA_BIND = 'replica'
+_pragmas_installed = False
+
+
+def engine_options(url):
+    """SQLALCHEMY_ENGINE_OPTIONS for `url`, tuned per backend."""
+    if not url:
+        return {}
+    backend = make_url(url).get_backend_name()
+    if backend == 'sqlite':
+        install_sqlite_pragmas()
+        # The driver-level timeout covers the window before the PRAGMA runs
+        return {'connect_args': {'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)) / 1000}}
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        'pool_pre_ping': True,
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))}")
+    cursor.execute(f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}")
+    cursor.close()
+
+
+def install_sqlite_pragmas():
+    global _pragmas_installed
+    if not _pragmas_installed:
+        event.listen(Engine, 'connect', _set_sqlite_pragmas)
+        _pragmas_installed = True
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends reads to the replica while the request allows it."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_app_context() and g.get('_use_replica')
+                and REPLICA_BIND in self._db.engines):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _after_flush(db_session, flush_context):
+    if has_app_context():
+        # Later reads in this request must see what was just written
+        g._use_replica = False
+        g._db_wrote = True
+
+
+def init_read_replica(app, db, endpoints):
+    """Route `endpoints` to the replica bind when DATABASE_REPLICA_URL is configured."""
+    app.config.setdefault('REPLICA_STICKY_SECONDS', 5)
+    if REPLICA_BIND not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+    event.listen(RoutingSession, 'after_flush', _after_flush)
+
+    @app.before_request
+    def _choose_bind():
+        pinned_until = session.get('_db_primary_until', 0)
+        g._use_replica = request.endpoint in endpoints and pinned_until < time.time()
+
+    @app.after_request
+    def _pin_writer_to_primary(response):
+        if g.pop('_db_wrote', False):
+            session['_db_primary_until'] = time.time() + app.config['REPLICA_STICKY_SECONDS']
+        return response
@@ -0,0 +1,79 @@
+"""
+Streaming encoders for bulk exports (`flask export`, /admin/export/<dataset>).
+
+Rows come in as an iterator, typically a SQLAlchemy result read with
+yield_per, and go out as a generator of byte chunks. At most `flush_every`
+encoded rows are buffered, so memory stays flat however large the table is.
+gzip_chunks() compresses the stream as it goes, with no temporary file.
+
+  jsonl - one JSON object per line, keys in column order
+  csv   - header row, then one line per row; None is written as an empty field
+
+Datetimes are written as ISO 8601 in both formats.
+"""
+import csv
+import io
+import zlib
+from datetime import date, datetime
+
+from serializers import dumps
+
+FORMATS = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def jsonl_chunks(rows, columns, flush_every=500):
+    lines = []
+    for row in rows:
+        lines.append(dumps(dict(zip(columns, row))))
+        if len(lines) >= flush_every:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+
+def csv_chunks(rows, columns, flush_every=500):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 1
+    for row in rows:
+        writer.writerow([_csv_value(v) for v in row])
+        pending += 1
+        if pending >= flush_every:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue().encode()
+
+
+def encode_rows(rows, columns, fmt, flush_every=500):
+    """Byte chunks for `rows` (tuples in `columns` order) in `fmt` ('jsonl' or 'csv')."""
+    if fmt == 'jsonl':
+        return jsonl_chunks(rows, columns, flush_every)
+    if fmt == 'csv':
+        return csv_chunks(rows, columns, flush_every)
+    raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+
+
+def gzip_chunks(chunks, level=6):
+    """gzip-compress a stream of byte chunks on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
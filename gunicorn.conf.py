@@ -0,0 +1,76 @@
+"""
+Gunicorn settings, picked up automatically from the working directory
+(`web: gunicorn app:app` in the Procfile).
+"""
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Metrics: each worker writes its samples here and /metrics merges them (see metrics.py).
+# Must be set before the workers import prometheus_client.
+prometheus_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'plater8te-metrics')
+)
+# With preload_app the master imports the app (and so prometheus_client) before on_starting
+os.makedirs(prometheus_dir, exist_ok=True)
+
+# Workers. nearby_restaurants, geocode_reverse and add_restaurant mostly wait on
+# Google/Nominatim, so each worker runs several requests at once:
+#   gthread (default) - WEB_THREADS threads per worker; keep DB_POOL_SIZE + DB_MAX_OVERFLOW >= threads
+#   gevent            - WEB_WORKER_CONNECTIONS greenlets per worker (pip install gevent; psycogreen for Postgres)
+#   sync              - one request per worker, the old behaviour
+# Live feed streams (/live/plates) stay open for minutes. gthread gives each one a thread, so
+# only half of them may stream (admission class 'live'); gevent holds them for a greenlet each
+# and is the better choice once many browsers keep a feed open.
+worker_class = os.getenv('WEB_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 9)))
+threads = int(os.getenv('WEB_THREADS', 8))
+worker_connections = int(os.getenv('WEB_WORKER_CONNECTIONS', 200))
+# Upstream calls time out after 6s and nearby_restaurants can make a few in a row
+timeout = int(os.getenv('WEB_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# WEB_PRELOAD=1 imports the app once in the master and forks workers from it, so code,
+# compiled templates and ORM mappers are shared copy-on-write instead of loaded per worker.
+# Code changes then need a full restart rather than a HUP.
+preload_app = os.getenv('WEB_PRELOAD', '0') == '1'
+
+
+def on_starting(server):
+    # Samples from a previous run would otherwise be merged into this one
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        import app
+        app.warm_up()
+        # Keep the collector from touching (and so un-sharing) everything loaded so far
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if server.cfg.worker_class_str == 'gevent':
+        try:
+            from psycogreen.gevent import patch_psycopg
+        except ImportError:
+            return
+        # Without this psycopg2 blocks the whole worker while a query runs
+        patch_psycopg()
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        # With preload the master already did this (warm_up) and the worker inherited it
+        import app
+        app.warm_reference_data()
+        app.warm_autocomplete_index()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,339 @@
+"""
+Building blocks for `flask import` (bulk restaurant / plate onboarding).
+
+  read_records()      - stream dicts out of a CSV or JSONL file (optionally .gz),
+                        skipping the records a checkpoint says are done
+  clean_restaurant()  - validate / normalize one record into insertable columns;
+  clean_plate()         both raise RecordError with a message for bad rows
+  RestaurantMatcher   - dedupe against existing restaurants without a query per
+                        row: candidates are loaded a grid cell at a time and kept
+                        in memory, and rows inserted by the import are added too
+  Geocoder            - geocode only what's missing: results (including misses)
+                        are cached on disk, identical addresses are looked up
+                        once, and calls are spaced to stay under a rate limit
+  Checkpoint          - progress file rewritten after every committed chunk so
+                        an interrupted import picks up where it stopped
+
+The file format mirrors `flask export` (exporter.py), so an export of one
+instance can be imported into another.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from math import floor
+
+
+class RecordError(ValueError):
+    """A record that can't be imported; the message says why."""
+
+
+def _open_text(path):
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+
+def detect_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'csv' if name.endswith('.csv') else 'jsonl'
+
+
+def read_records(path, fmt=None, skip=0):
+    """Yield (record_number, dict) from a CSV or JSONL file; records <= skip are passed over unparsed."""
+    fmt = fmt or detect_format(path)
+    with _open_text(path) as f:
+        if fmt == 'csv':
+            for number, record in enumerate(csv.DictReader(f), start=1):
+                if number > skip:
+                    yield number, record
+        else:
+            number = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                number += 1
+                if number <= skip:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield number, RecordError(f"invalid JSON: {e}")
+                    continue
+                yield number, record if isinstance(record, dict) else RecordError('not a JSON object')
+
+
+def _text(record, key, max_length=None, required=False):
+    value = record.get(key)
+    value = str(value).strip() if value is not None else ''
+    if required and not value:
+        raise RecordError(f"{key} is required")
+    if max_length and len(value) > max_length:
+        raise RecordError(f"{key} is longer than {max_length} characters")
+    return value or None
+
+
+def _coordinates(record, lat_key, lon_key):
+    lat, lon = record.get(lat_key), record.get(lon_key)
+    if lat in (None, '') and lon in (None, ''):
+        return None, None
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        raise RecordError(f"{lat_key}/{lon_key} must both be numbers")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise RecordError(f"{lat_key}/{lon_key} out of range")
+    return lat, lon
+
+
+def _restaurant(record, prefix=''):
+    address = _text(record, prefix + 'address', 200)
+    # Split address fields (as add_restaurant takes them) are folded into one line
+    parts = [address] + [_text(record, prefix + k) for k in ('city', 'state', 'postcode')]
+    address = ', '.join(p for p in parts if p) or None
+    lat, lon = _coordinates(record, prefix + 'latitude', prefix + 'longitude')
+    return {
+        'name': _text(record, prefix + 'name', 120, required=True),
+        'address': address[:200] if address else None,
+        'latitude': lat,
+        'longitude': lon,
+        'website': _text(record, prefix + 'website', 255),
+    }
+
+
+def clean_restaurant(record):
+    """Restaurant columns from a record with name, address (or city/state), latitude, longitude, website."""
+    return _restaurant(record)
+
+
+def clean_plate(record):
+    """
+    (plate columns, restaurant columns or None, category name or None) from a
+    plates record: name, description, image_url, category, created_at, user_id,
+    and the restaurant as restaurant_name / restaurant_address / restaurant_latitude / ...
+    """
+    created_at = _text(record, 'created_at')
+    if created_at:
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except ValueError:
+            raise RecordError('created_at must be an ISO 8601 timestamp')
+    user_id = record.get('user_id')
+    if user_id in ('', None):
+        user_id = None
+    else:
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            raise RecordError('user_id must be an integer')
+    plate = {
+        'name': _text(record, 'name', required=True),
+        'description': _text(record, 'description'),
+        'image_url': _text(record, 'image_url', 200),
+        'created_at': created_at,
+        'user_id': user_id,
+    }
+    restaurant = _restaurant(record, 'restaurant_') if _text(record, 'restaurant_name') else None
+    return plate, restaurant, _text(record, 'category', 80)
+
+
+class _Pending:
+    """Id of a restaurant queued for insert; filled in by RestaurantMatcher.settle()."""
+    __slots__ = ('id',)
+
+    def __init__(self):
+        self.id = None
+
+
+class RestaurantMatcher:
+    """
+    In-memory duplicate finder over (id, name, lat, lon) rows, scored the same way
+    as find_duplicate_restaurant(). `load_box(min_lat, max_lat, min_lon, max_lon)`
+    fetches existing rows; each grid cell is loaded once, a row of cells per query.
+    Restaurants without coordinates can only match each other, on exact
+    normalized name + address.
+    """
+
+    def __init__(self, load_box, normalize, similarity, distance, radius_miles, threshold):
+        self.load_box = load_box
+        self.normalize = normalize
+        self.similarity = similarity
+        self.distance = distance
+        self.radius_miles = radius_miles
+        self.threshold = threshold
+        # Cells at least twice the match radius (in latitude degrees), so matches stay
+        # inside the 3x3 block even where longitude degrees shrink, up to 60 degrees N/S
+        self.cell_degrees = max(0.01, 2 * radius_miles / 69.0)
+        self.cells = {}
+        self.loaded = set()
+        self.unplaced = {}
+        self.pending = []
+
+    def _cell(self, lat, lon):
+        return floor(lat / self.cell_degrees), floor(lon / self.cell_degrees)
+
+    def _neighbourhood(self, lat, lon):
+        row, col = self._cell(lat, lon)
+        return [(row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+
+    def add(self, restaurant_id, name, lat, lon):
+        self.cells.setdefault(self._cell(lat, lon), []).append((restaurant_id, self.normalize(name), lat, lon))
+
+    def prime(self, points):
+        """Load every cell the (lat, lon) points could match in, one query per row of cells."""
+        missing = {cell for lat, lon in points for cell in self._neighbourhood(lat, lon)} - self.loaded
+        by_row = {}
+        for row, col in missing:
+            by_row.setdefault(row, []).append(col)
+        size = self.cell_degrees
+        for row, cols in by_row.items():
+            cols = sorted(cols)
+            # Contiguous runs of columns become one box each
+            start = prev = cols[0]
+            for col in cols[1:] + [None]:
+                if col is not None and col == prev + 1:
+                    prev = col
+                    continue
+                for restaurant_id, name, lat, lon in self.load_box(row * size, (row + 1) * size,
+                                                                   start * size, (prev + 1) * size):
+                    # Box edges are inclusive; only keep rows whose cell we're loading now
+                    if self._cell(lat, lon) in missing:
+                        self.add(restaurant_id, name, lat, lon)
+                if col is not None:
+                    start = prev = col
+        self.loaded |= missing
+
+    def add_pending(self, name, lat, lon, address=None):
+        """Register a restaurant about to be inserted, so later rows match it; returns its ref."""
+        ref = _Pending()
+        self.pending.append(ref)
+        if lat is None or lon is None:
+            self.unplaced[(self.normalize(name), (address or '').lower())] = ref
+        else:
+            self.add(ref, name, lat, lon)
+        return ref
+
+    def settle(self, ids):
+        """Give the pending restaurants their inserted ids, in add_pending() order."""
+        if len(ids) != len(self.pending):
+            raise ValueError(f"{len(self.pending)} pending restaurants but {len(ids)} ids")
+        for ref, restaurant_id in zip(self.pending, ids):
+            ref.id = restaurant_id
+        self.pending = []
+
+    @staticmethod
+    def resolve(ref):
+        """Restaurant id for a match() / add_pending() result."""
+        return ref.id if isinstance(ref, _Pending) else ref
+
+    def match(self, name, lat, lon, address=None):
+        """
+        Best match for (name, lat, lon) - an id, or a pending ref (see resolve()) - or None.
+        Call prime() for the point first.
+        """
+        if lat is None or lon is None:
+            return self.unplaced.get((self.normalize(name), (address or '').lower()))
+        target = self.normalize(name)
+        best, best_key = None, None
+        for cell in self._neighbourhood(lat, lon):
+            for restaurant_id, other, r_lat, r_lon in self.cells.get(cell, ()):
+                dist = self.distance(lat, lon, r_lat, r_lon)
+                if dist > self.radius_miles:
+                    continue
+                score = self.similarity(target, other)
+                if score < self.threshold:
+                    continue
+                key = (score, -dist)
+                if best_key is None or key > best_key:
+                    best, best_key = restaurant_id, key
+        return best
+
+
+class Geocoder:
+    """
+    Cached, rate-limited wrapper around `geocode(address) -> (lat, lon)`.
+    lookup_many() geocodes each distinct uncached address once, at most
+    `rate` calls per second across all threads of `executor` (or serially).
+    """
+
+    def __init__(self, geocode, cache_path=None, rate=1.0, executor=None):
+        self.geocode = geocode
+        self.cache_path = cache_path
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.executor = executor
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+        self.cache = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                self.cache = {k: tuple(v) if v else None for k, v in json.load(f).items()}
+
+    def _throttled(self, address):
+        with self._lock:
+            wait = self._next_at - time.monotonic()
+            self._next_at = max(self._next_at, time.monotonic()) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+        lat, lon = self.geocode(address)
+        return (lat, lon) if lat is not None and lon is not None else None
+
+    def lookup_many(self, addresses):
+        """{address: (lat, lon) or None} for every address given."""
+        todo = sorted({a for a in addresses if a and a not in self.cache})
+        if todo:
+            mapper = self.executor.map if self.executor else map
+            for address, result in zip(todo, mapper(self._throttled, todo)):
+                self.cache[address] = result
+            self.calls += len(todo)
+            self.save()
+        return {a: self.cache.get(a) for a in addresses if a}
+
+    def save(self):
+        if not self.cache_path:
+            return
+        tmp = self.cache_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.cache, f)
+        os.replace(tmp, self.cache_path)
+
+
+class Checkpoint:
+    """
+    Progress of one import, keyed by source file and kind. `records` is how many
+    input records are committed; counters are carried across resumes.
+    """
+
+    def __init__(self, path, source, kind):
+        self.path = path
+        self.key = {'source': os.path.abspath(source), 'kind': kind}
+        self.records = 0
+        self.counts = {}
+
+    def load(self):
+        """True if a checkpoint for this same source and kind was found."""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            state = json.load(f)
+        if {k: state.get(k) for k in self.key} != self.key:
+            return False
+        self.records = state['records']
+        self.counts = state.get('counts', {})
+        return True
+
+    def save(self, records, counts):
+        self.records, self.counts = records, dict(counts)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(dict(self.key, records=records, counts=self.counts,
+                           updated_at=datetime.utcnow().isoformat()), f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,299 @@
+"""
+Live plate updates for open feeds (/live/plates, Server-Sent Events).
+
+  EventLog      append-only log every worker can read, chosen like CACHE_URL:
+                a table in a local SQLite file (the default; shared by the
+                workers on the host), an in-process list (memory://, a single
+                worker only) or a Redis stream (redis://)
+  Broadcaster   one thread per worker reads the log every `interval` seconds,
+                merges each plate's events into one delta and hands it to the
+                subscriptions watching that plate - so a burst of likes on a
+                popular plate costs each client one message per interval
+  Subscription  one per SSE connection; it holds at most one pending delta per
+                watched plate (counters overwrite, comments are capped), so a
+                slow client costs bounded memory rather than a growing backlog
+
+Events carry absolute values (like_count, avg_rating, comment_count), so
+merging is just overwriting and a dropped or repeated delta is corrected by
+the next one. Comments are appended; clients skip ids they already show.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+from metrics import LIVE_DELTAS
+
+COUNTERS = ('like_count', 'avg_rating', 'comment_count')
+
+
+def merge_delta(target, event, max_comments):
+    """Fold `event` into `target` (both {'plate_id', counters..., 'comments': [...]})."""
+    for key in COUNTERS:
+        if key in event:
+            target[key] = event[key]
+    if event.get('comments'):
+        comments = target.setdefault('comments', [])
+        comments.extend(event['comments'])
+        if len(comments) > max_comments:
+            del comments[:-max_comments]
+            target['comments_truncated'] = True
+    return target
+
+
+class MemoryEventLog:
+    """In-process log; only subscribers in the same worker see the events."""
+
+    def __init__(self, max_events=10_000):
+        self.max_events = max_events
+        self._events = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def append(self, event):
+        with self._lock:
+            self._events.append((self._next_id, time.time(), event))
+            self._next_id += 1
+            if len(self._events) > self.max_events:
+                del self._events[:len(self._events) - self.max_events]
+
+    def latest_id(self):
+        return self._next_id - 1
+
+    def read_after(self, last_id, limit):
+        with self._lock:
+            return [(i, e) for i, _, e in self._events if i > last_id][:limit]
+
+    def trim(self, max_age):
+        cutoff = time.time() - max_age
+        with self._lock:
+            self._events = [item for item in self._events if item[1] >= cutoff]
+
+    @staticmethod
+    def parse_id(value):
+        return int(value) if value and value.isdigit() else None
+
+
+class SQLiteEventLog:
+    """Log table in a local SQLite file; connections are per thread and per process."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if not os.path.exists(path):
+            os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        # AUTOINCREMENT: ids are never reused after trim(), so a client's Last-Event-ID stays meaningful
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS live_event ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, payload TEXT NOT NULL)"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def append(self, event):
+        self._connect().execute("INSERT INTO live_event (created_at, payload) VALUES (?, ?)",
+                                (time.time(), json.dumps(event)))
+
+    def latest_id(self):
+        return self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM live_event").fetchone()[0]
+
+    def read_after(self, last_id, limit):
+        rows = self._connect().execute(
+            "SELECT id, payload FROM live_event WHERE id > ? ORDER BY id LIMIT ?", (last_id, limit)
+        )
+        return [(i, json.loads(payload)) for i, payload in rows]
+
+    def trim(self, max_age):
+        self._connect().execute("DELETE FROM live_event WHERE created_at < ?", (time.time() - max_age,))
+
+    @staticmethod
+    def parse_id(value):
+        return int(value) if value and value.isdigit() else None
+
+
+class RedisEventLog:
+    """Redis stream capped at about `max_events` entries; ids are Redis stream ids."""
+
+    def __init__(self, url, key='plater8te:live', max_events=10_000):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("live updates use redis:// but the redis package is not installed (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.key = key
+        self.max_events = max_events
+
+    def append(self, event):
+        self.client.xadd(self.key, {'data': json.dumps(event)}, maxlen=self.max_events, approximate=True)
+
+    def latest_id(self):
+        last = self.client.xrevrange(self.key, count=1)
+        return last[0][0].decode() if last else '0-0'
+
+    def read_after(self, last_id, limit):
+        streams = self.client.xread({self.key: last_id}, count=limit)
+        if not streams:
+            return []
+        return [(i.decode(), json.loads(fields[b'data'])) for i, fields in streams[0][1]]
+
+    def trim(self, max_age):
+        pass  # capped by MAXLEN on append
+
+    @staticmethod
+    def parse_id(value):
+        head, _, tail = (value or '').partition('-')
+        return value if head.isdigit() and tail.isdigit() else None
+
+
+def event_log_from_url(url):
+    """EventLog for a CACHE_URL-style url: memory://, sqlite:///path or redis://."""
+    parsed = urlparse(url)
+    if parsed.scheme == 'memory':
+        return MemoryEventLog()
+    if parsed.scheme == 'sqlite':
+        return SQLiteEventLog(parsed.path[1:] if parsed.path.startswith('/') else parsed.path)
+    if parsed.scheme in ('redis', 'rediss', 'unix'):
+        return RedisEventLog(url)
+    raise ValueError(f"unsupported live event log scheme {parsed.scheme!r}")
+
+
+class Subscription:
+    """Pending deltas for one connection, keyed by plate; see Broadcaster.subscribe()."""
+
+    def __init__(self, plate_ids, max_comments):
+        self.plate_ids = frozenset(plate_ids)
+        self.max_comments = max_comments
+        self._pending = {}
+        self._last_id = None
+        self._cond = threading.Condition()
+
+    def push(self, event_id, delta):
+        with self._cond:
+            plate_id = delta['plate_id']
+            merge_delta(self._pending.setdefault(plate_id, {'plate_id': plate_id}), delta, self.max_comments)
+            self._last_id = event_id
+            self._cond.notify()
+
+    def next(self, timeout):
+        """(last event id, [delta, ...]) as soon as anything is pending, or None after `timeout` seconds."""
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+            if not self._pending:
+                return None
+            pending, self._pending = self._pending, {}
+            return self._last_id, list(pending.values())
+
+
+class Broadcaster:
+    """Per-worker fan-out from the EventLog to Subscriptions (see module docstring)."""
+
+    def __init__(self, log, interval=1.0, retention=300, max_comments=20, batch=1000, logger=None):
+        self.log = log
+        self.interval = interval
+        self.retention = retention
+        self.max_comments = max_comments
+        self.batch = batch
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._by_plate = defaultdict(set)
+        self._count = 0
+        self._last_id = None
+        self._thread_pid = None
+        self._trimmed_at = 0.0
+
+    def publish(self, plate_id, **event):
+        """Append an event for `plate_id`: counters from COUNTERS and/or comment={...}."""
+        comment = event.pop('comment', None)
+        if comment:
+            event['comments'] = [comment]
+        self.log.append(dict(event, plate_id=plate_id))
+        self._maybe_trim()
+
+    def _maybe_trim(self):
+        # Events only need to outlive a client's reconnect (Last-Event-ID)
+        if time.monotonic() - self._trimmed_at > self.retention:
+            self._trimmed_at = time.monotonic()
+            self.log.trim(self.retention)
+
+    def subscribe(self, plate_ids, since=None):
+        """
+        A Subscription for `plate_ids`. With `since` (a log id, e.g. Last-Event-ID),
+        events after it that are still in the log are queued first.
+        """
+        sub = Subscription(plate_ids, self.max_comments)
+        if since is not None:
+            for event_id, event in self.log.read_after(since, self.batch):
+                if event['plate_id'] in sub.plate_ids:
+                    sub.push(event_id, event)
+        with self._lock:
+            for plate_id in sub.plate_ids:
+                self._by_plate[plate_id].add(sub)
+            # Coming out of idle (or a fresh fork): start from the end of the log as
+            # it is now, so events published before the first tick still arrive
+            if not self._count or self._thread_pid != os.getpid():
+                self._last_id = self.log.latest_id()
+            self._count += 1
+            # The thread doesn't survive fork, so a preloaded worker starts its own
+            if self._thread_pid != os.getpid():
+                self._thread_pid = os.getpid()
+                threading.Thread(target=self._run, name='live-broadcaster', daemon=True).start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for plate_id in sub.plate_ids:
+                subs = self._by_plate.get(plate_id)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._by_plate[plate_id]
+            self._count -= 1
+
+    def __len__(self):
+        return self._count
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.tick()
+            except Exception:
+                if self.logger:
+                    self.logger.exception("live broadcaster tick failed")
+
+    def tick(self):
+        """Read new events and deliver one merged delta per plate to its subscribers."""
+        with self._lock:
+            if not self._count:
+                # Nobody listening: don't read; subscribe() picks the start point
+                self._last_id = None
+                return
+            if self._last_id is None:
+                self._last_id = self.log.latest_id()
+                return
+        events = self.log.read_after(self._last_id, self.batch)
+        if events:
+            self._last_id = events[-1][0]
+            merged = {}
+            for _, event in events:
+                plate_id = event['plate_id']
+                merge_delta(merged.setdefault(plate_id, {'plate_id': plate_id}), event, self.max_comments)
+            with self._lock:
+                targets = [(sub, delta) for plate_id, delta in merged.items()
+                           for sub in self._by_plate.get(plate_id, ())]
+            for sub, delta in targets:
+                sub.push(self._last_id, delta)
+            LIVE_DELTAS.inc(len(targets))
+        self._maybe_trim()
@@ -0,0 +1,147 @@
+"""
+Prometheus metrics for routes, the DB pool, outbound HTTP, image processing and caches.
+
+Under gunicorn every worker is its own process, so metrics are written to
+PROMETHEUS_MULTIPROC_DIR (set up in gunicorn.conf.py) and /metrics merges all
+workers' files at scrape time. Without that env var (flask run, CLI) the
+normal in-process registry is used.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, abort, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess)
+from sqlalchemy import event
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by route',
+    ['route', 'method', 'status'],
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_IN_USE = Gauge(
+    'db_pool_connections_in_use', 'Connections currently checked out of the pool',
+    multiprocess_mode='livesum',
+)
+DB_POOL_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection',
+    buckets=(.0005, .001, .005, .01, .05, .1, .5, 1, 5, 30),
+)
+DB_POOL_CONNECTS = Counter('db_pool_connects_total', 'New DBAPI connections opened')
+UPSTREAM_LATENCY = Histogram(
+    'upstream_request_duration_seconds', 'Outbound HTTP latency by upstream',
+    ['upstream'],
+    buckets=(.05, .1, .25, .5, 1, 2, 4, 6, 10),
+)
+UPSTREAM_ERRORS = Counter(
+    'upstream_request_errors_total', 'Outbound HTTP failures by upstream and kind',
+    ['upstream', 'kind'],
+)
+IMAGE_PROCESSING = Histogram(
+    'image_processing_duration_seconds', 'Uploaded image save + resize time',
+    buckets=(.05, .1, .25, .5, 1, 2, 5, 10),
+)
+CACHE_REQUESTS = Counter('cache_requests_total', 'Cache lookups by cache and result', ['cache', 'result'])
+CACHE_EVICTIONS = Counter('cache_evictions_total', 'Entries evicted by cache', ['cache'])
+SWIPES = Counter('play_swipes_total', 'Swipes on /play by direction', ['direction'])
+APP_ERRORS = Counter('app_errors_total', 'Handled errors by where they happened', ['where'])
+LIVE_STREAMS = Gauge(
+    'live_streams_open', 'Open /live/plates event streams',
+    multiprocess_mode='livesum',
+)
+LIVE_DELTAS = Counter('live_deltas_total', 'Plate deltas queued for live streams')
+PLAY_CARD_IMAGES = Counter(
+    'play_card_images_total', 'Swiped /play cards by whether their image was loaded when shown (ready, waited, failed)',
+    ['state'],
+)
+PLAY_IMAGE_WAIT = Histogram(
+    'play_card_image_wait_seconds', 'Time a shown /play card waited for its image',
+    buckets=(.05, .1, .25, .5, 1, 2, 5, 10),
+)
+ADMISSION = Counter(
+    'admission_decisions_total', 'Admission control outcomes by class (admitted, queued, degraded, shed)',
+    ['route_class', 'outcome'],
+)
+
+
+def cache_hit(cache, count=1):
+    CACHE_REQUESTS.labels(cache, 'hit').inc(count)
+
+
+def cache_miss(cache, count=1):
+    CACHE_REQUESTS.labels(cache, 'miss').inc(count)
+
+
+@contextmanager
+def track_upstream(upstream):
+    """Time an outbound call; exceptions are counted by type and re-raised."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        UPSTREAM_ERRORS.labels(upstream, type(e).__name__).inc()
+        raise
+    finally:
+        UPSTREAM_LATENCY.labels(upstream).observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine):
+    """Track pool checkouts and checkout wait time for `engine` (call once per process)."""
+    if engine.pool.__dict__.get('_metrics_instrumented'):
+        return
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return connect(*args, **kwargs)
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+    pool.connect = timed_connect
+    pool._metrics_instrumented = True
+
+    event.listen(pool, 'connect', lambda *a: DB_POOL_CONNECTS.inc())
+    event.listen(pool, 'checkout', lambda *a: DB_POOL_IN_USE.inc())
+    event.listen(pool, 'checkin', lambda *a: DB_POOL_IN_USE.dec())
+
+
+def metrics_registry():
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def init_metrics(app, engine_getter):
+    """Register request timing hooks and the /metrics endpoint (optionally guarded by METRICS_TOKEN)."""
+    state = {'engine_instrumented': False}
+
+    @app.before_request
+    def _start_request_timer():
+        if not state['engine_instrumented']:
+            instrument_engine(engine_getter())
+            state['engine_instrumented'] = True
+        g._request_started = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.pop('_request_started', None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_LATENCY.labels(route, request.method, response.status_code).observe(
+                time.perf_counter() - started
+            )
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        token = os.getenv('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f"Bearer {token}":
+            abort(403)
+        return Response(generate_latest(metrics_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+    return metrics
@@ -0,0 +1,53 @@
+"""Add plate_search full-text index
+
+Revision ID: 7a41c2e9d0b5
+Revises: 3f9c1d7a2b64
+Create Date: 2026-10-19 11:26:05.914772
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a41c2e9d0b5'
+down_revision = '3f9c1d7a2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS plate_search USING fts5("
+            "name, description, restaurant, category, "
+            "tokenize='porter unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO plate_search (rowid, name, description, restaurant, category) "
+            "SELECT p.id, p.name, COALESCE(p.description, ''), COALESCE(r.name, ''), COALESCE(c.name, '') "
+            "FROM plate p LEFT JOIN restaurant r ON r.id = p.restaurant_id "
+            "LEFT JOIN category c ON c.id = p.category_id"
+        )
+    elif dialect == 'postgresql':
+        op.execute(
+            "CREATE TABLE IF NOT EXISTS plate_search ("
+            "plate_id INTEGER PRIMARY KEY REFERENCES plate(id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_plate_search_document ON plate_search USING GIN (document)")
+        op.execute(
+            "INSERT INTO plate_search (plate_id, document) "
+            "SELECT p.id, "
+            "setweight(to_tsvector('english', COALESCE(p.name, '')), 'A') || "
+            "setweight(to_tsvector('english', COALESCE(r.name, '')), 'B') || "
+            "setweight(to_tsvector('english', COALESCE(c.name, '')), 'B') || "
+            "setweight(to_tsvector('english', COALESCE(p.description, '')), 'C') "
+            "FROM plate p LEFT JOIN restaurant r ON r.id = p.restaurant_id "
+            "LEFT JOIN category c ON c.id = p.category_id"
+        )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS plate_search")
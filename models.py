@@ -1,132 +0,0 @@
-from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
-
-db = SQLAlchemy()
-
-# -------------------- User --------------------
-class User(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-    # Relationships
-    plates = db.relationship('Plate', backref='user', lazy=True)
-    likes = db.relationship('Like', backref='user', lazy=True)
-    comments = db.relationship('Comment', backref='user', lazy=True)
-    favorites = db.relationship('Favorite', backref='user', lazy=True)
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "username": self.username,
-            "email": self.email,
-            "created_at": self.created_at.isoformat()
-        }
-
-
-# -------------------- Restaurant --------------------
-class Restaurant(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(120), nullable=False)
-    address = db.Column(db.String(200))
-    website = db.Column(db.String(200))
-    latitude = db.Column(db.Float)
-    longitude = db.Column(db.Float)
-
-    # Relationship
-    plates = db.relationship('Plate', backref='restaurant', lazy=True)
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "address": self.address,
-            "website": self.website,
-            "latitude": self.latitude,
-            "longitude": self.longitude
-        }
-
-
-# -------------------- Plate --------------------
-class Plate(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    description = db.Column(db.Text)
-    category = db.Column(db.String(50))
-    rating = db.Column(db.Integer)
-    image_url = db.Column(db.String(200))
-    created_at = db.Column(db.DateTime, server_default=db.func.now())
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'))
-
-    likes = db.relationship('Like', backref='plate', lazy=True)
-    comments = db.relationship('Comment', backref='plate', lazy=True)
-
-    @property
-    def like_count(self):
-        return len(self.likes)  # Always returns 0+ safely
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "category": self.category,
-            "description": self.description,
-            "rating": self.rating,
-            "image_url": self.image_url,
-            "restaurant": {
-                "id": self.restaurant.id if self.restaurant else None,
-                "name": self.restaurant.name if self.restaurant else None,
-                "latitude": self.restaurant.latitude if self.restaurant else None,
-                "longitude": self.restaurant.longitude if self.restaurant else None
-            },
-            "likes": len(self.likes) if self.likes else 0
-        }
-
-
-# -------------------- Like --------------------
-class Like(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    plate_id = db.Column(db.Integer, db.ForeignKey('plate.id'), nullable=False)
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "plate_id": self.plate_id
-        }
-
-
-# -------------------- Comment --------------------
-class Comment(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    plate_id = db.Column(db.Integer, db.ForeignKey('plate.id'), nullable=False)
-    text = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "text": self.text,
-            "created_at": self.created_at.isoformat(),
-            "user": self.user.to_dict() if self.user else None,
-            "plate_id": self.plate_id
-        }
-
-
-# -------------------- Favorite --------------------
-class Favorite(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    plate_id = db.Column(db.Integer, db.ForeignKey('plate.id'), nullable=False)
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "plate_id": self.plate_id
-        }
@@ -0,0 +1,230 @@
+"""
+Opt-in per-request profiler.
+
+A request is profiled when an admin sends `X-Profile: sampling|cprofile`, or
+when it is picked by PROFILE_SAMPLE_RATE (sampled requests are only kept if
+they take longer than PROFILE_SLOW_MS). Each profile is written to
+PROFILE_DIR as one of:
+
+  * <id>.speedscope.json - stack samples, open at https://www.speedscope.app
+  * <id>.prof            - cProfile stats, open with `python -m pstats` or snakeviz
+
+plus <id>.json with the request's time split into SQL, template rendering,
+outbound HTTP and everything else. /admin/profiles lists the recent ones.
+"""
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import g, has_app_context, request, template_rendered, before_render_template
+
+from sqltrace import count_queries
+
+PROFILE_MODES = ('sampling', 'cprofile')
+
+
+def add_phase_time(phase, seconds):
+    """Attribute `seconds` to `phase` ('outbound', ...) if the current request is being profiled."""
+    if has_app_context():
+        phases = g.get('_profile_phases')
+        if phases is not None:
+            phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer; output is a speedscope 'sampled' profile."""
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                stack.reverse()
+                self.samples.append((stack, now - last))
+            last = now
+            time.sleep(self.interval)
+
+    def to_speedscope(self, name):
+        frames, frame_index, samples, weights = [], {}, [], []
+        for stack, weight in self.samples:
+            indexes = []
+            for key in stack:
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({'name': key[0], 'file': key[1], 'line': key[2]})
+                indexes.append(frame_index[key])
+            samples.append(indexes)
+            weights.append(weight)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'plater8te',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled', 'name': name, 'unit': 'seconds',
+                'startValue': 0, 'endValue': sum(weights),
+                'samples': samples, 'weights': weights,
+            }],
+        }
+
+
+def list_profiles(directory, limit=100):
+    """Metadata of the most recent profiles, slowest first."""
+    if not os.path.isdir(directory):
+        return []
+    metas = []
+    for name in os.listdir(directory):
+        if name.endswith('.json') and not name.endswith('.speedscope.json'):
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    metas.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    metas.sort(key=lambda m: m.get('created_at', ''), reverse=True)
+    return sorted(metas[:limit], key=lambda m: m.get('total_ms', 0), reverse=True)
+
+
+def _prune(directory, keep):
+    metas = sorted(
+        (n for n in os.listdir(directory) if n.endswith('.json') and not n.endswith('.speedscope.json')),
+        key=lambda n: os.path.getmtime(os.path.join(directory, n)),
+    )
+    for name in metas[:-keep] if len(metas) > keep else []:
+        profile_id = name[:-len('.json')]
+        for suffix in ('.json', '.prof', '.speedscope.json'):
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except OSError:
+                pass
+
+
+def init_profiler(app, is_admin):
+    app.config.setdefault('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+    app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+    app.config.setdefault('PROFILE_SLOW_MS', 500)
+    app.config.setdefault('PROFILE_KEEP', 200)
+    app.config.setdefault('PROFILER_TOKEN', None)
+
+    def requested_mode():
+        mode = request.headers.get('X-Profile')
+        if not mode:
+            return None
+        token = app.config['PROFILER_TOKEN']
+        if is_admin() or (token and request.headers.get('X-Profile-Token') == token):
+            return mode if mode in PROFILE_MODES else 'sampling'
+        return None
+
+    @app.before_request
+    def _start_profile():
+        mode = requested_mode()
+        forced = mode is not None
+        if not forced and random.random() < app.config['PROFILE_SAMPLE_RATE']:
+            mode = 'sampling'
+        if not mode:
+            return
+
+        state = {'mode': mode, 'forced': forced, 'started': time.perf_counter()}
+        state['sql'] = count_queries()
+        state['sql_stats'] = state['sql'].__enter__()
+        if mode == 'cprofile':
+            state['profiler'] = cProfile.Profile()
+            state['profiler'].enable()
+        else:
+            state['profiler'] = StackSampler(threading.get_ident())
+            state['profiler'].start()
+        g._profile = state
+        g._profile_phases = {'template': 0.0, 'outbound': 0.0}
+
+    @app.after_request
+    def _finish_profile(response):
+        state = g.pop('_profile', None)
+        if state is None:
+            return response
+        phases = g.pop('_profile_phases', {})
+        profiler = state['profiler']
+        if state['mode'] == 'cprofile':
+            profiler.disable()
+        else:
+            profiler.stop()
+        state['sql'].__exit__(None, None, None)
+
+        total_ms = (time.perf_counter() - state['started']) * 1000
+        if not state['forced'] and total_ms < app.config['PROFILE_SLOW_MS']:
+            return response
+
+        directory = app.config['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        profile_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{request.endpoint or 'unmatched'}-{uuid.uuid4().hex[:6]}"
+        if state['mode'] == 'cprofile':
+            data_file = f"{profile_id}.prof"
+            profiler.dump_stats(os.path.join(directory, data_file))
+        else:
+            data_file = f"{profile_id}.speedscope.json"
+            with open(os.path.join(directory, data_file), 'w') as f:
+                json.dump(profiler.to_speedscope(f"{request.method} {request.path}"), f)
+
+        sql_ms = state['sql_stats'].duration * 1000
+        template_ms = phases.get('template', 0.0) * 1000
+        outbound_ms = phases.get('outbound', 0.0) * 1000
+        meta = {
+            'id': profile_id,
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'mode': state['mode'],
+            'forced': state['forced'],
+            'file': data_file,
+            'total_ms': round(total_ms, 1),
+            'sql_ms': round(sql_ms, 1),
+            'sql_queries': state['sql_stats'].count,
+            'template_ms': round(template_ms, 1),
+            'outbound_ms': round(outbound_ms, 1),
+            'python_ms': round(max(0.0, total_ms - sql_ms - template_ms - outbound_ms), 1),
+        }
+        with open(os.path.join(directory, f"{profile_id}.json"), 'w') as f:
+            json.dump(meta, f)
+        _prune(directory, app.config['PROFILE_KEEP'])
+
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @before_render_template.connect_via(app)
+    def _template_started(sender, template, context, **extra):
+        if g.get('_profile_phases') is not None:
+            g._template_started = time.perf_counter()
+
+    @template_rendered.connect_via(app)
+    def _template_finished(sender, template, context, **extra):
+        started = g.pop('_template_started', None)
+        if started is not None:
+            add_phase_time('template', time.perf_counter() - started)
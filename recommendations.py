@@ -0,0 +1,66 @@
+"""
+Item-item collaborative filtering for the /play deck.
+
+The offline job (`flask build-recommendations`) feeds every UserPlate signal
+into compute_item_similarities(), which builds a sparse user x plate matrix and
+returns the top-K most similar plates for each plate by cosine similarity.
+numpy/scipy are imported inside the function so web workers never load them.
+"""
+
+
+def interaction_strength(rated, liked):
+    """
+    How strongly a UserPlate row says the user is into the plate, in [0, 2].
+    A like counts 1; a rating adds (rating - 2) / 3, so 1-2 stars add nothing.
+    """
+    strength = 1.0 if liked else 0.0
+    if rated and rated > 2:
+        strength += (rated - 2) / 3.0
+    return strength
+
+
+def compute_item_similarities(user_ids, plate_ids, strengths, top_k=50, min_score=0.05):
+    """
+    Cosine similarity between plates over users' interaction strengths.
+
+    user_ids, plate_ids and strengths are parallel sequences, one entry per
+    (user, plate) interaction. Returns a list of (plate_id, similar_plate_id, score)
+    holding at most top_k neighbours per plate, best first.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    if len(user_ids) == 0:
+        return []
+
+    users, user_idx = np.unique(np.asarray(user_ids), return_inverse=True)
+    plates, plate_idx = np.unique(np.asarray(plate_ids), return_inverse=True)
+    values = np.asarray(strengths, dtype=np.float32)
+
+    # users x plates, duplicates summed; then scale each plate column to unit length
+    x = sparse.csr_matrix((values, (user_idx, plate_idx)), shape=(len(users), len(plates)))
+    norms = np.sqrt(np.asarray(x.multiply(x).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    x = x @ sparse.diags(1.0 / norms)
+
+    sims = (x.T @ x).tocsr()
+    sims.setdiag(0)
+    sims.eliminate_zeros()
+
+    out = []
+    for row in range(sims.shape[0]):
+        start, end = sims.indptr[row], sims.indptr[row + 1]
+        if start == end:
+            continue
+        scores = sims.data[start:end]
+        cols = sims.indices[start:end]
+        if len(scores) > top_k:
+            keep = np.argpartition(-scores, top_k)[:top_k]
+            scores, cols = scores[keep], cols[keep]
+        order = np.argsort(-scores)
+        plate_id = int(plates[row])
+        for score, col in zip(scores[order], cols[order]):
+            if score < min_score:
+                break
+            out.append((plate_id, int(plates[col]), float(score)))
+    return out
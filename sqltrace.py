@@ -0,0 +1,169 @@
+"""
+Per-request SQL instrumentation and N+1 detection.
+
+SQLAlchemy cursor events count every statement a request runs, its total DB
+time and how often each statement *shape* (SQL text with IN-lists collapsed)
+repeats. A shape repeated SQL_N_PLUS_ONE_THRESHOLD times or more in one request
+is almost always a lazy load inside a loop. Shapes with an IN list of bound
+parameters are exempt: repeats of those are chunked batch loads (the fix for
+N+1), which only the query budget limits.
+
+Each response gets a `Server-Timing: db;dur=...` header and a one-line log
+summary. With SQL_STRICT enabled (tests), going over the endpoint's query
+budget or tripping the N+1 detector raises QueryBudgetExceeded.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('plater8te.sql')
+
+_BIND = r'(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)'
+_IN_BIND_LIST = re.compile(rf'IN\s*\(\s*{_BIND}(?:\s*,\s*{_BIND})*\s*\)', re.IGNORECASE)
+_IN_LIST = re.compile(r'IN\s*\((?:[^()]|\([^()]*\))*\)', re.IGNORECASE)
+BATCH_TOKEN = 'IN [batch]'  # no parentheses, so _IN_LIST leaves it alone
+_WHITESPACE = re.compile(r'\s+')
+_local = threading.local()
+_listening = False
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def statement_shape(statement):
+    """
+    SQL with whitespace normalized and IN (...) lists collapsed, so expanding params share
+    a shape; a list of bound parameters becomes BATCH_TOKEN.
+    """
+    shape = _IN_LIST.sub('IN (...)', _IN_BIND_LIST.sub(BATCH_TOKEN, statement))
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class QueryStats:
+    __slots__ = ('count', 'duration', 'shapes')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold):
+        """Shapes run `threshold` times or more, except batch loads (see BATCH_TOKEN)."""
+        return [(shape, n) for shape, n in self.shapes.most_common()
+                if n >= threshold and BATCH_TOKEN not in shape]
+
+
+def _collectors():
+    stats = []
+    if has_app_context():
+        request_stats = g.get('_sql_stats')
+        if request_stats is not None:
+            stats.append(request_stats)
+    stats.extend(getattr(_local, 'collectors', ()))
+    return stats
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_sql_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_sql_query_start')
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    for stats in _collectors():
+        stats.record(statement, duration)
+
+
+@contextmanager
+def count_queries():
+    """Collect QueryStats for everything run inside the block (same thread), requests included."""
+    stats = QueryStats()
+    collectors = getattr(_local, 'collectors', None)
+    if collectors is None:
+        collectors = _local.collectors = []
+    collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        collectors.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(budget, n_plus_one_threshold=None):
+    """Fail (QueryBudgetExceeded) if the block runs more than `budget` statements, e.g. around a test-client call."""
+    with count_queries() as stats:
+        yield stats
+    problems = _budget_problems(stats, budget, n_plus_one_threshold)
+    if problems:
+        raise QueryBudgetExceeded('; '.join(problems))
+
+
+def _budget_problems(stats, budget, n_plus_one_threshold):
+    problems = []
+    if budget is not None and stats.count > budget:
+        problems.append(f"{stats.count} queries (budget {budget})")
+    if n_plus_one_threshold:
+        for shape, n in stats.repeated(n_plus_one_threshold):
+            problems.append(f"N+1 suspect x{n}: {shape[:200]}")
+    return problems
+
+
+def init_sql_instrumentation(app):
+    global _listening
+    app.config.setdefault('SQL_INSTRUMENTATION', True)
+    app.config.setdefault('SQL_N_PLUS_ONE_THRESHOLD', 5)
+    app.config.setdefault('SQL_DEFAULT_QUERY_BUDGET', None)
+    app.config.setdefault('SQL_QUERY_BUDGETS', {})  # endpoint name -> max queries
+    app.config.setdefault('SQL_STRICT', False)
+
+    if not _listening:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _listening = True
+
+    @app.before_request
+    def _start_sql_stats():
+        if app.config['SQL_INSTRUMENTATION']:
+            g._sql_stats = QueryStats()
+
+    @app.after_request
+    def _report_sql_stats(response):
+        stats = g.pop('_sql_stats', None)
+        if stats is None:
+            return response
+
+        ms = stats.duration * 1000
+        timing = f'db;dur={ms:.1f};desc="{stats.count} queries"'
+        existing = response.headers.get('Server-Timing')
+        response.headers['Server-Timing'] = f"{existing}, {timing}" if existing else timing
+
+        threshold = app.config['SQL_N_PLUS_ONE_THRESHOLD']
+        repeated = stats.repeated(threshold)
+        summary = f"{request.method} {request.path} [{request.endpoint}] {stats.count} queries {ms:.1f}ms"
+        if repeated:
+            logger.warning("%s; repeated statements: %s", summary,
+                           ' | '.join(f"x{n} {shape[:120]}" for shape, n in repeated))
+        else:
+            logger.info(summary)
+
+        if app.config['SQL_STRICT']:
+            budget = app.config['SQL_QUERY_BUDGETS'].get(request.endpoint, app.config['SQL_DEFAULT_QUERY_BUDGET'])
+            problems = _budget_problems(stats, budget, threshold)
+            if problems:
+                raise QueryBudgetExceeded(f"{request.endpoint}: " + '; '.join(problems))
+        return response
@@ -0,0 +1,138 @@
+"""
+Synthetic data for load and benchmark runs (`flask seed-synthetic`).
+
+Restaurants are scattered around real city centres, plates belong to
+restaurants and categories, and UserPlate activity is heavy-tailed on both
+sides: a few users rate/like a lot, a few plates get most of the attention.
+Everything is generated as plain dicts in chunks so 1M plates never sit in
+memory as ORM objects. Same seed, same data.
+"""
+from datetime import datetime, timedelta
+
+CITIES = [
+    ('New York', 40.7128, -74.0060), ('Los Angeles', 34.0522, -118.2437),
+    ('Chicago', 41.8781, -87.6298), ('Houston', 29.7604, -95.3698),
+    ('Phoenix', 33.4484, -112.0740), ('Philadelphia', 39.9526, -75.1652),
+    ('San Antonio', 29.4241, -98.4936), ('San Diego', 32.7157, -117.1611),
+    ('Dallas', 32.7767, -96.7970), ('Austin', 30.2672, -97.7431),
+    ('Seattle', 47.6062, -122.3321), ('Miami', 25.7617, -80.1918),
+    ('Denver', 39.7392, -104.9903), ('Boston', 42.3601, -71.0589),
+    ('Portland', 45.5152, -122.6784), ('Atlanta', 33.7490, -84.3880),
+]
+# Bigger cities get proportionally more restaurants
+CITY_WEIGHTS = [30, 18, 12, 9, 6, 6, 5, 5, 5, 4, 4, 4, 3, 3, 2, 2]
+
+FIRST = ["Joe's", "Mama", "Golden", "Little", "Blue", "Lucky", "Royal", "Happy", "Old Town",
+         "Sunset", "Casa", "El", "La", "Le", "Big", "Green", "Red", "Silver", "Urban", "Corner"]
+SECOND = ["Dragon", "Olive", "Taco", "Noodle", "Burger", "Pizza", "Sushi", "Curry", "Bistro",
+          "Garden", "Grill", "Kitchen", "Diner", "Cantina", "Trattoria", "Bakery", "Pho", "BBQ",
+          "Ramen", "Deli", "Smokehouse", "Tavern", "Brasserie", "Creperie", "Dumpling"]
+THIRD = ["House", "Bar", "Cafe", "Co", "Express", "Spot", "Place", "Shack", "Room", ""]
+STYLES = ["Spicy", "Classic", "Crispy", "Smoked", "Grilled", "Loaded", "Garlic", "Truffle",
+          "Honey", "Street-Style", "Double", "Vegan", "House", "Chef's", "Midnight"]
+DISHES = ["Tuna Roll", "Margherita Pizza", "Carnitas Taco", "Pad Thai", "Chicken Tikka",
+          "Cheeseburger", "Pho Bo", "Tonkotsu Ramen", "Falafel Wrap", "Brisket Plate",
+          "Pancake Stack", "Caesar Salad", "Lobster Roll", "Fish Tacos", "Beef Bulgogi",
+          "Lasagna", "Pepperoni Slice", "Dumplings", "Gyro", "Burrito", "Churros", "Waffles"]
+ADJECTIVES = ["perfectly seasoned", "huge portion", "a bit salty", "worth the wait",
+              "crispy on the outside", "melts in your mouth", "better than it looks",
+              "messy but amazing", "would order again", "overpriced but good"]
+COMMENTS = ["So good!", "Best in town.", "Meh, it was fine.", "Try it with extra sauce.",
+            "Came back twice this week.", "Portion was smaller than last time.",
+            "Underrated spot.", "Not worth the hype.", "Perfect late-night food.", "🔥🔥🔥"]
+
+
+def skewed_index(rng, n, skew):
+    """Index in [0, n) biased towards 0; higher skew = heavier head."""
+    return min(n - 1, int(n * rng.random() ** skew))
+
+
+def restaurant_rows(rng, count, start_id=1):
+    for i in range(start_id, start_id + count):
+        city, clat, clon = rng.choices(CITIES, weights=CITY_WEIGHTS)[0]
+        name = " ".join(w for w in (rng.choice(FIRST), rng.choice(SECOND), rng.choice(THIRD)) if w)
+        yield {
+            'id': i,
+            'name': name,
+            'address': f"{rng.randint(1, 9999)} {rng.choice(SECOND)} St, {city}",
+            'latitude': clat + rng.gauss(0, 0.06),
+            'longitude': clon + rng.gauss(0, 0.06),
+        }
+
+
+def user_rows(count, password_hash, start_id=1, now=None):
+    now = now or datetime.utcnow()
+    for i in range(start_id, start_id + count):
+        yield {
+            'id': i,
+            'username': f"user{i}",
+            'email': f"user{i}@example.com",
+            'password_hash': password_hash,
+            'created_at': now - timedelta(days=i % 365),
+        }
+
+
+def plate_rows(rng, count, user_ids, restaurant_ids, category_ids, start_id=1, now=None):
+    now = now or datetime.utcnow()
+    for i in range(start_id, start_id + count):
+        yield {
+            'id': i,
+            'name': f"{rng.choice(STYLES)} {rng.choice(DISHES)}",
+            'description': f"{rng.choice(ADJECTIVES).capitalize()}, {rng.choice(ADJECTIVES)}.",
+            'category_id': rng.choice(category_ids),
+            'restaurant_id': restaurant_ids[skewed_index(rng, len(restaurant_ids), 1.5)],
+            'user_id': user_ids[skewed_index(rng, len(user_ids), 2.0)],
+            'image_url': None,
+            'created_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 180)),
+        }
+
+
+def user_plate_rows(rng, user_ids, plate_ids, per_user, start_id=1, now=None):
+    """
+    Roughly `per_user` UserPlate rows per user on average, Pareto-distributed
+    per user, with plates drawn from a popularity-skewed distribution.
+    """
+    now = now or datetime.utcnow()
+    row_id = start_id
+    for user_id in user_ids:
+        n = min(len(plate_ids), int(per_user * 0.5 * rng.paretovariate(2.0)))
+        seen = set()
+        for _ in range(n):
+            plate_id = plate_ids[skewed_index(rng, len(plate_ids), 3.0)]
+            if plate_id in seen:
+                continue
+            seen.add(plate_id)
+            rated = rng.choices([None, 1, 2, 3, 4, 5], weights=[35, 3, 6, 15, 24, 17])[0]
+            yield {
+                'id': row_id,
+                'user_id': user_id,
+                'plate_id': plate_id,
+                'liked': rng.random() < 0.4,
+                'favorite': rng.random() < 0.1,
+                'rated': rated,
+                'updated_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+            }
+            row_id += 1
+
+
+def comment_rows(rng, count, user_ids, plate_ids, start_id=1, now=None):
+    now = now or datetime.utcnow()
+    for i in range(start_id, start_id + count):
+        yield {
+            'id': i,
+            'user_id': user_ids[skewed_index(rng, len(user_ids), 2.0)],
+            'plate_id': plate_ids[skewed_index(rng, len(plate_ids), 3.0)],
+            'text': rng.choice(COMMENTS),
+            'created_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 60)),
+        }
+
+
+def chunked(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
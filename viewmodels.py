@@ -0,0 +1,85 @@
+"""
+Slotted view-models for the plate card pages (feed, search, favorites, unrated).
+
+The pages used to get full Plate objects with user_plates, comments and
+Comment.user loaded, plus avg_rating / like_count / user_liked patched on.
+Each request hydrated thousands of tracked ORM objects just to print a few
+fields. Now the routes select the columns a card shows (see CARD_COLUMNS in
+app.py) and build PlateCard rows from them. Ratings and likes come from the
+denormalized counters on Plate. The current user's flags and the comments are
+each fetched for the whole page in one query. Nothing here enters the session
+identity map.
+"""
+
+
+class CommentView:
+    __slots__ = ('id', 'username', 'text', 'created_at')
+
+    def __init__(self, id, username, text, created_at):
+        self.id = id
+        self.username = username
+        self.text = text
+        self.created_at = created_at
+
+
+class PlateCard:
+    __slots__ = ('id', 'name', 'description', 'image_url', 'created_at',
+                 'restaurant_name', 'latitude', 'longitude', 'category_name',
+                 'user_id', 'username', 'avg_rating', 'like_count', 'comment_count',
+                 'user_liked', 'user_favorited', 'user_rating', 'comments')
+
+    def __init__(self, id, name, description, image_url, created_at, restaurant_name,
+                 latitude, longitude, category_name, user_id, username,
+                 ratings_count, ratings_total, likes_total, comments_total):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.image_url = image_url
+        self.created_at = created_at
+        self.restaurant_name = restaurant_name
+        self.latitude = latitude
+        self.longitude = longitude
+        self.category_name = category_name
+        self.user_id = user_id
+        self.username = username
+        self.avg_rating = round(ratings_total / ratings_count, 1) if ratings_count else 0
+        self.like_count = likes_total or 0
+        self.comment_count = comments_total or 0
+        self.user_liked = False
+        self.user_favorited = False
+        self.user_rating = None
+        self.comments = ()
+
+
+def cards_from_rows(rows):
+    """PlateCards from rows shaped like CARD_COLUMNS, in row order."""
+    return [PlateCard(*row) for row in rows]
+
+
+def attach_user_flags(cards, rows):
+    """Set like/favorite/rating from (plate_id, liked, favorite, rated) rows for one user."""
+    by_id = {card.id: card for card in cards}
+    for plate_id, liked, favorite, rated in rows:
+        card = by_id.get(plate_id)
+        if card is not None:
+            card.user_liked = bool(liked)
+            card.user_favorited = bool(favorite)
+            card.user_rating = rated
+
+
+def attach_comments(cards, rows):
+    """Group (plate_id, comment_id, username, text, created_at) rows, oldest first, onto their cards."""
+    grouped = {}
+    for plate_id, comment_id, username, text, created_at in rows:
+        grouped.setdefault(plate_id, []).append(CommentView(comment_id, username, text, created_at))
+    for card in cards:
+        card.comments = grouped.get(card.id, ())
+        # Comments whose author is gone are dropped, so count what will be shown
+        card.comment_count = len(card.comments)
+
+
+def chunks(ids, size=500):
+    """Split ids for IN (...) lists that stay under SQLite's bound-parameter limit."""
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]